@@ -0,0 +1,88 @@
+import os
+import time
+from collections import OrderedDict
+from analytics.singleflight import SingleFlight
+from ingestion.serving import serving_generation
+
+# In-process cache for analytics responses. Entries are tagged with the data
+# generation and serving snapshot they were computed from (see
+# ingestion/serving.py), so a result is never served after an ingestor or the
+# classifier has written or a new snapshot has been published.
+CACHE_MAX_ENTRIES = int(os.environ.get("ANALYTICS_CACHE_MAX_ENTRIES", 256))
+CACHE_TTL_SECONDS = float(os.environ.get("ANALYTICS_CACHE_TTL", 3600))
+
+class ResponseCache:
+    """
+    LRU cache of endpoint results keyed by (endpoint, params), with a size cap,
+    a TTL and data-generation tagging. Concurrent misses for the same key
+    are coalesced into a single computation.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, generation=serving_generation):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = generation
+        self.flight = SingleFlight()
+        self.entries = OrderedDict()  # key -> (generation, expires_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale = 0
+
+    def get(self, key, generation):
+        entry = self.entries.get(key)
+        if entry is None:
+            return False, None
+        entry_generation, expires_at, value = entry
+        if entry_generation != generation or expires_at <= time.monotonic():
+            del self.entries[key]
+            self.stale += 1
+            return False, None
+        self.entries.move_to_end(key)
+        return True, value
+
+    def put(self, key, generation, value):
+        self.entries[key] = (generation, time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, endpoint: str, params: dict, compute):
+        """
+        Returns the cached result for (endpoint, params) if it belongs to the
+        current data generation, otherwise awaits compute() and caches it.
+        The generation is read before computing, so a write that lands while
+        compute() runs leaves the new entry already stale.
+        """
+        key = (endpoint, tuple(sorted(params.items())))
+        generation = self.generation()
+        found, value = self.get(key, generation)
+        if found:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = await self.flight.do((key, generation), compute)
+        self.put(key, generation, value)
+        return value
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "generation": self.generation(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            **self.flight.stats(),
+        }
+
+response_cache = ResponseCache()
@@ -0,0 +1,142 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from sqlalchemy import select
+from ingestion.database import ReaderSessionLocal, BudgetBreakdown, init_db
+from processing.analytics_logic import (
+    calculate_admin_tax,
+    calculate_historical_admin_tax,
+    get_budget_breakdown,
+    get_historical_budget_trends,
+    get_lobbying_network,
+)
+
+try:
+    import brotli
+except ImportError:  # optional: only the .gz siblings are written without it
+    brotli = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Static snapshot of the analytics API for the frontend (app/page.tsx reads
+# /data/*.json), written next to the Next.js public assets.
+EXPORT_DIR = os.environ.get(
+    "STATIC_EXPORT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "public", "data"),
+)
+
+def encode(payload) -> bytes:
+    # Same layout as the files checked in under public/data
+    return json.dumps(payload, indent=2, ensure_ascii=False).encode("utf-8")
+
+def compressed_siblings(data: bytes) -> dict:
+    """
+    Returns {suffix: bytes} of pre-compressed variants of a file's contents.
+    """
+    siblings = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        siblings[".br"] = brotli.compress(data, quality=11)
+    return siblings
+
+def write_atomic(path, data: bytes):
+    """
+    Writes data to path through a temp file in the same directory and
+    os.replace, so readers see either the old or the new file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".export-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def file_sha256(path):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+def export_file(directory, name, payload) -> bool:
+    """
+    Writes <name> and its compressed siblings unless the existing file already
+    has the same content hash (and the siblings exist).
+    Returns True if anything was written.
+    """
+    data = encode(payload)
+    path = os.path.join(directory, name)
+    siblings = compressed_siblings(data)
+
+    unchanged = file_sha256(path) == hashlib.sha256(data).hexdigest()
+    if unchanged and all(os.path.exists(path + suffix) for suffix in siblings):
+        return False
+
+    # Siblings first, so a fresh .json never sits next to stale compressed copies
+    for suffix, sibling in siblings.items():
+        write_atomic(path + suffix, sibling)
+    write_atomic(path, data)
+    return True
+
+async def budget_years():
+    async with ReaderSessionLocal() as session:
+        result = await session.execute(select(BudgetBreakdown.year).distinct().order_by(BudgetBreakdown.year))
+        return result.scalars().all()
+
+async def from_live_db(fn, *args):
+    # The export is a batch step: read the database itself, not the API's snapshot
+    async with ReaderSessionLocal() as session:
+        return await fn(*args, session=session)
+
+async def build_snapshot() -> dict:
+    """
+    Computes every exported file concurrently. Returns {file name: payload}.
+    """
+    years = await budget_years()
+    admin_tax, trends, budget_trends, lobbying, *breakdowns = await asyncio.gather(
+        from_live_db(calculate_admin_tax),
+        from_live_db(calculate_historical_admin_tax),
+        from_live_db(get_historical_budget_trends),
+        from_live_db(get_lobbying_network),
+        *(from_live_db(get_budget_breakdown, year) for year in years),
+    )
+
+    files = {
+        "admin-tax.json": admin_tax,
+        "trends-admin-tax.json": trends,
+        "trends-budget.json": budget_trends,
+        "lobbying-network.json": lobbying,
+    }
+    for year, breakdown in zip(years, breakdowns):
+        if breakdown is not None:
+            files[f"budget-breakdown-{year}.json"] = breakdown
+    return files
+
+async def export_static(directory=EXPORT_DIR):
+    """
+    Regenerates public/data from healthcare.db, rewriting only the files
+    whose content changed. Returns the list of file names written.
+    """
+    await init_db()
+    os.makedirs(directory, exist_ok=True)
+    files = await build_snapshot()
+
+    written = []
+    for name, payload in files.items():
+        if await asyncio.to_thread(export_file, directory, name, payload):
+            written.append(name)
+    logger.info(f"Static export: {len(written)} of {len(files)} files updated in {os.path.normpath(directory)}.")
+    if brotli is None:
+        logger.info("brotli is not installed; wrote .gz siblings only.")
+    return written
+
+if __name__ == "__main__":
+    asyncio.run(export_static())
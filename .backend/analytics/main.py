@@ -1,11 +1,21 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from processing.analytics_logic import calculate_admin_tax, calculate_historical_admin_tax, get_budget_breakdown
-from ingestion.database import AsyncSessionLocal, LobbyingEntry
-from sqlalchemy import select
+from processing.analytics_logic import calculate_admin_tax, calculate_historical_admin_tax, get_budget_breakdown, get_lobbying_network, get_dashboard, DASHBOARD_PANELS
+from processing.columnar import ANALYTICS_ENGINE, sunshine_columns
+from analytics.cache import response_cache
+from analytics.metrics import CONTENT_TYPE, MetricsMiddleware, instrument_engines, registry
+from analytics.slow_queries import slow_query_log, watch_engines
+from contextlib import asynccontextmanager
 import logging
 
-app = FastAPI(title="Healthcare Accountability Project API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the arrays before the first request rather than during it
+    if ANALYTICS_ENGINE == "columnar":
+        await sunshine_columns()
+    yield
+
+app = FastAPI(title="Healthcare Accountability Project API", lifespan=lifespan)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -17,42 +27,63 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route request metrics and per-query database metrics for /api/metrics
+app.add_middleware(MetricsMiddleware)
+instrument_engines()
+# Statements slower than SLOW_QUERY_MS, with their query plans
+watch_engines()
+
 @app.get("/api/health")
 async def health_check():
     return {"status": "ok"}
 
 @app.get("/api/admin-tax")
 async def get_admin_tax(year: int = None):
-    return await calculate_admin_tax(year)
+    return await response_cache.get_or_compute("admin-tax", {"year": year}, lambda: calculate_admin_tax(year))
 
 @app.get("/api/trends/admin-tax")
 async def get_historical_admin_tax():
-    return await calculate_historical_admin_tax()
+    return await response_cache.get_or_compute("trends/admin-tax", {}, calculate_historical_admin_tax)
 
 @app.get("/api/trends/budget")
 async def get_budget_trends():
     from processing.analytics_logic import get_historical_budget_trends
-    return await get_historical_budget_trends()
+    return await response_cache.get_or_compute("trends/budget", {}, get_historical_budget_trends)
 
 @app.get("/api/budget/breakdown")
 async def get_budget_data(year: int = 2023):
-    return await get_budget_breakdown(year)
+    return await response_cache.get_or_compute("budget/breakdown", {"year": year}, lambda: get_budget_breakdown(year))
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    return response_cache.stats()
+
+@app.get("/api/metrics")
+async def get_metrics():
+    # Prometheus text exposition format
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+@app.get("/api/debug/slow-queries")
+async def get_slow_queries(limit: int = None):
+    # Newest first
+    return slow_query_log.snapshot(limit)
+
+@app.get("/api/dashboard")
+async def get_dashboard_data(year: int = None, budget_year: int = 2023, fields: str = None):
+    # All dashboard panels in one round trip; ?fields=admin_tax,trends_budget selects a subset
+    selected = None
+    if fields:
+        selected = sorted({f.strip() for f in fields.split(",") if f.strip()})
+        unknown = [f for f in selected if f not in DASHBOARD_PANELS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(DASHBOARD_PANELS)}")
+    params = {"year": year, "budget_year": budget_year, "fields": tuple(selected) if selected else None}
+    return await response_cache.get_or_compute("dashboard", params, lambda: get_dashboard(year, budget_year, selected))
 
 @app.get("/api/lobbying-network")
-async def get_lobbying_network():
+async def get_lobbying_network_data():
     # Return raw data for frontend graph construction
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(select(LobbyingEntry).limit(100))
-        entries = result.scalars().all()
-        return [
-            {
-                "lobbyist": e.lobbyist_name,
-                "client": e.client_org,
-                "target": e.government_institution,
-                "subject": e.subject_matter
-            }
-            for e in entries
-        ]
+    return await get_lobbying_network()
 
 if __name__ == "__main__":
     import uvicorn
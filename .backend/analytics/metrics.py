@@ -0,0 +1,286 @@
+import contextvars
+import math
+import threading
+import time
+import weakref
+from sqlalchemy import event
+from ingestion.database import on_engine_created
+
+# Prometheus metrics for the API, served by /api/metrics in the text
+# exposition format. Requests are measured by MetricsMiddleware (an ASGI
+# middleware) and database work by SQLAlchemy event hooks installed on every
+# engine (instrument_engines), so no analytic function knows about them.
+# Queries are labelled with the route of the request that ran them, which
+# is what points at the slow analytic under load.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; requests and queries here range from sub-millisecond cache hits
+# to multi-second raw scans
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(9))  # 256 B .. 16 MB
+
+# Route of the request being served, for the query metrics ("none" outside requests)
+current_route = contextvars.ContextVar("metrics_route", default="none")
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.values = {}  # label values -> value
+        self._lock = threading.Lock()
+
+    def expose(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self.values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+class Gauge(_Metric):
+    """
+    Gauge set by the code (inc/dec/set), or computed at scrape time by
+    collect() returning {label values: value}.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=(), collect=None):
+        super().__init__(name, help, labels)
+        self.collect = collect
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        with self._lock:
+            self.values[labels] = value
+
+    def expose(self) -> list:
+        if self.collect is not None:
+            collected = self.collect()
+            with self._lock:
+                self.values = dict(collected)
+        return super().expose()
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self.values.get(labels)
+            if series is None:
+                # Per-bucket counts (cumulated on exposition), sum, count
+                series = self.values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def expose(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self.values.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines += metric.expose()
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests served.", ("route", "method", "status")))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to the end of the response body, per route.", ("route", "method")))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Requests being served, per route.", ("route",)))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Response body size, per route.", ("route",), buckets=SIZE_BUCKETS))
+
+db_queries = registry.register(Counter(
+    "db_queries_total", "SQL statements executed, per engine and API route.", ("engine", "route")))
+db_query_errors = registry.register(Counter(
+    "db_query_errors_total", "SQL statements that raised, per engine and API route.", ("engine", "route")))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "SQL statement execution time, per engine and API route.", ("engine", "route")))
+db_pool_checkout_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time to get a connection from the pool (waiting for a free one or opening one).", ("engine",)))
+
+_engines = {}  # engine profile -> WeakSet of its (sync) engines, for the gauges below
+
+def _pool_gauge(read):
+    def collect():
+        values = {}
+        for profile, engines in _engines.items():
+            values[(profile,)] = sum(read(engine.pool) for engine in list(engines))
+        return values
+    return collect
+
+db_pool_checked_out = registry.register(Gauge(
+    "db_pool_checked_out", "Connections currently checked out.", ("engine",),
+    collect=_pool_gauge(lambda pool: pool.checkedout())))
+db_pool_size = registry.register(Gauge(
+    "db_pool_size", "Pool size (connections allowed without overflow).", ("engine",),
+    collect=_pool_gauge(lambda pool: pool.size() if hasattr(pool, "size") else 0)))
+
+def _time_checkouts(sync_engine, profile):
+    # No pool event marks the start of a checkout, so the engine's public
+    # connect() is timed instead: sessions and AsyncEngine.connect() go
+    # through it, and it blocks while the pool is exhausted (or opens a new
+    # connection when the pool has room). It outlives dispose(), which only
+    # swaps the pool.
+    connect = sync_engine.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - start, profile)
+
+    sync_engine.connect = timed_connect
+
+def instrument_engine(engine, profile):
+    """
+    Event hooks feeding the db_* metrics for one engine.
+    """
+    sync_engine = engine.sync_engine
+    if getattr(sync_engine, "_metrics_instrumented", False):
+        return
+    sync_engine._metrics_instrumented = True
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_query_start"].pop()
+        route = current_route.get()
+        db_queries.inc(profile, route)
+        db_query_duration.observe(time.perf_counter() - started, profile, route)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_query_start"):
+            conn.info["metrics_query_start"].pop()
+        db_query_errors.inc(profile, current_route.get())
+
+    _time_checkouts(sync_engine, profile)
+    _engines.setdefault(profile, weakref.WeakSet()).add(sync_engine)
+
+_instrumented = False
+
+def instrument_engines():
+    """
+    Installs the hooks on every engine create_db_engine() has made or will make.
+    """
+    global _instrumented
+    if not _instrumented:
+        _instrumented = True
+        on_engine_created(instrument_engine)
+
+def route_of(app, scope) -> str:
+    """
+    Path template of the route matching a request, so metrics have one
+    series per endpoint rather than per URL. "unmatched" for 404s.
+    """
+    from starlette.routing import Match
+    for route in app.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route request count, latency (to the last
+    body byte), in-flight requests and response size, and making the route
+    current for the query metrics of that request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = route_of(scope["app"], scope)
+        method = scope["method"]
+        status = [500]
+        size = [0]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                size[0] += len(message.get("body", b""))
+            await send(message)
+
+        token = current_route.set(route)
+        http_requests_in_flight.inc(route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_request_duration.observe(time.perf_counter() - start, route, method)
+            http_requests_in_flight.dec(route)
+            http_requests.inc(route, method, str(status[0]))
+            http_response_size.observe(size[0], route)
+            current_route.reset(token)
@@ -0,0 +1,67 @@
+import asyncio
+
+# Request coalescing: concurrent calls with the same key share one in-flight
+# computation instead of each running their own queries.
+
+class _Call:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time. Callers that arrive while
+    it is running wait for it and get the same result or exception.
+
+    Cancellation: a cancelled caller stops waiting without affecting the
+    others; the computation itself is cancelled only once every caller has
+    gone. Results are not kept after completion (that is ResponseCache's job),
+    and a failure is not remembered, so the next call retries.
+    """
+
+    def __init__(self):
+        self.calls = {}  # key -> _Call
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        """
+        Awaits fn() for key, or joins the call already in flight for key.
+        """
+        call = self.calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda task: self._finished(key, call))
+            self.calls[key] = call
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is left to use the result
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key, call):
+        if self.calls.get(key) is call:
+            del self.calls[key]
+
+    def _finished(self, key, call):
+        self._forget(key, call)
+        if not call.task.cancelled():
+            call.task.exception()  # retrieved here, raised in the waiters
+
+    def in_flight(self) -> int:
+        return len(self.calls)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight(),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
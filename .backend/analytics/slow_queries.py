@@ -0,0 +1,154 @@
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from sqlalchemy import event
+from analytics.metrics import current_route
+from ingestion.database import on_engine_created
+
+# Slow-query log: every statement slower than SLOW_QUERY_MS on an engine made
+# by ingestion/database.py is recorded with its parameters, duration and
+# (SQLite) EXPLAIN QUERY PLAN, flagging full table scans. Entries are kept in
+# a bounded ring buffer, read by /api/debug/slow-queries, and logged.
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 100))
+SLOW_QUERY_LOG_SIZE = int(os.environ.get("SLOW_QUERY_LOG_SIZE", 200))
+
+# Plans are cached per statement text, so a statement that is slow on every
+# request is explained once
+PLAN_CACHE_SIZE = 256
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+MAX_PARAMETER_CHARS = 500
+
+logger = logging.getLogger(__name__)
+
+def full_scans(plan) -> list:
+    """
+    Tables an EXPLAIN QUERY PLAN reads in full: every "SCAN <table>" step,
+    with or without an index (a SCAN ... USING INDEX walks the whole index
+    and looks up every row). Subqueries and constant rows are not tables.
+    """
+    tables = []
+    for detail in plan:
+        if not detail.startswith("SCAN "):
+            continue
+        target = detail[len("SCAN "):].removeprefix("TABLE ")
+        if target.startswith("(") or target.startswith("CONSTANT ROW"):
+            continue
+        tables.append(target.split(" ")[0])
+    return tables
+
+class SlowQueryLog:
+    """
+    Ring buffer of the last `size` slow statements (newest last), with the
+    plan of each distinct statement cached.
+    """
+
+    def __init__(self, threshold_ms=SLOW_QUERY_MS, size=SLOW_QUERY_LOG_SIZE):
+        self.threshold_ms = threshold_ms
+        self.entries = deque(maxlen=size)
+        self.plans = OrderedDict()  # statement -> plan detail lines
+        self.recorded = 0
+
+    def plan(self, dbapi_connection, statement, parameters):
+        """
+        EXPLAIN QUERY PLAN of a statement on the connection that ran it,
+        or None if it cannot be explained (e.g. DDL).
+        """
+        if statement in self.plans:
+            self.plans.move_to_end(statement)
+            return self.plans[statement]
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            plan = [row[3] for row in cursor.fetchall()]
+        except Exception as e:
+            logger.debug(f"EXPLAIN QUERY PLAN failed: {e}")
+            plan = None
+        finally:
+            cursor.close()
+        self.plans[statement] = plan
+        while len(self.plans) > PLAN_CACHE_SIZE:
+            self.plans.popitem(last=False)
+        return plan
+
+    def record(self, engine_profile, dialect, conn, statement, parameters, executemany, seconds):
+        plan = None
+        # Only plain statements on SQLite; an executemany is explained by one row's parameters
+        words = statement.split(None, 1)
+        if dialect == "sqlite" and words and words[0].upper() in EXPLAINABLE:
+            params = parameters[0] if executemany and parameters else parameters
+            plan = self.plan(conn.connection.dbapi_connection, statement, params)
+        scans = full_scans(plan) if plan else []
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "duration_ms": round(seconds * 1000, 3),
+            "engine": engine_profile,
+            "route": current_route.get(),
+            "statement": statement,
+            "parameters": repr(parameters)[:MAX_PARAMETER_CHARS],
+            "executemany": executemany,
+            "plan": plan,
+            "full_scans": scans,
+        }
+        self.entries.append(entry)
+        self.recorded += 1
+        flat = " ".join(statement.split())
+        logger.warning(
+            f"Slow query ({entry['duration_ms']:.1f} ms, {engine_profile}, {entry['route']})"
+            + (f" full scan of {', '.join(scans)}" if scans else "")
+            + f": {flat[:300]}"
+        )
+        return entry
+
+    def snapshot(self, limit=None) -> dict:
+        entries = list(self.entries)[::-1]
+        return {
+            "threshold_ms": self.threshold_ms,
+            "capacity": self.entries.maxlen,
+            "recorded": self.recorded,
+            "queries": entries[:limit] if limit else entries,
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.plans.clear()
+
+slow_query_log = SlowQueryLog()
+
+def watch_engine(engine, profile, log=slow_query_log):
+    """
+    Event hooks timing every statement of one engine into the slow-query log.
+    """
+    sync_engine = engine.sync_engine
+    if getattr(sync_engine, "_slow_query_log", None) is log:
+        return
+    sync_engine._slow_query_log = log
+    dialect = sync_engine.dialect.name
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["slow_query_start"].pop()
+        if seconds * 1000 >= log.threshold_ms:
+            log.record(profile, dialect, conn, statement, parameters, executemany, seconds)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("slow_query_start"):
+            conn.info["slow_query_start"].pop()
+
+_watching = False
+
+def watch_engines():
+    """
+    Installs the hooks on every engine create_db_engine() has made or will make.
+    """
+    global _watching
+    if not _watching:
+        _watching = True
+        on_engine_created(watch_engine)
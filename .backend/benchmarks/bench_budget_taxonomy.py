@@ -0,0 +1,75 @@
+import random
+import time
+import numpy as np
+import pandas as pd
+
+# Benchmark: health budget categorization, the former per-category isin loop
+# run once per year vs. ingestion/budget_taxonomy over all years in one frame.
+# Also checks both give the same totals where no line matches two categories,
+# and shows what the loop double-counted where lines do.
+
+YEARS = range(2014, 2024)
+LINES_PER_YEAR = 200_000
+SEARCH_COLS = ['Program Name', 'Activity / Item', 'Account Details (Expense/Asset Details)']
+AMOUNT_COL = 'Amount $'
+
+def make_budget_frame(overlap_share=0.0, seed=0):
+    from ingestion.budget_taxonomy import MAPPING
+    rng = random.Random(seed)
+    keywords = [keyword for keywords in MAPPING.values() for keyword in keywords]
+    programs = keywords + [f"Other Program {i}" for i in range(200)]
+    categories = list(MAPPING.values())
+    rows = []
+    for year in YEARS:
+        for _ in range(LINES_PER_YEAR):
+            program = rng.choice(programs)
+            detail = f"Detail {rng.randrange(1_000)}"
+            if rng.random() < overlap_share:
+                # Program and account detail name keywords of two different categories
+                first, second = rng.sample(categories, 2)
+                program, detail = rng.choice(first), rng.choice(second)
+            rows.append((year, program, "Item", detail, round(rng.uniform(-1e6, 5e7), 2)))
+    return pd.DataFrame(rows, columns=['year'] + SEARCH_COLS + [AMOUNT_COL])
+
+def loop_totals(df):
+    # The former approach: one boolean mask per category, OR-ed over the search columns, per year
+    from ingestion.budget_taxonomy import MAPPING
+    totals = {}
+    for year, year_df in df.groupby('year'):
+        processed = set()
+        for category, keywords in MAPPING.items():
+            mask = pd.Series([False] * len(year_df), index=year_df.index)
+            for col in SEARCH_COLS:
+                mask |= year_df[col].isin(keywords)
+            matches = year_df[mask]
+            if not matches.empty:
+                totals[(year, category)] = matches[AMOUNT_COL].sum()
+                processed.update(matches.index)
+        others = year_df[~year_df.index.isin(processed)]
+        totals[(year, "General Operations & Other")] = others[AMOUNT_COL].sum()
+    return totals
+
+def grouped_totals(df):
+    from ingestion.budget_taxonomy import category_totals
+    totals = category_totals(df, AMOUNT_COL, SEARCH_COLS, year_col='year')
+    return {(r.year, r.category): r.amount for r in totals.itertuples()}
+
+def run():
+    for overlap_share in (0.0, 0.05):
+        df = make_budget_frame(overlap_share)
+        start = time.perf_counter()
+        before = loop_totals(df)
+        loop_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        after = grouped_totals(df)
+        grouped_seconds = time.perf_counter() - start
+
+        same = before.keys() == after.keys() and all(np.isclose(before[k], after[k], rtol=1e-9) for k in before)
+        counted = sum(before.values()) - df[AMOUNT_COL].sum()
+        print(f"{len(YEARS)} years x {LINES_PER_YEAR:,} lines, {overlap_share:.0%} matching two categories:")
+        print(f"   per-year isin loop {loop_seconds:.2f}s, one grouped pass {grouped_seconds:.2f}s "
+              f"({loop_seconds / grouped_seconds:.1f}x)")
+        print(f"   same totals={same}  amount counted twice by the loop: ${counted / 1e9:,.2f}B")
+
+if __name__ == "__main__":
+    run()
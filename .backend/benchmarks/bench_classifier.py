@@ -0,0 +1,46 @@
+import random
+import time
+import pandas as pd
+from processing.classifier import classify_role, classify_roles, CLINICAL_KEYWORDS, BUREAUCRATIC_KEYWORDS
+
+# Benchmark: per-row classify_role vs. column-wide classify_roles
+
+ROWS = 1_000_000
+DISTINCT_TITLES = 20_000
+
+FILLER_WORDS = [
+    "Senior", "Junior", "Registered", "Staff", "Acting", "Interim", "Regional",
+    "Operations", "Finance", "Facilities", "Research", "Emergency", "Surgical",
+    "Infection Control", "Health Records", "Information Technology", "Dietary",
+    "Trésorier", "Infirmière", "Médecin", "Gestionnaire", "Professor", "Engineer"
+]
+
+def make_titles(rows=ROWS, distinct=DISTINCT_TITLES, seed=42):
+    rng = random.Random(seed)
+    vocabulary = FILLER_WORDS + [k.title() for k in CLINICAL_KEYWORDS + BUREAUCRATIC_KEYWORDS]
+    pool = [" ".join(rng.sample(vocabulary, rng.randint(1, 4))) for _ in range(distinct)]
+    # Messiness seen in the compendiums: blanks, missing values, odd casing
+    pool += ["", "-", "NURSE", "DIRECTOR OF NURSING", None]
+    return [rng.choice(pool) for _ in range(rows)]
+
+def main():
+    titles = make_titles()
+    series = pd.Series(titles)
+
+    start = time.perf_counter()
+    per_row = [classify_role(t) for t in titles]
+    per_row_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = classify_roles(series)
+    batch_secs = time.perf_counter() - start
+
+    assert batch.tolist() == per_row, "classify_roles diverged from classify_role"
+
+    print(f"Rows:             {len(titles):,}")
+    print(f"classify_role:    {per_row_secs:.2f}s ({len(titles) / per_row_secs:,.0f} rows/sec)")
+    print(f"classify_roles:   {batch_secs:.2f}s ({len(titles) / batch_secs:,.0f} rows/sec)")
+    print(f"Speedup:          {per_row_secs / batch_secs:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import time
+import pandas as pd
+
+# Benchmark: the per-row currency helpers the ingestors used (Series.apply)
+# vs. ingestion/cleaning.clean_amounts, and the parse-per-encoding fallback
+# loop vs. the sniffing reader. Their equivalence is tested in
+# tests/test_cleaning.py and tests/test_streaming.py.
+
+ROWS = 1_000_000
+
+def check_cleaning():
+    from ingestion.cleaning import clean_amounts
+    from tests.test_cleaning import clean_amt, clean_currency, messy_column
+
+    column = messy_column(ROWS)
+    for label, reference, kwargs in (("clean_currency", clean_currency, {}),
+                                     ("clean_amt", clean_amt, {"negative_parentheses": True})):
+        start = time.perf_counter()
+        column.apply(reference)
+        before = time.perf_counter() - start
+        start = time.perf_counter()
+        clean_amounts(column, **kwargs)
+        after = time.perf_counter() - start
+        print(f"{label:14} {ROWS:,} rows: apply {before:.2f}s, clean_amounts {after:.2f}s ({before / after:.1f}x)")
+
+def read_with_fallback(path):
+    # The loop both ingestors used: parse the whole file once per candidate encoding
+    for enc in ['utf-8-sig', 'latin1', 'cp1252']:
+        try:
+            return pd.read_csv(path, encoding=enc), enc
+        except Exception:
+            continue
+    return None, None
+
+def read_sniffed(path):
+    from ingestion.streaming import open_csv_text
+    with open(path, 'rb') as f:
+        stream = open_csv_text(f)
+        return pd.read_csv(stream), stream.encoding
+
+def check_encoding():
+    rows = 200_000
+    frame = pd.DataFrame({"Ministry Name": ["Santé et Soins de longue durée"] * rows, "Amount $": ["$1,234"] * rows})
+    directory = tempfile.mkdtemp(prefix="bench_cleaning_")
+    for encoding in ("utf-8-sig", "latin1"):
+        path = os.path.join(directory, f"{encoding}.csv")
+        frame.to_csv(path, index=False, encoding=encoding)
+        start = time.perf_counter()
+        read_with_fallback(path)
+        before = time.perf_counter() - start
+        start = time.perf_counter()
+        _, sniffed = read_sniffed(path)
+        after = time.perf_counter() - start
+        print(f"{encoding:10} file: fallback loop {before:.2f}s, sniffed ({sniffed}) {after:.2f}s")
+
+if __name__ == "__main__":
+    check_cleaning()
+    check_encoding()
@@ -0,0 +1,68 @@
+import asyncio
+import os
+import statistics
+import time
+
+# Benchmark: admin tax analytics answered by SQL (admin_tax_rollup on the
+# serving snapshot, or a raw scan of the partitions) vs. the columnar engine,
+# plus the engine's load time and memory footprint.
+
+YEARS = range(2014, 2024)
+ROWS_PER_YEAR = 100_000
+REQUESTS = 200
+
+async def timed(label, fn, requests=REQUESTS):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(f"{label:34} p50={statistics.median(latencies):7.3f} ms  p99={latencies[int(len(latencies) * 0.99) - 1]:7.3f} ms")
+
+async def run():
+    from benchmarks.synthetic import make_year_frame, write_year_bulk
+    from ingestion.database import engine, init_db
+    from ingestion.publish_snapshot import publish_snapshot
+    from ingestion.serving import ServingSessionLocal, current_snapshot_path
+    from processing.analytics_logic import calculate_admin_tax, calculate_historical_admin_tax
+    from processing.columnar import SunshineColumns, cache_path, load_columns, sunshine_columns, verify_columnar
+    from processing.rollup import aggregate_partition, refresh_admin_tax_rollup
+
+    await init_db()
+    for year in YEARS:
+        await write_year_bulk(year, make_year_frame(year, ROWS_PER_YEAR))
+    async with engine.begin() as conn:
+        await refresh_admin_tax_rollup(conn)
+    await engine.dispose()
+    publish_snapshot(force=True)
+    snapshot = current_snapshot_path()
+
+    start = time.perf_counter()
+    columns = SunshineColumns.from_sqlite(snapshot)
+    from_sqlite = time.perf_counter() - start
+    start = time.perf_counter()
+    load_columns(snapshot).health_salary()
+    from_cache = time.perf_counter() - start
+    print(f"{len(columns):,} rows: {columns.nbytes / 2**20:.1f} MB of arrays, snapshot file {os.path.getsize(snapshot) / 2**20:.1f} MB")
+    print(f"Load from SQLite {from_sqlite:.2f}s, from .npy cache {from_cache * 1000:.1f} ms ({cache_path(snapshot)})")
+
+    mismatches = await verify_columnar(await sunshine_columns())
+    print(f"Columnar vs SQL: {len(mismatches)} mismatches")
+
+    async with ServingSessionLocal() as session:
+        await timed("admin tax, SQL rollup", lambda: calculate_admin_tax(2018, session=session))
+        await timed("admin tax trend, SQL rollup", lambda: calculate_historical_admin_tax(session=session))
+
+        async def raw_scan():
+            for year in YEARS:
+                (await session.execute(aggregate_partition(year))).all()
+        await timed("admin tax trend, SQL raw scan", raw_scan, requests=5)
+    await timed("admin tax, columnar", lambda: calculate_admin_tax(2018))
+    await timed("admin tax trend, columnar", lambda: calculate_historical_admin_tax())
+
+if __name__ == "__main__":
+    from benchmarks.synthetic import scratch_directory
+    scratch_directory("bench_columnar_")
+    os.environ["ANALYTICS_ENGINE"] = "columnar"
+    asyncio.run(run())
@@ -0,0 +1,34 @@
+import asyncio
+import os
+import time
+
+# Benchmark: ORM add_all/commit path vs. Core bulk loader for one year of rows
+
+ROWS = 200_000
+
+async def run():
+    from benchmarks.synthetic import make_year_frame, write_year_bulk
+    from ingestion.database import AsyncSessionLocal, init_db
+    from ingestion.ingest_historical import write_year_orm
+
+    await init_db()
+    df = make_year_frame(2001, ROWS)
+
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        await write_year_orm(session, 2001, df)
+    orm_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await write_year_bulk(2002, df)
+    bulk_secs = time.perf_counter() - start
+
+    print(f"Rows per year:    {len(df):,}")
+    print(f"ORM path:         {orm_secs:.2f}s ({len(df) / orm_secs:,.0f} rows/sec)")
+    print(f"Core bulk path:   {bulk_secs:.2f}s ({len(df) / bulk_secs:,.0f} rows/sec)")
+    print(f"Speedup:          {orm_secs / bulk_secs:.1f}x")
+
+if __name__ == "__main__":
+    from benchmarks.synthetic import scratch_directory
+    scratch_directory("bench_insert_")
+    asyncio.run(run())
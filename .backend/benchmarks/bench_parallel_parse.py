@@ -0,0 +1,74 @@
+import asyncio
+import os
+import time
+
+# Benchmark: the parse stage (read_csv, column mapping, currency cleaning,
+# classification) of a 10-year compendium backfill, in threads vs. process
+# pools of increasing size. The writer only counts rows, so this measures
+# how far parsing scales before the single writer becomes the limit.
+
+YEARS = range(2014, 2024)
+ROWS_PER_YEAR = 100_000
+PROCESS_COUNTS = (1, 2, 4)
+
+def write_compendium_csv(path, year):
+    from benchmarks.synthetic import make_year_frame
+    df = make_year_frame(year, ROWS_PER_YEAR).drop(columns=['classification'])
+    # Source formatting: "$123,456.78" amounts and the original headers
+    for column in ('salary', 'benefits'):
+        df[column] = df[column].map(lambda v: f"${v:,.2f}")
+    df.columns = ['Sector', 'Employer', 'Job Title', 'Salary Paid', 'Taxable Benefits']
+    df.to_csv(path, index=False)
+
+async def parse_all(paths, parse, parse_workers):
+    from ingestion.download_cache import Download
+    from ingestion.pipeline import run_pipeline
+
+    async def fetch(client, key, url):
+        return Download(key, url, paths[key], sha256=None, size=os.path.getsize(paths[key]))
+
+    frames = {}
+    async def write(download, chunks):
+        frames[download.key] = [chunk async for chunk in chunks]
+        return sum(len(chunk) for chunk in frames[download.key])
+
+    start = time.perf_counter()
+    results = await run_pipeline([(year, paths[year]) for year in YEARS], parse=parse, write=write,
+                                 fetch=fetch, parse_workers=parse_workers)
+    elapsed = time.perf_counter() - start
+    failed = {key: r for key, r in results.items() if isinstance(r, Exception)}
+    if failed:
+        raise RuntimeError(f"Parse failed: {failed}")
+    return elapsed, frames
+
+def same_frames(a, b):
+    return all(
+        len(a[year]) == len(b[year]) and all(x.equals(y) for x, y in zip(a[year], b[year]))
+        for year in YEARS
+    )
+
+async def run():
+    from ingestion.ingest_historical import parse_compendium, parse_manager, parse_pool, process_parser
+    from ingestion.pipeline import PARSE_WORKERS
+
+    paths = {year: os.path.abspath(f"compendium_{year}.csv") for year in YEARS}
+    for year, path in paths.items():
+        write_compendium_csv(path, year)
+
+    print(f"{len(YEARS)} years x {ROWS_PER_YEAR:,} rows, {os.cpu_count()} CPUs")
+    baseline, expected = await parse_all(paths, parse_compendium, PARSE_WORKERS)
+    print(f"threads ({PARSE_WORKERS} parse workers):   {baseline:6.2f}s")
+    for processes in PROCESS_COUNTS:
+        pool, manager = parse_pool(processes), parse_manager()
+        try:
+            elapsed, frames = await parse_all(paths, process_parser(pool, manager), processes)
+        finally:
+            pool.shutdown()
+            manager.shutdown()
+        print(f"processes ({processes}):               {elapsed:6.2f}s  "
+              f"speedup {baseline / elapsed:4.2f}x  identical={same_frames(expected, frames)}")
+
+if __name__ == "__main__":
+    from benchmarks.synthetic import scratch_directory
+    scratch_directory("bench_parallel_parse_")
+    asyncio.run(run())
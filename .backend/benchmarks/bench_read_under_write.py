@@ -0,0 +1,71 @@
+import asyncio
+import multiprocessing
+import os
+import statistics
+import time
+
+# Benchmark: /api/dashboard computation latency on the reader pool, idle vs.
+# while another process backfills years through the writer profile.
+
+SEED_YEARS = range(2014, 2019)
+BACKFILL_YEARS = range(2019, 2024)
+ROWS_PER_YEAR = 60_000
+SAMPLE_SECONDS = 5
+
+def backfill(started):
+    async def load():
+        from benchmarks.synthetic import make_year_frame, write_year_bulk
+        from ingestion.database import engine
+        from processing.rollup import refresh_admin_tax_rollup
+
+        frames = {year: make_year_frame(year, ROWS_PER_YEAR) for year in BACKFILL_YEARS}
+        started.set()
+        for year, df in frames.items():
+            await write_year_bulk(year, df)
+            async with engine.begin() as conn:
+                await refresh_admin_tax_rollup(conn, [year])
+    asyncio.run(load())
+
+async def sample(seconds, writer=None):
+    from processing.analytics_logic import get_dashboard
+
+    latencies = []
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end and (writer is None or writer.is_alive() or not latencies):
+        start = time.perf_counter()
+        await get_dashboard()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def describe(label, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:22} n={len(latencies):5}  p50={statistics.median(latencies):6.2f} ms  p99={p99:6.2f} ms  max={latencies[-1]:6.2f} ms")
+
+async def run():
+    from benchmarks.synthetic import make_year_frame, write_year_bulk
+    from ingestion.database import engine, init_db
+    from processing.rollup import refresh_admin_tax_rollup
+
+    await init_db()
+    for year in SEED_YEARS:
+        await write_year_bulk(year, make_year_frame(year, ROWS_PER_YEAR))
+    async with engine.begin() as conn:
+        await refresh_admin_tax_rollup(conn)
+    await engine.dispose()
+
+    describe("idle", await sample(SAMPLE_SECONDS))
+
+    started = multiprocessing.Event()
+    writer = multiprocessing.Process(target=backfill, args=(started,))
+    writer.start()
+    started.wait()
+    start = time.perf_counter()
+    describe("during backfill", await sample(3600, writer))
+    writer.join()
+    print(f"Backfill of {len(BACKFILL_YEARS)} years x {ROWS_PER_YEAR:,} rows took {time.perf_counter() - start:.1f}s (exit code {writer.exitcode})")
+
+if __name__ == "__main__":
+    from benchmarks.synthetic import scratch_directory
+    scratch_directory("bench_read_under_write_")
+    asyncio.run(run())
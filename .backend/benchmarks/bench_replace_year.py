@@ -0,0 +1,89 @@
+import asyncio
+import os
+import sqlite3
+import statistics
+import time
+
+# Benchmark: re-ingesting one year, DELETE + INSERT on a single sunshine_list
+# table vs. loading a staging partition and swapping it in.
+
+YEARS = range(2014, 2024)
+ROWS_PER_YEAR = 100_000
+REPLACE_YEAR = 2018
+REPEATS = 3
+
+# The single-table layout used before partitioning
+SINGLE_TABLE_SCHEMA = """
+CREATE TABLE sunshine_list (
+    id INTEGER NOT NULL PRIMARY KEY, year INTEGER, sector_id INTEGER, employer_id INTEGER,
+    job_title_id INTEGER, salary FLOAT, benefits FLOAT, classification VARCHAR
+);
+CREATE INDEX ix_sunshine_list_id ON sunshine_list (id);
+CREATE INDEX ix_sunshine_list_year ON sunshine_list (year);
+CREATE INDEX ix_sunshine_list_sector_id ON sunshine_list (sector_id);
+CREATE INDEX ix_sunshine_list_employer_id ON sunshine_list (employer_id);
+CREATE INDEX ix_sunshine_list_job_title_id ON sunshine_list (job_title_id);
+CREATE INDEX ix_sunshine_list_classification ON sunshine_list (classification);
+"""
+COLUMNS = "year, sector_id, employer_id, job_title_id, salary, benefits, classification"
+
+def replace_single_table(path, rows):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("BEGIN")
+    conn.execute("DELETE FROM sunshine_list WHERE year = ?", (REPLACE_YEAR,))
+    conn.executemany(f"INSERT INTO sunshine_list ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.execute("COMMIT")
+    conn.close()
+
+def file_stats(path):
+    conn = sqlite3.connect(path)
+    pages, free = conn.execute("PRAGMA page_count").fetchone()[0], conn.execute("PRAGMA freelist_count").fetchone()[0]
+    conn.close()
+    return pages, free
+
+async def run():
+    from benchmarks.synthetic import make_year_frame
+    from ingestion.bulk_load import sunshine_bulk_loader
+    from ingestion.database import engine, init_db
+
+    await init_db()
+    for year in YEARS:
+        async with sunshine_bulk_loader(year) as loader:
+            await loader.load(make_year_frame(year, ROWS_PER_YEAR))
+    await engine.dispose()
+
+    # Same rows in the single-table layout
+    conn = sqlite3.connect("single.db")
+    conn.executescript(SINGLE_TABLE_SCHEMA)
+    conn.execute("ATTACH DATABASE 'healthcare.db' AS partitioned")
+    conn.execute(f"INSERT INTO sunshine_list ({COLUMNS}) SELECT {COLUMNS} FROM partitioned.sunshine_list")
+    conn.commit()
+    replacement = conn.execute(f"SELECT {COLUMNS} FROM sunshine_list WHERE year = ?", (REPLACE_YEAR,)).fetchall()
+    conn.execute("DETACH DATABASE partitioned")
+    conn.close()
+    replacement_df = make_year_frame(REPLACE_YEAR, ROWS_PER_YEAR)
+
+    single, partitioned = [], []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        replace_single_table("single.db", replacement)
+        single.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        async with sunshine_bulk_loader(REPLACE_YEAR, replace=True) as loader:
+            await loader.load(replacement_df)
+        partitioned.append(time.perf_counter() - start)
+
+    print(f"Replace {ROWS_PER_YEAR:,} rows of {REPLACE_YEAR} in a {len(YEARS)}-year table (median of {REPEATS}):")
+    print(f"DELETE + INSERT, single table:  {statistics.median(single):.2f}s")
+    print(f"Staging partition + swap:       {statistics.median(partitioned):.2f}s")
+    for label, path in (("single table", "single.db"), ("partitioned", "healthcare.db")):
+        pages, free = file_stats(path)
+        print(f"{label:14} pages={pages:,} free={free:,}")
+
+if __name__ == "__main__":
+    from benchmarks.synthetic import scratch_directory
+    scratch_directory("bench_replace_year_")
+    asyncio.run(run())
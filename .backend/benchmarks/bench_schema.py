@@ -0,0 +1,97 @@
+import asyncio
+import os
+import sqlite3
+import time
+
+# Benchmark: flat sunshine_list (strings on every row, as before the
+# dimension tables) vs. the dictionary-encoded layout, same rows in both.
+
+YEARS = range(2014, 2024)
+ROWS_PER_YEAR = 60_000
+REPEATS = 5
+
+# The original sunshine_list DDL
+FLAT_SCHEMA = """
+CREATE TABLE sunshine_list (
+    id INTEGER NOT NULL PRIMARY KEY, year INTEGER, sector VARCHAR, employer VARCHAR,
+    job_title VARCHAR, salary FLOAT, benefits FLOAT, classification VARCHAR
+);
+CREATE INDEX ix_sunshine_list_id ON sunshine_list (id);
+CREATE INDEX ix_sunshine_list_year ON sunshine_list (year);
+CREATE INDEX ix_sunshine_list_sector ON sunshine_list (sector);
+CREATE INDEX ix_sunshine_list_employer ON sunshine_list (employer);
+CREATE INDEX ix_sunshine_list_classification ON sunshine_list (classification);
+"""
+
+def flat_health_filter():
+    from processing.sectors import HEALTH_SECTOR_PATTERNS
+    return " OR ".join(f"sector LIKE '{p}'" for p in HEALTH_SECTOR_PATTERNS)
+
+def queries():
+    return {
+        "health admin tax (all years)": (
+            f"SELECT year, SUM(salary) FROM sunshine_list WHERE classification = 'bureaucratic' AND ({flat_health_filter()}) GROUP BY year",
+            "SELECT f.year, SUM(f.salary) FROM sunshine_list f JOIN sector_dim s ON s.id = f.sector_id "
+            "WHERE f.classification = 'bureaucratic' AND s.is_health = 1 GROUP BY f.year",
+        ),
+        "payroll by employer": (
+            "SELECT employer, SUM(salary) FROM sunshine_list GROUP BY employer",
+            "SELECT employer_id, SUM(salary) FROM sunshine_list GROUP BY employer_id",
+        ),
+        "distinct job titles": (
+            "SELECT DISTINCT job_title FROM sunshine_list",
+            "SELECT name FROM job_title_dim",
+        ),
+    }
+
+def best_of(path, sql):
+    conn = sqlite3.connect(path)
+    conn.execute(sql).fetchall()  # warm the page cache
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        timings.append(time.perf_counter() - start)
+    conn.close()
+    return min(timings)
+
+def vacuum(path):
+    conn = sqlite3.connect(path)
+    conn.execute("VACUUM")
+    conn.close()
+    return os.path.getsize(path)
+
+async def run():
+    from benchmarks.synthetic import make_year_frame, write_year_bulk
+    from ingestion.database import init_db
+
+    await init_db()
+    for year in YEARS:
+        await write_year_bulk(year, make_year_frame(year, ROWS_PER_YEAR))
+
+    # Same rows, flat layout, read back through the compatibility view
+    conn = sqlite3.connect("flat.db")
+    conn.executescript(FLAT_SCHEMA)
+    conn.execute("ATTACH DATABASE 'healthcare.db' AS encoded")
+    conn.execute("INSERT INTO sunshine_list (year, sector, employer, job_title, salary, benefits, classification) "
+                 "SELECT year, sector, employer, job_title, salary, benefits, classification FROM encoded.sunshine_list_named")
+    conn.commit()
+    rows = conn.execute("SELECT COUNT(*) FROM sunshine_list").fetchone()[0]
+    conn.execute("DETACH DATABASE encoded")
+    conn.close()
+
+    flat_size = vacuum("flat.db")
+    encoded_size = vacuum("healthcare.db")
+
+    print(f"Rows:                              {rows:,} ({len(YEARS)} years)")
+    print(f"{'':34} {'flat':>10} {'encoded':>10} {'ratio':>7}")
+    print(f"{'DB size (MB)':34} {flat_size / 2**20:10.1f} {encoded_size / 2**20:10.1f} {flat_size / encoded_size:6.1f}x")
+    for name, (flat_sql, encoded_sql) in queries().items():
+        flat_secs = best_of("flat.db", flat_sql)
+        encoded_secs = best_of("healthcare.db", encoded_sql)
+        print(f"{name + ' (ms)':34} {flat_secs * 1000:10.1f} {encoded_secs * 1000:10.1f} {flat_secs / encoded_secs:6.1f}x")
+
+if __name__ == "__main__":
+    from benchmarks.synthetic import scratch_directory
+    scratch_directory("bench_schema_")
+    asyncio.run(run())
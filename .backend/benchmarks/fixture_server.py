@@ -0,0 +1,59 @@
+import argparse
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for data.ontario.ca: serves a fixture directory (see
+# benchmarks/synthetic.py) over HTTP, with Last-Modified / If-Modified-Since
+# so the download cache's conditional GETs behave as against the real site.
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+class FixtureServer:
+    """
+    Serves directory on 127.0.0.1 from a background thread. port=0 picks a
+    free port; base_url is set once started. Use as a context manager.
+    """
+
+    def __init__(self, directory: str, port: int = 0):
+        self.directory = directory
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def start(self):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", self.port), partial(_QuietHandler, directory=self.directory))
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.thread.join()
+            self.httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fixture directory for offline ingestion runs.")
+    parser.add_argument("directory")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    server = FixtureServer(args.directory, args.port).start()
+    print(f"Serving {args.directory} at {server.base_url} (Ctrl+C to stop)")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
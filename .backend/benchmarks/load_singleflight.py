@@ -0,0 +1,62 @@
+import asyncio
+import os
+import time
+
+# Load test: concurrent /api/trends/admin-tax requests against a cold cache,
+# counting the SQL statements the database actually receives.
+
+CONCURRENCY = [1, 10, 50, 200]
+ROWS_PER_YEAR = 20_000
+
+async def seed():
+    from benchmarks.synthetic import make_year_frame, write_year_bulk
+    from ingestion.database import engine, init_db
+    from processing.rollup import refresh_admin_tax_rollup
+
+    await init_db()
+    for year in range(2014, 2024):
+        await write_year_bulk(year, make_year_frame(year, ROWS_PER_YEAR))
+    async with engine.begin() as conn:
+        await refresh_admin_tax_rollup(conn)
+
+async def run():
+    import httpx
+    from sqlalchemy import event
+    from analytics.main import app
+    from analytics.cache import response_cache
+    from ingestion.database import reader_engine
+    from processing.analytics_logic import calculate_historical_admin_tax
+
+    await seed()
+
+    queries = 0
+    def count_query(*args):
+        nonlocal queries
+        queries += 1
+    event.listen(reader_engine.sync_engine, "before_cursor_execute", count_query)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'clients':>8} {'direct queries':>15} {'coalesced queries':>18} {'wave ms':>8}")
+        for clients in CONCURRENCY:
+            # Without coalescing: every caller runs its own scan
+            queries = 0
+            await asyncio.gather(*(calculate_historical_admin_tax() for _ in range(clients)))
+            direct = queries
+
+            # Through the API with a cold cache
+            response_cache.clear()
+            queries = 0
+            start = time.perf_counter()
+            responses = await asyncio.gather(*(client.get("/api/trends/admin-tax") for _ in range(clients)))
+            elapsed = time.perf_counter() - start
+            assert all(r.status_code == 200 for r in responses)
+            assert len({r.text for r in responses}) == 1
+            print(f"{clients:8} {direct:15} {queries:18} {elapsed * 1000:8.1f}")
+
+    print(response_cache.stats())
+
+if __name__ == "__main__":
+    from benchmarks.synthetic import scratch_directory
+    scratch_directory("load_singleflight_")
+    asyncio.run(run())
@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+# End-to-end benchmark suite, fully offline: generates synthetic compendiums
+# and budget files (benchmarks/synthetic.py), serves them from a local
+# fixture server and runs the real pipeline against them: ingest, re-ingest,
+# budget ingest, classification, rollup rebuild and snapshot publish, then
+# per-endpoint API latency (cold and cached) through the ASGI app.
+# Results go to a JSON file (benchmarks/results/<time>-<commit>.json by
+# default) with flat metric names, so two runs can be compared:
+#   PYTHONPATH=. python benchmarks/run_suite.py --rows 1000000
+#   PYTHONPATH=. python benchmarks/run_suite.py --compare benchmarks/results/<baseline>.json
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+
+ENDPOINTS = [
+    "/api/admin-tax",
+    "/api/trends/admin-tax",
+    "/api/trends/budget",
+    "/api/budget/breakdown",
+    "/api/dashboard",
+    "/api/lobbying-network",
+]
+CLASSIFY_SAMPLE = 20_000
+
+# Metrics where a higher value is better; everything else (seconds, ms, bytes) is lower-is-better
+HIGHER_IS_BETTER = ("_rows_per_sec", "_titles_per_sec")
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARKS_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def peak_rss_bytes() -> int:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+async def timed(metrics, name, coro):
+    start = time.perf_counter()
+    result = await coro
+    metrics[f"{name}_seconds"] = round(time.perf_counter() - start, 4)
+    print(f"   {name:24} {metrics[f'{name}_seconds']:8.2f}s")
+    return result
+
+async def endpoint_latency(metrics, requests):
+    import httpx
+    from analytics.cache import response_cache
+    from analytics.main import app
+
+    # One log line per request would swamp the timings
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ENDPOINTS:
+            cold, warm = [], []
+            for _ in range(requests):
+                response_cache.clear()
+                start = time.perf_counter()
+                response = await client.get(path)
+                cold.append((time.perf_counter() - start) * 1000)
+                response.raise_for_status()
+            for _ in range(requests):
+                start = time.perf_counter()
+                (await client.get(path)).raise_for_status()
+                warm.append((time.perf_counter() - start) * 1000)
+            name = path.removeprefix("/api/").replace("/", "_").replace("-", "_")
+            metrics[f"api_{name}_cold_p50_ms"] = round(statistics.median(cold), 3)
+            metrics[f"api_{name}_cold_p95_ms"] = round(percentile(cold, 0.95), 3)
+            metrics[f"api_{name}_cached_p50_ms"] = round(statistics.median(warm), 3)
+            print(f"   {path:24} cold p50 {statistics.median(cold):8.2f} ms  p95 {percentile(cold, 0.95):8.2f} ms"
+                  f"  cached p50 {statistics.median(warm):6.3f} ms")
+
+async def run(args) -> dict:
+    from benchmarks.fixture_server import FixtureServer
+    from benchmarks.synthetic import build_fixtures
+
+    years = range(args.first_year, args.last_year + 1)
+    rows_per_year = max(1, args.rows // len(years))
+    fixtures = os.path.abspath("fixtures")
+    metrics = {}
+
+    with FixtureServer(fixtures) as server:
+        print(f"🧪 Generating {rows_per_year * len(years):,} synthetic rows ({len(years)} years)...")
+        start = time.perf_counter()
+        os.makedirs(fixtures, exist_ok=True)
+        manifest = build_fixtures(fixtures, server.base_url, years, rows_per_year, years, args.seed)
+        metrics["generate_seconds"] = round(time.perf_counter() - start, 4)
+        metrics["source_bytes"] = sum(c["bytes"] for c in manifest["compendiums"])
+        total_rows = sum(c["rows"] for c in manifest["compendiums"])
+
+        from sqlalchemy import text
+        from ingestion.database import AsyncSessionLocal, database_path, engine
+        from ingestion.ingest_historical import fetch_and_ingest_historical_data, process_resource_url
+        from ingestion import ingest_historical_budget
+        from ingestion.publish_snapshot import publish_snapshot
+        from processing.classifier import classify_role, classify_roles, process_classifications
+        from processing.rollup import rebuild_and_verify
+
+        print("⏱️  Pipeline")
+        await timed(metrics, "ingest", fetch_and_ingest_historical_data(manifest["ckan_url"], fallback_urls={}))
+        metrics["ingest_rows_per_sec"] = round(total_rows / metrics["ingest_seconds"], 1)
+        async with AsyncSessionLocal() as session:
+            loaded = (await session.execute(text("SELECT count(*) FROM sunshine_list"))).scalar()
+        if loaded != total_rows:
+            raise RuntimeError(f"Ingested {loaded} rows, expected {total_rows}")
+
+        last = manifest["compendiums"][-1]
+        await timed(metrics, "reingest_year", process_resource_url(last["year"], f"{server.base_url}/{last['file']}"))
+        metrics["reingest_year_rows_per_sec"] = round(last["rows"] / metrics["reingest_year_seconds"], 1)
+        await timed(metrics, "budget_ingest", ingest_historical_budget.main(manifest["package_url"]))
+
+        # Classifier throughput on its own, then the full reclassification of the database
+        async with AsyncSessionLocal() as session:
+            titles = (await session.execute(text("SELECT name FROM job_title_dim"))).scalars().all()
+        start = time.perf_counter()
+        classify_roles(titles)
+        seconds = time.perf_counter() - start
+        metrics["classify_titles"] = len(titles)
+        metrics["classify_titles_per_sec"] = round(len(titles) / seconds, 1)
+        sample = (titles * (CLASSIFY_SAMPLE // max(1, len(titles)) + 1))[:CLASSIFY_SAMPLE]
+        start = time.perf_counter()
+        for title in sample:
+            classify_role(title)
+        metrics["classify_role_scalar_titles_per_sec"] = round(len(sample) / (time.perf_counter() - start), 1)
+        async with engine.begin() as conn:
+            await conn.execute(text("UPDATE job_title_dim SET classification = NULL"))
+        await timed(metrics, "reclassify", process_classifications())
+        metrics["reclassify_rows_per_sec"] = round(total_rows / metrics["reclassify_seconds"], 1)
+
+        mismatches = await timed(metrics, "rollup_rebuild", rebuild_and_verify())
+        if mismatches:
+            raise RuntimeError(f"Rollup mismatches: {mismatches[:5]}")
+        snapshot = await timed(metrics, "publish_snapshot", asyncio.to_thread(publish_snapshot, force=True))
+        await engine.dispose()
+
+        metrics["db_bytes"] = os.path.getsize(database_path())
+        metrics["db_bytes_per_row"] = round(metrics["db_bytes"] / total_rows, 1)
+        if isinstance(snapshot, str) and os.path.exists(snapshot):
+            metrics["snapshot_bytes"] = os.path.getsize(snapshot)
+
+        print("⏱️  API")
+        await endpoint_latency(metrics, args.requests)
+
+    metrics["peak_rss_bytes"] = peak_rss_bytes()
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {"rows": total_rows, "years": [years.start, years.stop - 1], "seed": args.seed,
+                   "requests": args.requests, "analytics_engine": os.environ.get("ANALYTICS_ENGINE", "sql")},
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count()},
+        "metrics": metrics,
+    }
+
+def compare(baseline: dict, current: dict, threshold: float = 0.10):
+    """
+    Prints every shared metric with its change against the baseline run,
+    marking changes of more than threshold in the wrong direction.
+    """
+    print(f"\n📊 {baseline['commit']} ({baseline['config']['rows']:,} rows) -> "
+          f"{current['commit']} ({current['config']['rows']:,} rows)")
+    for name, after in current["metrics"].items():
+        before = baseline["metrics"].get(name)
+        if not before:
+            continue
+        change = (after - before) / before
+        worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+        flag = "  ⚠️ regression" if worse > threshold else ""
+        print(f"   {name:40} {before:>14,.2f} {after:>14,.2f} {change:+8.1%}{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark suite.")
+    parser.add_argument("--rows", type=int, default=100_000, help="total compendium rows across all years")
+    parser.add_argument("--first-year", type=int, default=2014)
+    parser.add_argument("--last-year", type=int, default=2023)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=20, help="requests per endpoint and cache state")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change flagged as a regression")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+    from benchmarks.synthetic import scratch_directory
+    scratch_directory("bench_suite_")
+    results = asyncio.run(run(args))
+
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{results['commit']}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {output}")
+
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            compare(json.load(f), results, args.threshold)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# Deterministic synthetic source files for offline benchmarks: Sunshine List
+# compendiums shaped like the data.ontario.ca CSVs (English, French and
+# variant headers, "$1,234.56" amounts, dashes and blanks, latin1 and UTF-8
+# files), Public Accounts spending CSVs, and the CKAN package_search /
+# package_show responses that point at them. The same seed, year and row
+# count always produce the same bytes.
+# Serve the output with benchmarks/fixture_server.py, or generate and serve
+# in one go with benchmarks/run_suite.py.
+
+SECTORS = [
+    ("Hospitals & Boards of Public Health", "Hôpitaux et conseils de santé publique", 0.30),
+    ("Municipalities & Services", "Municipalités et services", 0.20),
+    ("School Boards", "Conseils scolaires", 0.15),
+    ("Universities", "Universités", 0.10),
+    ("Ontario Public Service", "Fonction publique de l'Ontario", 0.08),
+    ("Colleges", "Collèges", 0.05),
+    ("Crown Agencies", "Organismes de la Couronne", 0.04),
+    ("Electricity", "Électricité", 0.04),
+    ("Seconded (Health and Long-Term Care)", "Employés détachés (Santé et Soins de longue durée)", 0.02),
+    ("Other Public Sector Employers", "Autres employeurs du secteur public", 0.02),
+]
+
+HEADERS = {
+    "en": ["Sector", "Last Name", "First Name", "Salary Paid", "Taxable Benefits", "Employer", "Job Title", "Calendar Year"],
+    # Padded and upper-case names, "Position" for the title
+    "variant": [" SECTOR ", "Last Name", "First Name", "Salary Paid ", " Taxable Benefits", "Employer", "Position", "Calendar Year"],
+    "fr": ["Secteur", "Nom de famille", "Prénom", "Traitement", "Avantages imposables", "Employeur", "Poste", "Année civile"],
+}
+
+TITLE_WORDS = [
+    "Registered Nurse", "Nurse Practitioner", "Physician", "Surgeon", "Pharmacist", "Paramedic", "Psychologist",
+    "Radiologist", "Medical Radiation Technologist", "Respiratory Therapist", "Midwife", "Personal Support Worker",
+    "Director", "Manager", "Executive Director", "Vice President", "Chief Financial Officer", "Policy Analyst",
+    "Senior Consultant", "Communications Advisor", "Program Coordinator", "Team Lead", "Administrative Assistant",
+    "Professor", "Teacher", "Principal", "Engineer", "Police Constable", "Firefighter", "Lawyer", "Economist",
+    "Infirmière autorisée", "Médecin", "Gestionnaire", "Conseiller principal", "Directrice générale",
+]
+TITLE_QUALIFIERS = ["", "", "", "Senior ", "Acting ", "Interim ", "Clinical ", "Regional ", "Associate ", "Deputy "]
+TITLE_SUFFIXES = ["", "", "", ", Emergency", ", Finance", ", Operations", ", Surgery", ", Information Technology",
+                  " - Mental Health", " (Part-Time)", " II", " III"]
+
+LAST_NAMES = ["Smith", "Brown", "Tremblay", "Martin", "Roy", "Wilson", "Macdonald", "Gagnon", "Johnson", "Taylor",
+              "Côté", "Campbell", "Anderson", "Leblanc", "Lee", "Singh", "Nguyen", "Patel", "Wong", "Bouchard"]
+FIRST_NAMES = ["Jane", "John", "Marie", "Jean", "Priya", "Wei", "Ahmed", "Sarah", "Michael", "Sophie", "Hélène",
+               "David", "Emily", "Mohammed", "Chloé", "Daniel", "Olivia", "Lucas", "Amélie", "Raj"]
+EMPLOYER_FORMS = ["University Health Network", "{} Regional Hospital", "City of {}", "{}, City of",
+                  "{} District School Board", "Board of Health for the {} Health Unit", "{} Community Health Centre",
+                  "Ontario Power Generation", "Hydro One Networks Inc.", "{} University", "Ministry of Health"]
+PLACES = ["Toronto", "Ottawa", "Hamilton", "London", "Kingston", "Sudbury", "Windsor", "Thunder Bay", "Barrie",
+          "Peterborough", "Waterloo", "Guelph", "Niagara", "Durham", "Halton", "Peel", "York", "Timmins"]
+
+CHUNK_ROWS = 100_000
+
+def header_style(year: int) -> str:
+    # A fixed mix of header styles across the years
+    return ("en", "variant", "en", "fr")[(year - 2014) % 4]
+
+def file_encoding(style: str) -> str:
+    # French files are latin1, like several of the older compendiums
+    return "latin1" if style == "fr" else "utf-8-sig"
+
+def _rng(seed: int, year: int, stream: int):
+    return np.random.default_rng([seed, year, stream])
+
+@lru_cache(maxsize=None)
+def vocabulary(seed: int = 0):
+    """
+    Distinct employers and job titles shared by every year, so titles and
+    employers recur across years like in the real files.
+    """
+    rng = _rng(seed, 0, 0)
+    employers = sorted({form.format(rng.choice(PLACES)) + ("" if rng.random() < 0.7 else f" {i}")
+                        for i, form in enumerate(rng.choice(EMPLOYER_FORMS, size=4_000))})
+    titles = sorted({f"{rng.choice(TITLE_QUALIFIERS)}{rng.choice(TITLE_WORDS)}{rng.choice(TITLE_SUFFIXES)}"
+                     for _ in range(20_000)})
+    return employers, titles
+
+def format_amounts(values, rng, dash_share=0.0, dashes=("-", "–", "")):
+    """
+    "$123,456.78", with a few unpadded / space-padded values, and a share of
+    dash and blank cells.
+    """
+    out = [f"${v:,.2f}" for v in values]
+    style = rng.random(len(out))
+    for i in np.flatnonzero(style < 0.01):
+        out[i] = f"{values[i]:.2f}"
+    for i in np.flatnonzero((style >= 0.01) & (style < 0.02)):
+        out[i] = f" ${values[i]:,.2f} "
+    if dash_share:
+        missing = rng.random(len(out)) < dash_share
+        blanks = rng.choice(list(dashes), size=len(out))
+        for i in np.flatnonzero(missing):
+            out[i] = blanks[i]
+    return out
+
+def compendium_rows(year: int, rows: int, seed: int = 0, chunk_rows: int = CHUNK_ROWS):
+    """
+    Yields the compendium rows for a year, chunk_rows at a time, in the
+    column order of HEADERS.
+    """
+    style = header_style(year)
+    employers, titles = vocabulary(seed)
+    sector_names = [fr if style == "fr" else en for en, fr, _ in SECTORS]
+    # No en dash in latin1
+    dashes = ("-", "") if file_encoding(style) == "latin1" else ("-", "–", "")
+    weights = np.array([w for _, _, w in SECTORS])
+    rng = _rng(seed, year, 1)
+    # Salaries drift up a little every year
+    growth = 1.02 ** (year - 2014)
+    for start in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - start)
+        sectors = rng.choice(len(sector_names), size=n, p=weights / weights.sum())
+        salary = np.maximum(100_000.0, rng.lognormal(np.log(118_000 * growth), 0.22, size=n)).round(2)
+        benefits = rng.gamma(2.0, 350.0, size=n).round(2)
+        last = rng.choice(LAST_NAMES, size=n)
+        first = rng.choice(FIRST_NAMES, size=n)
+        employer = rng.choice(employers, size=n)
+        title = rng.choice(titles, size=n)
+        yield list(zip(
+            (sector_names[s] for s in sectors), last, first,
+            format_amounts(salary, rng), format_amounts(benefits, rng, dash_share=0.03, dashes=dashes),
+            employer, title, [year] * n,
+        ))
+
+def write_compendium(path: str, year: int, rows: int, seed: int = 0) -> dict:
+    """
+    Writes one year's compendium CSV. Returns its description.
+    """
+    style = header_style(year)
+    encoding = file_encoding(style)
+    with open(path, "w", encoding=encoding, newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS[style])
+        for chunk in compendium_rows(year, rows, seed):
+            writer.writerows(chunk)
+    return {"year": year, "rows": rows, "header": style, "encoding": encoding, "bytes": os.path.getsize(path)}
+
+def write_budget(path: str, year: int, lines: int = 5_000, seed: int = 0) -> dict:
+    """
+    Writes a Public Accounts spending CSV for a fiscal year: Health and
+    Long-Term Care lines named after the budget taxonomy (plus unmapped
+    ones), other ministries, and "(1,234)" negatives.
+    """
+    from ingestion.budget_taxonomy import MAPPING
+    rng = _rng(seed, year, 2)
+    mapped = [keyword for keywords in MAPPING.values() for keyword in keywords]
+    unmapped = ["Capital Grants", "Other Health Programs", "Transfer Payments - Other", "Provincial Drug Reserve"]
+    ministries = ["Health", "Long-Term Care", "Education", "Transportation", "Finance", "Colleges and Universities"]
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Ministry Name", "Program Name", "Activity / Item",
+                         "Account Details (Expense/Asset Details)", "Amount $"])
+        for _ in range(lines):
+            ministry = rng.choice(ministries, p=[0.4, 0.1, 0.2, 0.1, 0.1, 0.1])
+            health = ministry in ("Health", "Long-Term Care")
+            program = rng.choice(mapped + unmapped) if health else f"{ministry} Program {rng.integers(20)}"
+            detail = rng.choice(mapped) if health and rng.random() < 0.3 else f"Account {rng.integers(500)}"
+            amount = rng.lognormal(np.log(2_000_000), 2.0)
+            text = f"({amount:,.0f})" if rng.random() < 0.03 else f"{amount:,.0f}"
+            writer.writerow([ministry, program, "Operating", detail, text])
+    return {"year": year, "lines": lines, "bytes": os.path.getsize(path)}
+
+def make_year_frame(year: int, rows: int) -> pd.DataFrame:
+    """
+    A cleaned, classified year (the columns the ingest writes, without the
+    year) for benchmarks that load straight into the database, skipping the
+    source files. The same year and row count always give the same frame.
+    """
+    rng = random.Random(year)
+    sectors = ["Hospitals & Boards of Public Health", "Municipalities & Services", "Universities",
+               "Ontario Public Service", "School Boards", "Colleges", "Other Public Sector Employers",
+               "Seconded (Health and Long-Term Care)", "Crown Agencies", "Electricity"]
+    employers = [f"{rng.choice(['City of', 'University Health Network -', 'Board of Education of', 'Regional Municipality of'])} Employer {i}"
+                 for i in range(3_000)]
+    titles = [f"{rng.choice(['Senior', 'Manager,', 'Director,', 'Registered', 'Clinical'])} {rng.choice(['Nurse', 'Analyst', 'Engineer', 'Physician', 'Policy Advisor', 'Finance'])} {i % 900}"
+              for i in range(5_000)]
+    classes = ["clinical", "bureaucratic", "unknown"]
+    return pd.DataFrame({
+        'sector': [rng.choice(sectors) for _ in range(rows)],
+        'employer': [rng.choice(employers) for _ in range(rows)],
+        'job_title': [rng.choice(titles) for _ in range(rows)],
+        'salary': [round(rng.uniform(100_000, 400_000), 2) for _ in range(rows)],
+        'benefits': [round(rng.uniform(0, 15_000), 2) for _ in range(rows)],
+        'classification': [rng.choice(classes) for _ in range(rows)],
+    })
+
+def scratch_directory(prefix: str) -> str:
+    """
+    Creates a temporary directory and makes it the working directory.
+    database.py (./healthcare.db), the download cache and the serving
+    snapshots resolve against the working directory, so a benchmark run
+    this way never touches the real database. Call it before anything
+    imports ingestion.database.
+    """
+    directory = tempfile.mkdtemp(prefix=prefix)
+    os.chdir(directory)
+    return directory
+
+async def write_year_bulk(year: int, df: pd.DataFrame):
+    """
+    Appends a make_year_frame() year to its partition through the Core bulk
+    loader, in one transaction. Benchmark setup only: unlike an ingest it
+    records no manifest entry, leaves admin_tax_rollup alone and does not
+    bump the data generation, so callers refresh the rollup themselves.
+    """
+    from ingestion.bulk_load import sunshine_bulk_loader, SUNSHINE_COLUMNS
+    async with sunshine_bulk_loader(year) as loader:
+        await loader.load(df[SUNSHINE_COLUMNS])
+
+def build_fixtures(directory: str, base_url: str, years=range(2014, 2024), rows_per_year: int = 10_000,
+                   budget_years=range(2014, 2024), seed: int = 0) -> dict:
+    """
+    Writes compendiums, budget files and the CKAN responses pointing at them
+    (ckan.json for package_search, pkg.json for package_show) into
+    directory, with URLs under base_url. Returns a manifest of the files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    base_url = base_url.rstrip("/")
+    compendiums, budgets, resources = [], [], []
+    for year in years:
+        name = f"tbs-pssd-compendium-salary-disclosed-{year}-en.csv"
+        compendiums.append({"file": name, **write_compendium(os.path.join(directory, name), year, rows_per_year, seed)})
+        resources.append({"name": f"Compendium {year} (all sectors) EN", "url": f"{base_url}/{name}", "format": "CSV"})
+        # The addenda the resource filter has to skip
+        resources.append({"name": f"Addendum {year} EN", "url": f"{base_url}/missing-addendum-{year}.csv", "format": "CSV"})
+
+    budget_resources = []
+    for year in budget_years:
+        name = f"public-accounts-spending-{year}-{(year + 1) % 100:02d}-en.csv"
+        budgets.append({"file": name, **write_budget(os.path.join(directory, name), year, seed=seed)})
+        budget_resources.append({"name": f"Spending: {year}-{(year + 1) % 100:02d} en", "url": f"{base_url}/{name}", "format": "CSV"})
+
+    with open(os.path.join(directory, "ckan.json"), "w", encoding="utf-8") as f:
+        json.dump({"success": True, "result": {"results": [{"resources": resources}]}}, f)
+    with open(os.path.join(directory, "pkg.json"), "w", encoding="utf-8") as f:
+        json.dump({"success": True, "result": {"resources": budget_resources}}, f)
+
+    manifest = {"base_url": base_url, "seed": seed, "compendiums": compendiums, "budgets": budgets,
+                "ckan_url": f"{base_url}/ckan.json", "package_url": f"{base_url}/pkg.json"}
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic compendium and budget fixtures.")
+    parser.add_argument("directory")
+    parser.add_argument("--rows", type=int, default=100_000, help="total compendium rows across all years")
+    parser.add_argument("--first-year", type=int, default=2014)
+    parser.add_argument("--last-year", type=int, default=2023)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8766")
+    args = parser.parse_args()
+    years = range(args.first_year, args.last_year + 1)
+    manifest = build_fixtures(args.directory, args.base_url, years, max(1, args.rows // len(years)), years, args.seed)
+    print(f"Wrote {sum(c['rows'] for c in manifest['compendiums']):,} compendium rows to {args.directory}")
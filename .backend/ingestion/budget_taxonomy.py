@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+# Health budget taxonomy shared by ingest_budget.py and ingest_historical_budget.py.
+# Maps the Public Accounts program / account names onto the dashboard's
+# spending categories. A line item belongs to the first category (in this
+# order) that lists a name found in any of its search columns; lines that
+# match nothing are "General Operations & Other".
+MAPPING = {
+    "Frontline": [
+        "Operation of Hospitals",
+        "Payments made for services and care provided by physicians and practitioners",
+        "Ontario Drug Programs",
+        "Home Care",
+        "Community Mental Health",
+        "Payments for Ambulance and Related Emergency Services",
+        "Municipal Ambulance",
+        "Specialty Psychiatric Hospitals",
+        "Community Support Services",
+        "Community Health Centres",
+        "Child and Youth Mental Health",
+        "Assisted Living Services in Supportive Housing",
+        "Midwifery Services",
+        "Addiction Programs",
+        "HIV/AIDS and Hepatitis C Programs",
+        "Home Care and Community Services",
+        "Long-Term Care Homes (Operation)",
+        "Long-Term Care Homes - Operation"
+    ],
+    "Operations & Agency": [
+        "Cancer Treatment Services",
+        "Clinical Education",
+        "Official Local Health Agencies",
+        "Canadian Blood Services",
+        "Renal Services",
+        "Assistive Devices and Supplies Program",
+        "Digital Health",
+        "Ontario Agency for Health Protection and Promotion",
+        "Organ and Tissue Donation and Transplantation Services",
+        "Independent Health Facilities",
+        "Quality Health Initiatives",
+        "Long-Term Care Capital",
+        "Long-Term Care - Capital"
+    ],
+    "Administrative & Opaque": [
+        "Regional Coordination Operations Support",
+        "Health Infrastructure Renewal Fund",
+        "Ministry Administration Program",
+        "Information Systems Program",
+        "Provincial Programs and Stewardship Program",
+        "Health Policy and Research Program",
+        "Digital Health and Information Management Program",
+        "Ministry of Long-Term Care Administration"
+    ]
+}
+
+OTHER = "General Operations & Other"
+
+def keyword_ranks(mapping=MAPPING) -> dict:
+    """
+    Inverts a mapping into {keyword: index of its category}. A keyword
+    listed under several categories belongs to the first.
+    """
+    ranks = {}
+    for rank, keywords in enumerate(mapping.values()):
+        for keyword in keywords:
+            ranks.setdefault(keyword, rank)
+    return ranks
+
+_RANKS = keyword_ranks()
+
+def category_codes(df: pd.DataFrame, search_cols, mapping=MAPPING) -> np.ndarray:
+    """
+    Category of every row in one pass per search column, as an index into
+    mapping: the first category (in mapping order) with a keyword equal to
+    any of the row's search column values, or len(mapping) for OTHER.
+    """
+    ranks = _RANKS if mapping is MAPPING else keyword_ranks(mapping)
+    best = np.full(len(df), len(mapping))
+    for col in search_cols:
+        # Look up each distinct value once; -1 (missing) picks the trailing OTHER
+        codes, uniques = pd.factorize(df[col])
+        unique_ranks = np.array([ranks.get(value, len(mapping)) for value in uniques] + [len(mapping)])
+        best = np.minimum(best, unique_ranks[codes])
+    return best
+
+def assign_categories(df: pd.DataFrame, search_cols, mapping=MAPPING) -> pd.Series:
+    """
+    Category name of every row (see category_codes).
+    """
+    labels = np.array(list(mapping) + [OTHER], dtype=object)
+    return pd.Series(labels[category_codes(df, search_cols, mapping)], index=df.index)
+
+def category_totals(df: pd.DataFrame, amount_col, search_cols, describe_col=None, items=3,
+                    year_col=None, mapping=MAPPING) -> pd.DataFrame:
+    """
+    Totals per category (and per year, if year_col is given, so several
+    fiscal years can go through in one frame) in a single groupby.
+    Returns a DataFrame with [year_col,] category, amount and items (the
+    first `items` distinct describe_col values, in row order), sorted by
+    year and then mapping order with OTHER last. Only categories with at
+    least one line are present.
+    """
+    describe_col = describe_col or search_cols[0]
+    frame = pd.DataFrame({
+        "category": pd.Categorical.from_codes(category_codes(df, search_cols, mapping), categories=list(mapping) + [OTHER]),
+        "amount": df[amount_col],
+        "item": df[describe_col],
+    })
+    keys = ["category"]
+    if year_col is not None:
+        frame.insert(0, year_col, df[year_col])
+        keys = [year_col, "category"]
+    totals = frame.groupby(keys, observed=True, sort=True).agg(
+        amount=("amount", "sum"),
+        items=("item", lambda values: list(pd.unique(values))[:items]),
+    )
+    return totals.reset_index()
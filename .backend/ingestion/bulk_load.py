@@ -0,0 +1,131 @@
+from contextlib import asynccontextmanager
+import pandas as pd
+from sqlalchemy import insert, bindparam
+from ingestion.database import engine, EmployerDim, JobTitleDim, SectorDim
+from ingestion.dimensions import NameInterner
+from ingestion.instrumentation import stage
+from ingestion.partitions import ensure_partition, create_staging, swap_in_staging
+from processing.sectors import sector_attributes
+
+# Load-time pragmas: skip fsyncs and give SQLite a large page cache while a
+# year is being written. Previous values are restored once the load
+# finishes. The journal stays in WAL mode (see WRITER_PRAGMAS in
+# ingestion/database.py) so API readers are not blocked during the load.
+BULK_LOAD_PRAGMAS = {
+    "synchronous": "OFF",
+    "cache_size": "-65536",  # KiB (64 MB), also caps page-cache growth during a load
+    "temp_store": "MEMORY",
+}
+
+SUNSHINE_COLUMNS = ['sector', 'employer', 'job_title', 'salary', 'benefits', 'classification']
+
+# sunshine_list columns actually written; the names above are interned into
+# sector_dim / employer_dim / job_title_dim first
+SUNSHINE_INSERT_COLUMNS = ['year', 'sector_id', 'employer_id', 'job_title_id', 'salary', 'benefits', 'classification']
+
+@asynccontextmanager
+async def bulk_load_pragmas(conn, pragmas=BULK_LOAD_PRAGMAS):
+    """
+    Applies load-time pragmas on a connection and restores the previous
+    values on exit. Must be used outside of a transaction (journal_mode
+    cannot change while one is open).
+    """
+    previous = {}
+    for name, value in pragmas.items():
+        result = await conn.exec_driver_sql(f"PRAGMA {name}")
+        previous[name] = result.scalar()
+        await conn.exec_driver_sql(f"PRAGMA {name} = {value}")
+    await conn.commit()
+    try:
+        yield conn
+    finally:
+        for name, value in previous.items():
+            await conn.exec_driver_sql(f"PRAGMA {name} = {value}")
+        await conn.commit()
+
+def compile_insert(table, columns, dialect):
+    """
+    Compiles a Core insert() for the given columns into positional SQL that
+    can be executed with executemany over plain tuples.
+    Returns (sql, column order expected in each tuple).
+    """
+    stmt = insert(table).values({name: bindparam(name) for name in columns})
+    compiled = stmt.compile(dialect=dialect)
+    return str(compiled), list(compiled.positiontup)
+
+class SunshineBulkLoader:
+    """
+    Writes sunshine_list rows for one year into a partition (or staging)
+    table through Core insert() executemany, bypassing ORM object
+    construction and the unit of work.
+    """
+
+    def __init__(self, conn, year: int, table, staging: bool = False):
+        self.conn = conn
+        self.year = year
+        self.table = table
+        self.staging = staging
+        self.rows_loaded = 0
+        self.sectors = NameInterner(conn, SectorDim, sector_attributes)
+        self.employers = NameInterner(conn, EmployerDim)
+        self.job_titles = NameInterner(conn, JobTitleDim)
+        self.insert_sql, self.insert_order = compile_insert(table, SUNSHINE_INSERT_COLUMNS, conn.dialect)
+
+    async def load(self, df: pd.DataFrame) -> int:
+        """
+        Inserts a cleaned and classified DataFrame (SUNSHINE_COLUMNS).
+        Returns the number of rows written.
+        """
+        if df.empty:
+            return 0
+
+        # Names are interned exactly as str(value), like the ORM path.
+        # Rows go to the driver as plain tuples, built column-wise.
+        columns = {
+            'year': [self.year] * len(df),
+            'salary': df['salary'].astype(float).tolist(),
+            'benefits': df['benefits'].astype(float).tolist(),
+            'classification': df['classification'].astype(object).tolist(),
+        }
+        for column, interner in (('sector', self.sectors), ('employer', self.employers), ('job_title', self.job_titles)):
+            names = df[column].map(str)
+            ids = await interner.ids_for(names.unique())
+            columns[f'{column}_id'] = names.map(ids).tolist()
+
+        rows = list(zip(*(columns[name] for name in self.insert_order)))
+
+        await self.conn.exec_driver_sql(self.insert_sql, rows)
+        self.rows_loaded += len(rows)
+        return len(rows)
+
+    async def finish(self):
+        """
+        Swaps a staging load in as the year's partition. Runs in the load's
+        transaction; call it before work that must read the new rows (e.g.
+        the rollup refresh). No-op when loading into the partition directly.
+        """
+        if self.staging:
+            await swap_in_staging(self.conn, self.year)
+            self.staging = False
+
+@asynccontextmanager
+async def sunshine_bulk_loader(year: int, replace: bool = False, pragmas=BULK_LOAD_PRAGMAS):
+    """
+    Opens a dedicated connection with bulk-load pragmas and yields a
+    SunshineBulkLoader. Everything loaded for the year is committed in a
+    single transaction, or rolled back if the block raises.
+    replace=True loads into a staging table that replaces the year's
+    partition at loader.finish() (called on exit if the block did not).
+    Otherwise rows are appended to the year's partition.
+    """
+    async with engine.connect() as conn:
+        async with bulk_load_pragmas(conn, pragmas):
+            async with conn.begin() as transaction:
+                if replace:
+                    loader = SunshineBulkLoader(conn, year, await create_staging(conn, year), staging=True)
+                else:
+                    loader = SunshineBulkLoader(conn, year, await ensure_partition(conn, year))
+                yield loader
+                await loader.finish()
+                with stage("commit", year):
+                    await transaction.commit()
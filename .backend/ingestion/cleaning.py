@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_float_dtype, is_integer_dtype
+
+# Amount cleaning shared by the ingestors.
+# Source amounts look like "$123,456.78", "–", "" or, in the budget files,
+# "(1,234)" for a negative. Every value is cleaned the way the original
+# per-row helpers did: drop '$', ',' and ' ', optionally turn parentheses
+# into a minus sign, then float(); anything float() rejects is 0.0.
+
+# Plain ASCII decimal numbers, which float() parses like any C parser would
+_PLAIN_NUMBER = r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?"
+
+def clean_amount(val, negative_parentheses=False) -> float:
+    """
+    Cleans one amount. The scalar reference for clean_amounts.
+    """
+    if pd.isna(val): return 0.0
+    s = str(val).replace('$', '').replace(',', '').replace(' ', '')
+    if negative_parentheses:
+        s = s.replace('(', '-').replace(')', '')
+    try: return float(s)
+    except ValueError: return 0.0
+
+def _to_float(s) -> float:
+    try: return float(s)
+    except ValueError: return 0.0
+
+def clean_amounts(values, negative_parentheses=False) -> pd.Series:
+    """
+    Vectorized clean_amount over a whole column. Accepts a pandas Series or
+    any array-like and returns a float Series aligned to the input, equal to
+    calling clean_amount on each element.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+
+    # Numbers are already clean: str() round-trips them through float()
+    if is_float_dtype(series.dtype) or is_integer_dtype(series.dtype):
+        return series.astype(float).fillna(0.0)
+
+    result = np.zeros(len(series))
+    present = series.notna().to_numpy()
+    text = series[present].astype(str)
+    for char in ('$', ',', ' '):
+        text = text.str.replace(char, "", regex=False)
+    if negative_parentheses:
+        text = text.str.replace("(", "-", regex=False).str.replace(")", "", regex=False)
+
+    strings = text.to_numpy(dtype=object)
+    try:
+        # Parses every string with float() itself, in one C loop
+        parsed = strings.astype(float)
+    except ValueError:
+        # Some values are not plain numbers: only those go through float() one by one
+        plain = text.str.fullmatch(_PLAIN_NUMBER).to_numpy(dtype=bool)
+        parsed = np.empty(len(strings))
+        parsed[plain] = strings[plain].astype(float)
+        parsed[~plain] = [_to_float(s) for s in strings[~plain]]
+    result[present] = parsed
+    return pd.Series(result, index=series.index)
@@ -1,24 +1,81 @@
+import os
+import weakref
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy.orm import sessionmaker, declarative_base, column_property
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, inspect, select, event
+from sqlalchemy.engine import make_url
 
 # Database Configuration
-DATABASE_URL = "sqlite+aiosqlite:///./healthcare.db"
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite+aiosqlite:///./healthcare.db")
+
+# Connection profiles (SQLite only; other backends get plain engines).
+# The writer is a single connection that switches the file to WAL, so the
+# API's readers keep reading the last committed state while a load runs.
+# Load-time pragmas on top of these live in ingestion/bulk_load.py.
+WRITER_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": "30000",
+}
+
+# Readers: read-only file handle, memory-mapped I/O and a private page cache
+# per pooled connection.
+READER_PRAGMAS = {
+    "query_only": "ON",
+    "mmap_size": str(int(os.environ.get("DB_READER_MMAP_BYTES", 256 * 1024 ** 2))),
+    "cache_size": "-32768",  # KiB (32 MB) per connection
+    "temp_store": "MEMORY",
+    "busy_timeout": "5000",
+}
+READER_POOL_SIZE = int(os.environ.get("DB_READER_POOL_SIZE", 4))
 
 Base = declarative_base()
 
+class SectorDim(Base):
+    __tablename__ = "sector_dim"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True)
+    is_health = Column(Boolean, index=True, default=False) # see processing/sectors.py
+
+class EmployerDim(Base):
+    __tablename__ = "employer_dim"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True)
+
+class JobTitleDim(Base):
+    __tablename__ = "job_title_dim"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True)
+    classification = Column(String, index=True) # title -> classification lookup, NULL until classified
+
 class SunshineEntry(Base):
     __tablename__ = "sunshine_list"
+    # A UNION ALL view over per-year tables (see ingestion/partitions.py);
+    # rows are written to the partitions, never through this class
+    __table_args__ = {"info": {"is_view": True}}
     
     id = Column(Integer, primary_key=True, index=True)
     year = Column(Integer, index=True, default=2023)  # Added for historical analysis
-    sector = Column(String, index=True)
-    employer = Column(String, index=True)
-    job_title = Column(String)
+    # Strings are interned in the *_dim tables (see ingestion/dimensions.py)
+    sector_id = Column(Integer, ForeignKey("sector_dim.id"), index=True)
+    employer_id = Column(Integer, ForeignKey("employer_dim.id"), index=True)
+    job_title_id = Column(Integer, ForeignKey("job_title_dim.id"), index=True)
     salary = Column(Float)
     benefits = Column(Float)
     classification = Column(String, index=True) # 'clinical', 'bureaucratic', 'unknown'
 
+    # Read-only names resolved through the dimension tables, so queries and
+    # rows can still use .sector / .employer / .job_title
+    sector = column_property(select(SectorDim.name).where(SectorDim.id == sector_id).scalar_subquery())
+    employer = column_property(select(EmployerDim.name).where(EmployerDim.id == employer_id).scalar_subquery())
+    job_title = column_property(select(JobTitleDim.name).where(JobTitleDim.id == job_title_id).scalar_subquery())
+
+    # ids are only unique within a year's partition
+    __mapper_args__ = {"primary_key": [year, id]}
+
 class LobbyingEntry(Base):
     __tablename__ = "lobbying_registry"
     
@@ -48,10 +105,194 @@ class BudgetBreakdown(Base):
     amount_billions = Column(Float)
     description = Column(String)
 
+class AdminTaxRollup(Base):
+    __tablename__ = "admin_tax_rollup"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    year = Column(Integer, index=True)
+    classification = Column(String, index=True)
+    sector_group = Column(String, index=True) # 'health' or 'other'
+    row_count = Column(Integer)
+    salary_sum = Column(Float)
+    salary_min = Column(Float)
+    salary_max = Column(Float)
+    benefits_sum = Column(Float)
+    benefits_min = Column(Float)
+    benefits_max = Column(Float)
+
+class ClassifierRuleSet(Base):
+    __tablename__ = "classifier_rules"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    rules_hash = Column(String, index=True) # SHA-256 of the keyword lists
+    clinical_keywords = Column(String) # JSON list
+    bureaucratic_keywords = Column(String) # JSON list
+    applied_at = Column(String) # ISO-8601 UTC timestamp
+
+class IngestManifest(Base):
+    __tablename__ = "ingest_manifest"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    dataset = Column(String, index=True) # table the rows were loaded into, e.g. "sunshine_list"
+    year = Column(Integer, index=True)
+    source_url = Column(String)
+    content_hash = Column(String) # SHA-256 of the source file bytes
+    row_count = Column(Integer)
+    ingested_at = Column(String) # ISO-8601 UTC timestamp
+
+def _set_pragmas(engine, pragmas):
+    @event.listens_for(engine.sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+def database_path(url=None) -> str:
+    # Absolute path of a file-based SQLite database (DATABASE_URL by default)
+    return os.path.abspath(make_url(url or DATABASE_URL).database)
+
+def read_only_url(url, immutable: bool = False):
+    """
+    Turns a file-based SQLite URL into its read-only URI form (mode=ro).
+    immutable=True also tells SQLite the file never changes (no locking).
+    """
+    url = make_url(url)
+    database = os.path.abspath(url.database)
+    options = "mode=ro&immutable=1" if immutable else "mode=ro"
+    return url.set(database=f"file:{database}?{options}", query={**url.query, "uri": "true"})
+
+# Callbacks run for every engine create_db_engine() makes, e.g. event hooks
+# for metrics (see on_engine_created)
+_engine_listeners = []
+_engines = weakref.WeakKeyDictionary()  # engine -> profile
+
+def on_engine_created(listener):
+    """
+    Registers listener(engine, profile) to run for every engine created by
+    create_db_engine(), including the ones that already exist (the module
+    engines and any serving snapshot engine). Returns the listener.
+    """
+    _engine_listeners.append(listener)
+    for engine, profile in list(_engines.items()):
+        listener(engine, profile)
+    return listener
+
+def create_db_engine(profile: str = "writer", url: str = None):
+    """
+    Creates an AsyncEngine for DATABASE_URL (or url) with a connection profile:
+    'writer': one pooled connection with WRITER_PRAGMAS (ingestion, classification).
+    'reader': READER_POOL_SIZE read-only connections with READER_PRAGMAS.
+    'snapshot': like 'reader', for a published serving snapshot that is
+        never written again (see ingestion/serving.py).
+    """
+    engine = _create_engine(profile, make_url(url or DATABASE_URL))
+    _engines[engine] = profile
+    for listener in _engine_listeners:
+        listener(engine, profile)
+    return engine
+
+def _create_engine(profile, url):
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return create_async_engine(url, echo=False)
+
+    if profile == "writer":
+        engine = create_async_engine(url, echo=False, pool_size=1, max_overflow=0)
+        _set_pragmas(engine, WRITER_PRAGMAS)
+    elif profile in ("reader", "snapshot"):
+        engine = create_async_engine(read_only_url(url, immutable=profile == "snapshot"), echo=False,
+                                     pool_size=READER_POOL_SIZE, max_overflow=0)
+        _set_pragmas(engine, READER_PRAGMAS)
+    else:
+        raise ValueError(f"Unknown engine profile: {profile}")
+    return engine
+
 # Database Setup
-engine = create_async_engine(DATABASE_URL, echo=False)
+engine = create_db_engine("writer")
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Read-only pool on the live database for read paths in the batch jobs.
+# The API reads the published snapshot instead (ingestion/serving.py).
+# The database file must already exist (init_db runs in the writers first).
+reader_engine = create_db_engine("reader")
+ReaderSessionLocal = sessionmaker(reader_engine, class_=AsyncSession, expire_on_commit=False)
+
+# Compatibility view with the original flat sunshine_list layout, for ad-hoc
+# SQL and external tools
+SUNSHINE_NAMED_VIEW = """
+CREATE VIEW IF NOT EXISTS sunshine_list_named AS
+SELECT f.id, f.year, s.name AS sector, e.name AS employer, t.name AS job_title,
+       f.salary, f.benefits, f.classification
+FROM sunshine_list f
+LEFT JOIN sector_dim s ON s.id = f.sector_id
+LEFT JOIN employer_dim e ON e.id = f.employer_id
+LEFT JOIN job_title_dim t ON t.id = f.job_title_id
+"""
+
+def migrate_flat_sunshine_list(sync_conn):
+    """
+    Converts a database whose sunshine_list still stores sector / employer /
+    job_title strings on every row into the dictionary-encoded layout.
+    Dimension flags (sector_dim.is_health) are filled in afterwards by
+    processing.sectors.sync_sector_dim.
+    """
+    inspector = inspect(sync_conn)
+    if not inspector.has_table("sunshine_list"):
+        return False
+    columns = {c['name'] for c in inspector.get_columns("sunshine_list")}
+    if 'employer' not in columns:
+        return False
+
+    for dim, column in (("sector_dim", "sector"), ("employer_dim", "employer"), ("job_title_dim", "job_title")):
+        sync_conn.exec_driver_sql(
+            f"INSERT OR IGNORE INTO {dim} (name) "
+            f"SELECT DISTINCT {column} FROM sunshine_list WHERE {column} IS NOT NULL"
+        )
+
+    # The old indexes keep their names across a rename, so drop them first
+    for (index_name,) in sync_conn.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'sunshine_list' AND sql IS NOT NULL"
+    ).all():
+        sync_conn.exec_driver_sql(f"DROP INDEX {index_name}")
+    sync_conn.exec_driver_sql("ALTER TABLE sunshine_list RENAME TO sunshine_list_flat")
+    SunshineEntry.__table__.create(sync_conn)
+
+    sync_conn.exec_driver_sql("""
+        INSERT INTO sunshine_list (id, year, sector_id, employer_id, job_title_id, salary, benefits, classification)
+        SELECT f.id, f.year, s.id, e.id, t.id, f.salary, f.benefits, f.classification
+        FROM sunshine_list_flat f
+        LEFT JOIN sector_dim s ON s.name = f.sector
+        LEFT JOIN employer_dim e ON e.name = f.employer
+        LEFT JOIN job_title_dim t ON t.name = f.job_title
+    """)
+    sync_conn.exec_driver_sql("DROP TABLE sunshine_list_flat")
+    return True
+
+def add_missing_columns(sync_conn):
+    """
+    Adds columns (and their indexes) that exist on the models but not yet in
+    an older database file. create_all only creates missing tables.
+    """
+    inspector = inspect(sync_conn)
+    for table in stored_tables():
+        existing = {c['name'] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=sync_conn.dialect)
+            sync_conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+            for index in table.indexes:
+                if column.name in index.columns:
+                    index.create(sync_conn, checkfirst=True)
+
+def stored_tables():
+    return [table for table in Base.metadata.sorted_tables if not table.info.get("is_view")]
+
 async def init_db():
+    from ingestion.partitions import partition_sunshine_list, create_views
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(Base.metadata.create_all, tables=stored_tables())
+        await conn.run_sync(migrate_flat_sunshine_list)
+        await conn.run_sync(partition_sunshine_list)
+        await conn.run_sync(add_missing_columns)
+        await conn.run_sync(create_views)
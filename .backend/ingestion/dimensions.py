@@ -0,0 +1,49 @@
+from sqlalchemy import select, insert
+
+# Names looked up per IN (...) query, well below SQLite's bound-parameter limit
+LOOKUP_BATCH = 500
+
+async def _lookup(conn, dim, names) -> dict:
+    ids = {}
+    for i in range(0, len(names), LOOKUP_BATCH):
+        stmt = select(dim.name, dim.id).where(dim.name.in_(names[i:i + LOOKUP_BATCH]))
+        ids.update((await conn.execute(stmt)).all())
+    return ids
+
+async def intern_names(conn, dim, names, attributes=None) -> dict:
+    """
+    Returns {name: id} from a name dimension table (SectorDim, EmployerDim,
+    JobTitleDim), inserting the names that are not there yet in one
+    executemany. attributes(name) may supply extra column values for new rows.
+    conn is an AsyncConnection or AsyncSession.
+    """
+    names = sorted({str(n) for n in names})
+    if not names:
+        return {}
+
+    ids = await _lookup(conn, dim, names)
+    missing = [n for n in names if n not in ids]
+    if missing:
+        await conn.execute(insert(dim), [
+            {"name": n, **(attributes(n) if attributes else {})} for n in missing
+        ])
+        ids.update(await _lookup(conn, dim, missing))
+    return ids
+
+class NameInterner:
+    """
+    Per-load cache in front of intern_names, so each distinct name is looked
+    up at most once per load rather than once per chunk.
+    """
+
+    def __init__(self, conn, dim, attributes=None):
+        self.conn = conn
+        self.dim = dim
+        self.attributes = attributes
+        self.ids = {}
+
+    async def ids_for(self, names) -> dict:
+        new_names = set(names) - self.ids.keys()
+        if new_names:
+            self.ids.update(await intern_names(self.conn, self.dim, new_names, self.attributes))
+        return self.ids
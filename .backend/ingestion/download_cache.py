@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+# On-disk cache for source files, shared by all ingestors.
+# Layout: <cache_dir>/index.json maps URL -> validators + content hash,
+#         <cache_dir>/blobs/<sha256> holds each distinct file once.
+CACHE_DIR = os.environ.get("INGEST_CACHE_DIR", "./.ingest_cache")
+CACHE_MAX_BYTES = int(os.environ.get("INGEST_CACHE_MAX_BYTES", 8 * 1024 ** 3))
+
+DOWNLOAD_BLOCK_BYTES = 1024 * 1024
+
+class Download:
+    """
+    A fetched source file: where it lives on disk and the SHA-256 of its bytes.
+    release() must be called once the file has been consumed.
+    """
+
+    def __init__(self, key, url, path, sha256, size, from_cache=False, on_release=None):
+        self.key = key
+        self.url = url
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.from_cache = from_cache
+        self._on_release = on_release
+
+    def release(self):
+        if self._on_release is not None:
+            self._on_release(self)
+            self._on_release = None
+
+async def stream_to_file(resp, directory=None):
+    """
+    Writes a streamed httpx response into a temp file, hashing as it goes.
+    Returns (path, sha256, size).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(suffix='.download', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            async for block in resp.aiter_bytes(DOWNLOAD_BLOCK_BYTES):
+                digest.update(block)
+                size += len(block)
+                f.write(block)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, digest.hexdigest(), size
+
+async def download_to_temp(client, key, url) -> Download:
+    """
+    Uncached fetch: the file is deleted again on release().
+    """
+    async with client.stream('GET', url) as resp:
+        resp.raise_for_status()
+        path, sha256, size = await stream_to_file(resp)
+    return Download(key, url, path, sha256, size, on_release=lambda d: os.unlink(d.path))
+
+class DownloadCache:
+    """
+    Content-addressed download cache with conditional GETs.
+
+    Each URL remembers its ETag / Last-Modified and the hash of the bytes it
+    last served. A re-fetch sends If-None-Match / If-Modified-Since and a 304
+    reuses the cached blob without transferring the body. Blobs are evicted
+    least-recently-used first once the cache exceeds max_bytes; blobs handed
+    out and not yet released are never evicted.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, 'blobs')
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self.max_bytes = max_bytes
+        self._pinned = {}
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_index(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def blob_path(self, sha256):
+        return os.path.join(self.blob_dir, sha256)
+
+    async def fetch(self, client, key, url) -> Download:
+        """
+        Returns the current bytes of url, revalidating any cached copy.
+        """
+        entry = self._index.get(url)
+        headers = {}
+        if entry and os.path.exists(self.blob_path(entry['sha256'])):
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        else:
+            entry = None
+
+        async with client.stream('GET', url, headers=headers) as resp:
+            if resp.status_code == 304 and entry is not None:
+                from_cache = True
+            else:
+                resp.raise_for_status()
+                tmp_path, sha256, size = await stream_to_file(resp, directory=self.cache_dir)
+                os.replace(tmp_path, self.blob_path(sha256))
+                if entry is not None and entry['sha256'] != sha256:
+                    self._drop_blob_if_unused(entry['sha256'], url)
+                entry = {
+                    'sha256': sha256,
+                    'size': size,
+                    'etag': resp.headers.get('etag'),
+                    'last_modified': resp.headers.get('last-modified'),
+                }
+                from_cache = False
+
+        entry['last_used'] = time.time()
+        self._index[url] = entry
+        self._pin(entry['sha256'])
+        self._evict()
+        self._save_index()
+
+        return Download(key, url, self.blob_path(entry['sha256']), entry['sha256'], entry['size'],
+                        from_cache=from_cache, on_release=self._unpin)
+
+    def _drop_blob_if_unused(self, sha256, replaced_url):
+        in_use = sha256 in self._pinned or any(
+            e['sha256'] == sha256 for u, e in self._index.items() if u != replaced_url
+        )
+        if not in_use:
+            try:
+                os.unlink(self.blob_path(sha256))
+            except FileNotFoundError:
+                pass
+
+    def _pin(self, sha256):
+        self._pinned[sha256] = self._pinned.get(sha256, 0) + 1
+
+    def _unpin(self, download):
+        count = self._pinned.get(download.sha256, 0) - 1
+        if count > 0:
+            self._pinned[download.sha256] = count
+        else:
+            self._pinned.pop(download.sha256, None)
+
+    def _evict(self):
+        # One blob may back several URLs; its recency is the latest of them
+        blobs = {}
+        for entry in self._index.values():
+            sha256 = entry['sha256']
+            size, last_used = blobs.get(sha256, (entry['size'], 0))
+            blobs[sha256] = (size, max(last_used, entry.get('last_used', 0)))
+
+        total = sum(size for size, _ in blobs.values())
+        for sha256, (size, _) in sorted(blobs.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            if sha256 in self._pinned:
+                continue
+            try:
+                os.unlink(self.blob_path(sha256))
+            except FileNotFoundError:
+                pass
+            self._index = {url: e for url, e in self._index.items() if e['sha256'] != sha256}
+            total -= size
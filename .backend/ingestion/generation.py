@@ -0,0 +1,48 @@
+import os
+import tempfile
+import time
+from ingestion.database import database_path
+
+# Data generation: a number that changes every time an ingestor or the
+# classifier commits new data. It lives in a small sidecar file next to the
+# database so the API process can check it without querying SQLite:
+# <database file>.generation, for whichever database DATABASE_URL names.
+GENERATION_FILE = os.environ.get("DATA_GENERATION_FILE") or database_path() + ".generation"
+
+_last_seen = (None, 0)  # (file identity, generation)
+
+def _read(path) -> int:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+def current_generation(path=GENERATION_FILE) -> int:
+    """
+    Returns the current data generation (0 before the first bump).
+    The file is only re-read when its stat() identity changes.
+    """
+    global _last_seen
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return 0
+    identity = (path, st.st_ino, st.st_mtime_ns, st.st_size)
+    if _last_seen[0] != identity:
+        _last_seen = (identity, _read(path))
+    return _last_seen[1]
+
+def bump_generation(path=GENERATION_FILE) -> int:
+    """
+    Moves the data generation forward. Call after the write has committed.
+    The new value is at least the current time in nanoseconds, so two
+    processes bumping at once still leave a value neither reader has seen.
+    """
+    generation = max(_read(path) + 1, time.time_ns())
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".generation-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(str(generation))
+    os.replace(tmp_path, path)
+    return generation
@@ -1,182 +1,423 @@
 import asyncio
-import requests
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from queue import Empty
 import pandas as pd
-import io
-from sqlalchemy import select, delete
-from ingestion.database import AsyncSessionLocal, SunshineEntry, init_db
-from processing.classifier import classify_role
+from ingestion.database import AsyncSessionLocal, EmployerDim, JobTitleDim, init_db
+from ingestion.bulk_load import sunshine_bulk_loader, SUNSHINE_COLUMNS
+from ingestion.cleaning import clean_amounts
+from ingestion.download_cache import DownloadCache
+from ingestion.generation import bump_generation
+from ingestion.instrumentation import instrumented, stage
+from ingestion.manifest import record_ingest, skip_unchanged
+from ingestion.partitions import partition_years, ensure_partition, create_staging, swap_in_staging, partition_entity
+from ingestion.pipeline import make_client, run_pipeline, DOWNLOAD_WORKERS, PARSE_WORKERS, QUEUE_SIZE
+from ingestion.streaming import open_csv_text
+from processing.classifier import classify_roles
+from processing.rollup import refresh_admin_tax_rollup
+from ingestion.dimensions import intern_names
+from processing.sectors import ensure_sectors
+
+# Dataset name used in the ingest manifest
+DATASET = "sunshine_list"
 
 # CKAN API Endpoint for Ontario Data
 CKAN_URL = "https://data.ontario.ca/api/3/action/package_search?q=Public+Sector+Salary+Disclosure&rows=50"
 
-async def fetch_and_ingest_historical_data():
+# DIRECT FALLBACK FOR RECENT YEARS (API SEARCH IS UNRELIABLE)
+# URLs found via manual web inspection of data.ontario.ca
+FALLBACK_URLS = {
+    2021: "https://www.ontario.ca/public-sector-salary-disclosure/pssd-assets/files/2021/tbs-pssd-compendium-salary-disclosed-2021-en-utf-8-2023-01-05.csv",
+    2022: "https://www.ontario.ca/public-sector-salary-disclosure/pssd-assets/files/2022/tbs-pssd-compendium-salary-disclosed-2022-en-utf-8-2024-01-19.csv",
+    2023: "https://www.ontario.ca/public-sector-salary-disclosure/pssd-assets/files/2023/tbs-pssd-compendium-salary-disclosed-2023-en-utf-8-2025-03-26.csv"
+}
+
+# Worker processes that parse, clean and classify compendiums in parallel
+# (0: parse in threads of this process)
+PARSE_PROCESSES = int(os.environ.get("INGEST_PARSE_PROCESSES", 0))
+
+@instrumented(DATASET)
+async def fetch_and_ingest_historical_data(ckan_url=CKAN_URL, fallback_urls=FALLBACK_URLS, bulk=True,
+                                           client=None, cache=None, force=False,
+                                           download_workers=DOWNLOAD_WORKERS, parse_workers=PARSE_WORKERS,
+                                           parse_processes=PARSE_PROCESSES):
+    """
+    Discovers the yearly compendiums and ingests them through the concurrent
+    download -> parse -> write pipeline. URLs and the HTTP client can be
+    overridden to run against a local stand-in server.
+    Source files go through the download cache; a year whose bytes match the
+    ingest manifest is skipped unless force=True.
+    parse_processes > 0 parses years in that many worker processes (see
+    process_parser), with as many parse workers so every process has a
+    year; chunks stream back through bounded queues and the single writer
+    stays in this process.
+    """
     print("🚀 Starting Historical Data Ingestion (2014-2023)...")
     await init_db()
 
-    # 1. Fetch Dataset Metadata from CKAN
+    own_client = client is None
+    if own_client:
+        client = make_client()
     try:
-        response = requests.get(CKAN_URL)
-        response.raise_for_status()
-        data = response.json()
-        results = data['result']['results']
-    except Exception as e:
-        print(f"❌ Failed to fetch from CKAN API: {e}")
-        return
-
-    # 2. Process Resources
-    async with AsyncSessionLocal() as session:
-        for dataset in results:
-            for resource in dataset['resources']:
-                # Filter for Main Compendium CSVs (English)
-                name_lower = resource['name'].lower()
-                url_lower = resource['url'].lower()
-                
-                is_csv = resource['format'].lower() == 'csv'
-                is_english = 'en' in name_lower or 'en-' in url_lower
-                # 'compendium' usually denotes the full list
-                is_compendium = 'compendium' in name_lower or 'all sectors' in name_lower
-                is_excluded = 'addendum' in name_lower or 'no salaries' in name_lower or 'no-salaries' in name_lower
-                
-                if is_csv and is_english and is_compendium and not is_excluded:
-                    
-                    # Extract Year
-                    year = None
-                    for y in range(2014, 2024):
-                        if str(y) in resource['name'] or str(y) in resource['url']:
-                            year = y
-                            break
-                    
-                    if not year:
-                        continue 
-                    
-                    print(f"📥 Found MAIN Dataset for {year}: {resource['name']}")
-                    print(f"   URL: {resource['url']}")
-
-                    # Check if year already exists 
-                    # For Phase 2, we force re-ingestion to overwrite potential "addendum-only" partial data
-                    result = await session.execute(select(SunshineEntry).filter_by(year=year).limit(1))
-                    if result.scalars().first():
-                       print(f"   ⚠️  Data for {year} already exists. Deleting older records to re-ingest full dataset...")
-                       await session.execute(delete(SunshineEntry).where(SunshineEntry.year == year))
-                       await session.commit()
-                       print(f"      Deleted old records for {year}.")
-
-                    # 3. Stream Download & Process
-                    await process_resource_url(session, year, resource['url'])
-
-    # DIRECT FALLBACK FOR RECENT YEARS (API SEARCH IS UNRELIABLE)
-    # URLs found via manual web inspection of data.ontario.ca
-    FALLBACK_URLS = {
-        2021: "https://www.ontario.ca/public-sector-salary-disclosure/pssd-assets/files/2021/tbs-pssd-compendium-salary-disclosed-2021-en-utf-8-2023-01-05.csv",
-        2022: "https://www.ontario.ca/public-sector-salary-disclosure/pssd-assets/files/2022/tbs-pssd-compendium-salary-disclosed-2022-en-utf-8-2024-01-19.csv",
-        2023: "https://www.ontario.ca/public-sector-salary-disclosure/pssd-assets/files/2023/tbs-pssd-compendium-salary-disclosed-2023-en-utf-8-2025-03-26.csv"
-    }
-
-    print("\n🔍 Checking Fallback URLs for 2021-2023...")
-    for year, url in FALLBACK_URLS.items():
+        # 1. Fetch Dataset Metadata from CKAN
+        try:
+            with stage("discovery") as span:
+                response = await client.get(ckan_url)
+                response.raise_for_status()
+                data = response.json()
+                span.add(bytes=len(response.content))
+            results = data['result']['results']
+        except Exception as e:
+            print(f"❌ Failed to fetch from CKAN API: {e}")
+            return
+
+        # 2. Select Resources
+        # CKAN years are re-ingested (unless unchanged) to overwrite potential "addendum-only" partial data
+        jobs = find_compendium_resources(results)
+
+        print("\n🔍 Checking Fallback URLs for 2021-2023...")
         async with AsyncSessionLocal() as session:
-            # Check if exists
-            exists = await session.execute(select(SunshineEntry).filter_by(year=year).limit(1))
-            if exists.scalars().first():
+            existing_years = set(await partition_years(session))
+        for year, url in fallback_urls.items():
+            if year in jobs or year in existing_years:
                 print(f"   ⚠️  Data for {year} already exists. Skipping fallback.")
                 continue
-                
             print(f"   📥 Ingesting {year} from Fallback URL...")
-            await process_resource_url(session, year, url)
+            jobs[year] = url
 
-async def process_resource_url(session, year, url):
-    try:
-        csv_resp = requests.get(url, stream=True, verify=False)
-        content = csv_resp.content
-        
-        df = None
-        # Try encodings
-        for encoding in ['utf-8-sig', 'latin1', 'cp1252']:
-            try:
-                df = pd.read_csv(io.BytesIO(content), encoding=encoding)
-                break
-            except Exception:
-                continue
-        
-        if df is None:
-            print(f"   ❌ Failed to read CSV for {year}")
-            return
+        # 3. Download, Parse & Write concurrently
+        cache = cache or DownloadCache()
+        pool = manager = None
+        if parse_processes > 0:
+            pool, manager = parse_pool(parse_processes), parse_manager()
+        try:
+            await run_pipeline(
+                sorted(jobs.items()),
+                parse=parse_compendium if pool is None else process_parser(pool, manager),
+                write=lambda download, chunks: write_compendium(download, chunks, bulk=bulk),
+                client=client,
+                fetch=cache.fetch,
+                skip=None if force else skip_unchanged(DATASET),
+                download_workers=download_workers,
+                parse_workers=parse_workers if pool is None else max(parse_workers, parse_processes),
+            )
+        finally:
+            if pool is not None:
+                pool.shutdown()
+                manager.shutdown()
+    finally:
+        if own_client:
+            await client.aclose()
 
-        # Normalize Columns
-        df.columns = [str(c).lower().strip() for c in df.columns]
-        
-        standard_cols = {
-            'sector': ['sector', 'secteur'],
-            'employer': ['employer', 'employeur'],
-            'job_title': ['job title', 'job_title', 'position', 'poste', 'title'],
-            'salary': ['salary', 'paid', 'traitement'],
-            'benefits': ['benefits', 'taxable', 'avantages']
-        }
-        
-        rename_map = {}
-        for std, patterns in standard_cols.items():
-            found = False
-            for col in df.columns:
-                if col in patterns:
+def find_compendium_resources(results):
+    """
+    Picks the main English compendium CSV for each year out of CKAN
+    package_search results. Returns {year: url}; later matches win.
+    """
+    jobs = {}
+    for dataset in results:
+        for resource in dataset['resources']:
+            # Filter for Main Compendium CSVs (English)
+            name_lower = resource['name'].lower()
+            url_lower = resource['url'].lower()
+            
+            is_csv = resource['format'].lower() == 'csv'
+            is_english = 'en' in name_lower or 'en-' in url_lower
+            # 'compendium' usually denotes the full list
+            is_compendium = 'compendium' in name_lower or 'all sectors' in name_lower
+            is_excluded = 'addendum' in name_lower or 'no salaries' in name_lower or 'no-salaries' in name_lower
+            
+            if is_csv and is_english and is_compendium and not is_excluded:
+                
+                # Extract Year
+                year = None
+                for y in range(2014, 2024):
+                    if str(y) in resource['name'] or str(y) in resource['url']:
+                        year = y
+                        break
+                
+                if not year:
+                    continue 
+                
+                print(f"📥 Found MAIN Dataset for {year}: {resource['name']}")
+                print(f"   URL: {resource['url']}")
+                jobs[year] = resource['url']
+    return jobs
+
+# Rows parsed, cleaned, classified and written per step when streaming a CSV
+CHUNK_SIZE = 50_000
+
+STANDARD_COLS = {
+    'sector': ['sector', 'secteur'],
+    'employer': ['employer', 'employeur'],
+    'job_title': ['job title', 'job_title', 'position', 'poste', 'title'],
+    'salary': ['salary', 'paid', 'traitement'],
+    'benefits': ['benefits', 'taxable', 'avantages']
+}
+
+REQUIRED_COLS = ['sector', 'employer', 'job_title', 'salary', 'benefits']
+
+def normalize_column_names(columns):
+    return [str(c).lower().strip() for c in columns]
+
+def build_rename_map(columns):
+    """
+    Maps the (normalized) compendium headers onto STANDARD_COLS names.
+    Exact matches win over substring matches.
+    """
+    rename_map = {}
+    for std, patterns in STANDARD_COLS.items():
+        found = False
+        for col in columns:
+            if col in patterns:
+                rename_map[col] = std
+                found = True
+                break
+        if not found:
+            for col in columns:
+                if any(p in col for p in patterns):
                     rename_map[col] = std
                     found = True
                     break
-            if not found:
-                for col in df.columns:
-                    if any(p in col for p in patterns):
-                        rename_map[col] = std
-                        found = True
-                        break
-        
-        df = df.rename(columns=rename_map)
-        
-        required = ['sector', 'employer', 'job_title', 'salary', 'benefits']
-        if not all(c in df.columns for c in required):
-            print(f"   ❌ Missing columns in {year}. Found: {list(df.columns)}")
+    return rename_map
+
+def prepare_chunk(chunk, rename_map, year=None):
+    """
+    Normalizes, cleans and classifies one parsed chunk of a compendium.
+    """
+    with stage("clean", year) as span:
+        chunk.columns = normalize_column_names(chunk.columns)
+        chunk = chunk.rename(columns=rename_map)
+
+        chunk['salary'] = clean_amounts(chunk['salary'])
+        chunk['benefits'] = clean_amounts(chunk['benefits'])
+        span.add(rows=len(chunk))
+
+    # Classify the whole column in one pass
+    with stage("classify", year) as span:
+        chunk['classification'] = classify_roles(chunk['job_title'].astype(str))
+        span.add(rows=len(chunk))
+    return chunk
+
+@instrumented(DATASET)
+async def process_resource_url(year, url, bulk=True, client=None):
+    """
+    Downloads, cleans, classifies and stores a single year's compendium,
+    replacing any rows already stored for that year.
+    """
+    results = await run_pipeline(
+        [(year, url)],
+        parse=parse_compendium,
+        write=lambda download, chunks: write_compendium(download, chunks, bulk=bulk),
+        client=client,
+    )
+    return results.get(year)
+
+def iter_compendium(f, year, chunk_size=CHUNK_SIZE):
+    """
+    Parses an open compendium file chunk_size rows at a time, yielding
+    cleaned and classified chunks (SUNSHINE_COLUMNS).
+    """
+    # Decoded as pandas reads, so decode time is also part of parse
+    reader = pd.read_csv(open_csv_text(f, year), chunksize=chunk_size)
+
+    rename_map = None
+    while True:
+        with stage("parse", year) as span:
+            chunk = next(reader, None)
+            if chunk is not None:
+                span.add(rows=len(chunk))
+        if chunk is None:
             return
+        if rename_map is None:
+            columns = normalize_column_names(chunk.columns)
+            rename_map = build_rename_map(columns)
+            renamed = [rename_map.get(c, c) for c in columns]
+            if not all(c in renamed for c in REQUIRED_COLS):
+                raise ValueError(f"Missing columns in {year}. Found: {renamed}")
+        yield prepare_chunk(chunk, rename_map, year)[SUNSHINE_COLUMNS]
 
-        # Cleaning
-        def clean_currency(val):
-            if pd.isna(val): return 0.0
-            val_str = str(val).strip()
-            if val_str in ['-', '–', '']: return 0.0
-            clean = val_str.replace('$', '').replace(',', '').replace(' ', '')
-            try: return float(clean)
-            except: return 0.0
+async def parse_compendium(download):
+    """
+    Parses a downloaded compendium CHUNK_SIZE rows at a time, yielding
+    cleaned and classified chunks. Parsing runs in a worker thread so the
+    event loop keeps serving downloads and writes, and memory stays flat
+    regardless of file size.
+    """
+    with open(download.path, 'rb') as f:
+        chunks = iter_compendium(f, download.key)
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
 
-        df['salary'] = df['salary'].apply(clean_currency)
-        df['benefits'] = df['benefits'].apply(clean_currency)
+# String columns shipped back from parse processes as categoricals
+# (integer codes plus each distinct string once)
+COMPACT_COLUMNS = ['sector', 'employer', 'job_title', 'classification']
 
-        print(f"   Processing {len(df)} records for {year}...")
+# Seconds a process parser waits on a worker's queue before checking
+# whether the worker died
+WORKER_POLL_SECONDS = 0.5
 
-        batch_size = 5000
-        entries_buffer = []
-        
-        for _, row in df.iterrows():
-            classification = classify_role(str(row['job_title']))
-            entries_buffer.append(SunshineEntry(
-                year=year,
-                sector=str(row['sector']),
-                employer=str(row['employer']),
-                job_title=str(row['job_title']),
-                salary=row['salary'],
-                benefits=row['benefits'],
-                classification=classification
-            ))
-            
-            if len(entries_buffer) >= batch_size:
-                session.add_all(entries_buffer)
+def parse_compendium_file(path, year, queue, chunk_size=CHUNK_SIZE) -> int:
+    """
+    Process-pool entry point: parses, cleans and classifies a compendium
+    file, putting each (chunk, original dtypes) on queue as soon as it is
+    ready and None at the end; returns the row count. COMPACT_COLUMNS go as
+    categoricals, which pickle as NumPy code arrays instead of one object
+    per cell. The worker blocks while the queue is full, so a year is never
+    held whole.
+    """
+    rows = 0
+    with open(path, 'rb') as f:
+        for chunk in iter_compendium(f, year, chunk_size):
+            dtypes = {column: chunk[column].dtype for column in COMPACT_COLUMNS}
+            queue.put((chunk.astype({column: 'category' for column in COMPACT_COLUMNS}), dtypes))
+            rows += len(chunk)
+    queue.put(None)
+    return rows
+
+def parse_pool(processes: int) -> ProcessPoolExecutor:
+    # Spawned workers: forking a process that runs an event loop and threads is unsafe
+    return ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'))
+
+def parse_manager():
+    # Pool workers can only be handed queues owned by a manager process
+    return multiprocessing.get_context('spawn').Manager()
+
+def next_parsed(queue, future):
+    """
+    Blocking get of a worker's next item; raises the worker's error if it
+    stopped without sending its end marker.
+    """
+    while True:
+        try:
+            return queue.get(timeout=WORKER_POLL_SECONDS)
+        except Empty:
+            if not future.done():
+                continue
+        try:
+            return queue.get_nowait()
+        except Empty:
+            future.result()
+            raise RuntimeError("Parse worker finished without sending its end marker")
+
+def discard_parsed(queue, future):
+    # Unblocks a worker whose chunks are no longer wanted
+    while not future.done():
+        try:
+            queue.get(timeout=WORKER_POLL_SECONDS)
+        except Empty:
+            pass
+
+def process_parser(pool, manager):
+    """
+    Returns a parse stage for run_pipeline that parses each download in a
+    pool process, so years are cleaned and classified on separate cores.
+    Chunks come back through a queue of QUEUE_SIZE (from the manager), so
+    each year in flight holds at most that many chunks in memory; they are
+    handed to the writer as usual. Waiting for a chunk (the worker's
+    decode, clean and classify time) counts as parse.
+    """
+    async def parse(download):
+        queue = manager.Queue(maxsize=QUEUE_SIZE)
+        future = pool.submit(parse_compendium_file, download.path, download.key, queue)
+        try:
+            while True:
+                with stage("parse", download.key) as span:
+                    item = await asyncio.to_thread(next_parsed, queue, future)
+                    if item is not None:
+                        span.add(rows=len(item[0]))
+                if item is None:
+                    return
+                chunk, dtypes = item
+                # Back to the original column types, exactly what parse_compendium yields
+                yield chunk.astype(dtypes)
+        finally:
+            if not future.cancel():
+                await asyncio.to_thread(discard_parsed, queue, future)
+    return parse
+
+async def write_compendium(download, chunks, bulk=True):
+    """
+    Replaces a year's rows with the parsed chunks and returns the row count.
+    The rows load into a staging table that replaces the year's partition
+    when complete. bulk=True writes through the Core bulk loader in a single
+    transaction; bulk=False keeps the original ORM add_all/commit path. The
+    swap, the manifest entry for the source file and the year's admin tax
+    rollup are committed together.
+    """
+    year = download.key
+    total = 0
+    if bulk:
+        async with sunshine_bulk_loader(year, replace=True) as loader:
+            async for chunk in chunks:
+                with stage("insert", year) as span:
+                    span.add(rows=await loader.load(chunk))
+                total += span.rows
+                print(f"   Processed {total} records for {year}...")
+            with stage("insert", year):
+                await loader.finish()
+                await record_ingest(loader.conn, DATASET, year, download.url, download.sha256, total)
+            with stage("rollup", year):
+                await refresh_admin_tax_rollup(loader.conn, [year])
+    else:
+        async with AsyncSessionLocal() as session:
+            staging = await create_staging(session, year)
+            await session.commit()
+            async for chunk in chunks:
+                with stage("insert", year) as span:
+                    await write_year_orm(session, year, chunk, table=staging)
+                    span.add(rows=len(chunk))
+                total += len(chunk)
+                print(f"   Processed {total} records for {year}...")
+            with stage("insert", year):
+                await swap_in_staging(session, year)
+                await record_ingest(session, DATASET, year, download.url, download.sha256, total)
+            with stage("rollup", year):
+                await refresh_admin_tax_rollup(session, [year])
+            with stage("commit", year):
                 await session.commit()
-                entries_buffer = []
+    bump_generation()
+
+    print(f"   ✅ Successfully ingested {total} records for {year}.")
+    return total
+
+async def write_year_orm(session, year, df, table=None):
+    """
+    Writes a cleaned, classified year as ORM objects, committing every 5000 rows.
+    Rows go to table (e.g. a staging table), or to the year's partition.
+    """
+    batch_size = 5000
+    entries_buffer = []
+    if table is None:
+        table = await ensure_partition(session, year)
+    Entry = partition_entity(table.name)
+    sector_ids = await ensure_sectors(session, df['sector'].map(str).unique())
+    employer_ids = await intern_names(session, EmployerDim, df['employer'].map(str).unique())
+    job_title_ids = await intern_names(session, JobTitleDim, df['job_title'].map(str).unique())
+    
+    for _, row in df.iterrows():
+        entries_buffer.append(Entry(
+            year=year,
+            sector_id=sector_ids[str(row['sector'])],
+            employer_id=employer_ids[str(row['employer'])],
+            job_title_id=job_title_ids[str(row['job_title'])],
+            salary=row['salary'],
+            benefits=row['benefits'],
+            classification=row['classification']
+        ))
         
-        if entries_buffer:
+        if len(entries_buffer) >= batch_size:
             session.add_all(entries_buffer)
             await session.commit()
-            
-        print(f"   ✅ Successfully ingested {year} data.")
-
-    except Exception as e:
-        print(f"   ❌ Error processing {year}: {e}")
+            entries_buffer = []
+    
+    if entries_buffer:
+        session.add_all(entries_buffer)
+        await session.commit()
 
 if __name__ == "__main__":
     asyncio.run(fetch_and_ingest_historical_data())
@@ -1,38 +1,39 @@
 import asyncio
-import requests
+import re
 import pandas as pd
-import io
-from sqlalchemy import delete, select
+from sqlalchemy import delete
+from ingestion.budget_taxonomy import OTHER, category_totals
+from ingestion.cleaning import clean_amounts
 from ingestion.database import AsyncSessionLocal, BudgetBreakdown, init_db
+from ingestion.download_cache import DownloadCache
+from ingestion.generation import bump_generation
+from ingestion.instrumentation import instrumented, stage
+from ingestion.manifest import record_ingest, skip_unchanged
+from ingestion.pipeline import make_client, run_pipeline, DOWNLOAD_WORKERS, PARSE_WORKERS
+from ingestion.streaming import open_csv_text
 
 # Specific Dataset Slug
 SLUG = "public-accounts-ministry-statements-and-schedules"
+PACKAGE_SHOW_URL = f"https://data.ontario.ca/api/3/action/package_show?id={SLUG}"
 
-MAPPING = {
-    "Frontline": [
-        "Operation of Hospitals", "Home Care", "Community Mental Health", "Payments for Ambulance and Related Emergency Services",
-        "Municipal Ambulance", "Specialty Psychiatric Hospitals", "Community Support Services", "Community Health Centres",
-        "Midwifery Services", "Addiction Programs", "Home Care and Community Services",
-        "Long-Term Care Homes (Operation)", "Long-Term Care Homes - Operation"
-    ],
-    "Operations & Agency": [
-        "Cancer Treatment Services", "Clinical Education", "Official Local Health Agencies", "Canadian Blood Services",
-        "Renal Services", "Assistive Devices and Supplies Program", "Digital Health",
-        "Ontario Agency for Health Protection and Promotion", "Organ and Tissue Donation and Transplantation Services",
-        "Independent Health Facilities", "Quality Health Initiatives", "Long-Term Care Capital", "Long-Term Care - Capital"
-    ],
-    "Administrative & Opaque": [
-        "Regional Coordination Operations Support", "Health Infrastructure Renewal Fund", "Ministry Administration Program",
-        "Information Systems Program", "Provincial Programs and Stewardship Program", "Health Policy and Research Program",
-        "Digital Health and Information Management Program", "Ministry of Long-Term Care Administration"
-    ]
+# Dataset name used in the ingest manifest
+DATASET = "budget_breakdown"
+
+# Health budget targets per fiscal year (Billion $); "General Operations &
+# Other" absorbs the difference between the categorized lines and the target
+TARGETS = {
+    2014: 50.8, 2015: 52.2, 2016: 53.8, 2017: 57.1, 2018: 61.3,
+    2019: 63.7, 2020: 71.2, 2021: 75.3, 2022: 78.5, 2023: 85.5, 2024: 88.1
 }
 
-async def fetch_urls():
+async def fetch_urls(client, package_url=PACKAGE_SHOW_URL):
     urls = {}
     print(f"🔍 Fetching resources for {SLUG}...")
     try:
-        resp = requests.get(f"https://data.ontario.ca/api/3/action/package_show?id={SLUG}", verify=False).json()
+        with stage("discovery") as span:
+            response = await client.get(package_url)
+            resp = response.json()
+            span.add(bytes=len(response.content))
         if not resp.get('success'): return urls
         
         for res in resp['result']['resources']:
@@ -40,7 +41,6 @@ async def fetch_urls():
             if 'spending' in name or 'expense' in name:
                 if 'csv' in res['format'].lower() and 'en' in name:
                     # Extract year from name like "Spending: 2023-24"
-                    import re
                     match = re.search(r'(\d{4})-\d{2}', name)
                     if match:
                         year = int(match.group(1))
@@ -50,91 +50,149 @@ async def fetch_urls():
         print(e)
     return urls
 
-async def ingest_year(session, year, url):
-    print(f"🚀 Processing {year}...")
-    try:
-        r = requests.get(url, verify=False)
-        df = None
-        for enc in ['utf-8-sig', 'latin1', 'cp1252']:
-            try:
-                df = pd.read_csv(io.BytesIO(r.content), encoding=enc)
-                break
-            except: continue
-        
-        if df is None: return
-        df.columns = [str(c).strip() for c in df.columns]
-        
-        ministry_col = next((c for c in df.columns if 'Ministry' in c), None)
-        amt_col = next((c for c in df.columns if 'Amount' in c or 'Total' in c or 'Expense' in c), None)
-        
-        # Filter for Health / LTC
-        health_mask = (df[ministry_col].str.contains('Health', na=False)) | \
-                      (df[ministry_col].str.contains('Long-Term Care', na=False))
-        health_df = df[health_mask].copy()
-        
-        def clean_amt(val):
-            if pd.isna(val): return 0.0
-            s = str(val).replace('$', '').replace(',', '').replace('(', '-').replace(')', '').replace(' ', '')
-            try: return float(s)
-            except: return 0.0
-        
-        health_df[amt_col] = health_df[amt_col].apply(clean_amt)
-        
-        rows = []
-        processed_indices = set()
-        search_cols = [c for c in df.columns if any(p in c for p in ['Account', 'Program', 'Activity', 'Item', 'Detail'])]
-        
-        for category, keywords in MAPPING.items():
-            mask = pd.Series([False] * len(health_df), index=health_df.index)
-            for col in search_cols:
-                mask |= health_df[col].isin(keywords)
-            
-            matches = health_df[mask]
-            if not matches.empty:
-                total_amt = matches[amt_col].sum()
-                items = ", ".join(matches[search_cols[0]].unique()[:3])
-                rows.append(BudgetBreakdown(
-                    year=year,
-                    category=category,
-                    amount_billions=round(total_amt / 1_000_000_000, 3),
-                    description=f"Spending on {items}..."
-                ))
-                processed_indices.update(matches.index)
-        
+async def parse_year(download):
+    """
+    Turns a downloaded spending CSV into the year's cleaned health lines.
+    The pandas work runs in a worker thread so downloads keep flowing.
+    """
+    print(f"🚀 Processing {download.key}...")
+    yield await asyncio.to_thread(health_lines, download.key, download.path)
+
+def health_lines(year, path):
+    """
+    The Health / Long-Term Care lines of a spending CSV, with the year, the
+    cleaned amount and the line's description under common names ('year',
+    'amount', 'item') next to its search columns, so the files of every
+    year can be categorized together. Returns (lines, search columns).
+    """
+    with open(path, 'rb') as f:
+        # Encoding sniffed while reading instead of parsing once per candidate
+        with stage("parse", year) as span:
+            df = pd.read_csv(open_csv_text(f, year))
+            span.add(rows=len(df))
+    df.columns = [str(c).strip() for c in df.columns]
+    
+    ministry_col = next((c for c in df.columns if 'Ministry' in c), None)
+    amt_col = next((c for c in df.columns if 'Amount' in c or 'Total' in c or 'Expense' in c), None)
+    
+    # Filter for Health / LTC
+    health_mask = (df[ministry_col].str.contains('Health', na=False)) | \
+                  (df[ministry_col].str.contains('Long-Term Care', na=False))
+    
+    health_df = df[health_mask].copy()
+    
+    # "(1,234)" is a negative amount in the Public Accounts files
+    with stage("clean", year) as span:
+        health_df[amt_col] = clean_amounts(health_df[amt_col], negative_parentheses=True)
+        span.add(rows=len(health_df))
+    
+    search_cols = [c for c in df.columns if any(p in c for p in ['Account', 'Program', 'Activity', 'Item', 'Detail'])]
+    lines = health_df[search_cols].assign(year=year, amount=health_df[amt_col], item=health_df[search_cols[0]])
+    return lines, search_cols
+
+def breakdown_rows(health_df, amt_col, search_cols, years=None, describe_col=None):
+    """
+    BudgetBreakdown rows for every fiscal year in a frame of health spending
+    lines with a 'year' column: one row per matched category and a
+    "General Operations & Other" row adjusted to the year's target.
+    All years are categorized and totalled in one grouped computation, so a
+    multi-year backfill can pass the concatenated files at once.
+    """
+    totals = category_totals(health_df, amt_col, search_cols, describe_col=describe_col, items=3, year_col='year')
+    if years is None:
+        years = sorted(health_df['year'].unique())
+
+    rows = []
+    for year in years:
+        year = int(year)
+        year_totals = totals[totals['year'] == year]
+        categorized = year_totals[year_totals['category'] != OTHER]
+        year_rows = [
+            BudgetBreakdown(
+                year=year,
+                category=r.category,
+                amount_billions=round(r.amount / 1_000_000_000, 3),
+                description=f"Spending on {', '.join(r.items)}..."
+            )
+            for r in categorized.itertuples()
+        ]
+
         # Uncategorized
-        others = health_df[~health_df.index.isin(processed_indices)]
-        total_others = others[amt_col].sum()
-        
-        targets = {
-            2014: 50.8, 2015: 52.2, 2016: 53.8, 2017: 57.1, 2018: 61.3,
-            2019: 63.7, 2020: 71.2, 2021: 75.3, 2022: 78.5, 2023: 85.5, 2024: 88.1
-        }
-        target = targets.get(year, sum(r.amount_billions for r in rows) + (total_others / 1e9))
-        
-        current_sum = sum(r.amount_billions for r in rows) + (total_others / 1_000_000_000)
+        total_others = year_totals.loc[year_totals['category'] == OTHER, 'amount'].sum()
+        target = TARGETS.get(year, sum(r.amount_billions for r in year_rows) + (total_others / 1e9))
+
+        current_sum = sum(r.amount_billions for r in year_rows) + (total_others / 1_000_000_000)
         adjustment = target - current_sum
-        
-        rows.append(BudgetBreakdown(
+
+        year_rows.append(BudgetBreakdown(
             year=year,
-            category="General Operations & Other",
+            category=OTHER,
             amount_billions=round((total_others / 1_000_000_000) + adjustment, 3),
             description="General Operations, Capital, and Provincial wide health flows."
         ))
-        
-        await session.execute(delete(BudgetBreakdown).where(BudgetBreakdown.year == year))
-        session.add_all(rows)
-        await session.commit()
-        print(f"   ✅ Done for {year}. Total: ${target}B")
-    except Exception as e:
-        print(f"   ❌ Error {year}: {e}")
+        rows += year_rows
+    return rows
 
-async def main():
-    await init_db()
-    urls = await fetch_urls()
+async def write_year(download, rows):
+    year = download.key
     async with AsyncSessionLocal() as session:
-        for year, url in sorted(urls.items()):
-            if year >= 2014:
-                await ingest_year(session, year, url)
+        with stage("insert", year) as span:
+            await session.execute(delete(BudgetBreakdown).where(BudgetBreakdown.year == year))
+            session.add_all(rows)
+            await record_ingest(session, DATASET, year, download.url, download.sha256, len(rows))
+            # Flushed here so the insert is timed apart from the commit
+            await session.flush()
+            span.add(rows=len(rows))
+        with stage("commit", year):
+            await session.commit()
+    bump_generation()
+    total = sum(r.amount_billions for r in rows)
+    print(f"   ✅ Done for {year}. Total: ${round(total, 1)}B")
+
+async def write_years(parsed):
+    """
+    Categorizes the health lines of every parsed year in one breakdown_rows
+    call, then replaces each year's BudgetBreakdown rows.
+    parsed: {year: (download, (health lines, search columns))}
+    """
+    if not parsed:
+        return
+    lines = pd.concat([health_df for _, (health_df, _) in parsed.values()], ignore_index=True)
+    # Every year's search columns; a column missing from a year's file is empty there
+    search_cols = list(dict.fromkeys(c for _, (_, cols) in parsed.values() for c in cols))
+    with stage("classify") as span:
+        rows = breakdown_rows(lines, 'amount', search_cols, years=sorted(parsed), describe_col='item')
+        span.add(rows=len(lines))
+    for year, (download, _) in sorted(parsed.items()):
+        try:
+            await write_year(download, [r for r in rows if r.year == year])
+        except Exception as e:
+            print(f"   ❌ Error processing {year}: {e}")
+
+@instrumented(DATASET)
+async def main(package_url=PACKAGE_SHOW_URL, client=None, cache=None, force=False,
+               download_workers=DOWNLOAD_WORKERS, parse_workers=PARSE_WORKERS):
+    await init_db()
+    own_client = client is None
+    if own_client:
+        client = make_client()
+    try:
+        urls = await fetch_urls(client, package_url)
+        jobs = [(year, url) for year, url in sorted(urls.items()) if year >= 2014]
+        cache = cache or DownloadCache()
+        parsed = {}
+
+        async def collect(download, lines):
+            async for year_lines in lines:
+                parsed[download.key] = (download, year_lines)
+
+        await run_pipeline(jobs, parse=parse_year, write=collect, client=client,
+                           fetch=cache.fetch, skip=None if force else skip_unchanged(DATASET),
+                           download_workers=download_workers, parse_workers=parse_workers)
+        await write_years(parsed)
+    finally:
+        if own_client:
+            await client.aclose()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,256 @@
+import contextvars
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Per-stage instrumentation for the ingestors.
+# Each ingest runs inside instrumented_run(dataset); the code of every stage
+# is wrapped in `with stage(name, year) as span:` and reports rows / bytes
+# with span.add(). Timings are aggregated per (stage, year) in memory and
+# written when the run ends as a JSON-lines report
+# (<INGEST_REPORT_DIR>/<dataset>-<time>.jsonl) plus a summary table.
+# INGEST_REPORT=off turns every stage() into a shared no-op context manager.
+INGEST_REPORT = os.environ.get("INGEST_REPORT", "on").lower()
+REPORT_DIR = os.environ.get("INGEST_REPORT_DIR", "./ingest_reports")
+
+# Stage names in pipeline order, which is also the report order.
+# decode is the byte-to-text decoding, which runs as pandas reads the
+# file and so is also counted in parse.
+STAGES = ("discovery", "download", "decode", "parse", "clean", "classify", "insert", "rollup", "commit")
+
+if INGEST_REPORT not in ("on", "off"):
+    raise ValueError(f"INGEST_REPORT must be 'on' or 'off', not {INGEST_REPORT!r}")
+
+def peak_rss_bytes() -> int:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, rows=0, bytes=0):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class NullRun:
+    """
+    Run that records nothing, used when instrumentation is off or outside
+    instrumented_run().
+    """
+    enabled = False
+
+    def stage(self, name, key=None):
+        return _NULL_SPAN
+
+NULL_RUN = NullRun()
+
+class Span:
+    """
+    One timed pass through a stage, recorded into its run on exit (also
+    when the stage raises, counted as an error).
+    """
+    __slots__ = ("run", "name", "key", "rows", "bytes", "started")
+
+    def __init__(self, run, name, key):
+        self.run = run
+        self.name = name
+        self.key = key
+        self.rows = 0
+        self.bytes = 0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.run.record(self.name, self.key, self.started, time.perf_counter(),
+                        self.rows, self.bytes, error=exc_type is not None)
+        return False
+
+    def add(self, rows=0, bytes=0):
+        self.rows += rows
+        self.bytes += bytes
+
+class IngestRun:
+    """
+    Stage timings of one ingest run, per (stage, year): calls, time spent
+    in the stage, wall time from its first start to its last end, rows,
+    bytes, errors and the process peak RSS when the stage last ended.
+    Spans can end on any thread (parsing runs in worker threads).
+    """
+    enabled = True
+
+    def __init__(self, dataset: str, report_dir: str = REPORT_DIR):
+        self.dataset = dataset
+        self.report_dir = report_dir
+        self.started_at = datetime.now(timezone.utc)
+        self.run_id = f"{dataset}-{self.started_at.strftime('%Y%m%dT%H%M%S%fZ')}"
+        self.started = time.perf_counter()
+        self.stats = {}  # (stage, key) -> [calls, seconds, first start, last end, rows, bytes, errors, peak rss]
+        self._lock = threading.Lock()
+
+    def stage(self, name, key=None) -> Span:
+        return Span(self, name, key)
+
+    def record(self, name, key, started, ended, rows=0, bytes=0, error=False):
+        peak = peak_rss_bytes()
+        with self._lock:
+            s = self.stats.get((name, key))
+            if s is None:
+                self.stats[(name, key)] = [1, ended - started, started, ended, rows, bytes, int(error), peak]
+                return
+            s[0] += 1
+            s[1] += ended - started
+            s[2] = min(s[2], started)
+            s[3] = max(s[3], ended)
+            s[4] += rows
+            s[5] += bytes
+            s[6] += int(error)
+            s[7] = max(s[7], peak)
+
+    def _order(self, item):
+        (name, key), _ = item
+        rank = STAGES.index(name) if name in STAGES else len(STAGES)
+        return (key is not None, key if key is not None else 0, rank, name)
+
+    def records(self) -> list:
+        """
+        The report lines: one per (stage, year), then one for the whole run.
+        """
+        with self._lock:
+            stats = sorted(self.stats.items(), key=self._order)
+        lines = []
+        for (name, key), (calls, seconds, first, last, rows, size, errors, peak) in stats:
+            lines.append({
+                "type": "stage", "run": self.run_id, "dataset": self.dataset, "stage": name, "year": key,
+                "calls": calls, "seconds": round(seconds, 6), "wall_seconds": round(last - first, 6),
+                "rows": rows, "bytes": size,
+                "rows_per_sec": round(rows / seconds, 1) if rows and seconds else None,
+                "errors": errors, "peak_rss_bytes": peak,
+            })
+        parsed = sum(line["rows"] for line in lines if line["stage"] == "parse")
+        seconds = time.perf_counter() - self.started
+        lines.append({
+            "type": "run", "run": self.run_id, "dataset": self.dataset,
+            "started_at": self.started_at.isoformat(timespec='seconds'),
+            "seconds": round(seconds, 6),
+            "years": sorted({line["year"] for line in lines if line["year"] is not None}),
+            "rows": parsed, "rows_per_sec": round(parsed / seconds, 1) if seconds else None,
+            "rows_inserted": sum(line["rows"] for line in lines if line["stage"] == "insert"),
+            "bytes": sum(line["bytes"] for line in lines if line["stage"] == "download"),
+            "errors": sum(line["errors"] for line in lines),
+            "peak_rss_bytes": peak_rss_bytes(),
+        })
+        return lines
+
+    def write_report(self, lines=None) -> str:
+        os.makedirs(self.report_dir, exist_ok=True)
+        path = os.path.join(self.report_dir, f"{self.run_id}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for line in lines or self.records():
+                f.write(json.dumps(line) + "\n")
+        return path
+
+    def summary_table(self, lines=None) -> str:
+        """
+        Seconds spent per stage for every year, with the year's source rows,
+        wall time, rows/sec, downloaded MB and peak RSS.
+        """
+        lines = lines or self.records()
+        stage_lines = [line for line in lines if line["type"] == "stage"]
+        stages = [name for name in STAGES if any(line["stage"] == name for line in stage_lines)]
+        by_year = {}
+        for line in stage_lines:
+            by_year.setdefault(line["year"], {})[line["stage"]] = line
+
+        header = f"   {'year':>6}" + "".join(f"{name:>10}" for name in stages) + \
+                 f"{'rows':>11}{'wall s':>9}{'rows/s':>10}{'MB':>8}{'RSS MB':>8}"
+        table = [header]
+        for year, year_stages in by_year.items():
+            cells = "".join(f"{year_stages[name]['seconds']:>10.2f}" if name in year_stages else f"{'':>10}"
+                            for name in stages)
+            rows = year_stages["parse"]["rows"] if "parse" in year_stages else 0
+            wall = _year_wall(self.stats, year)
+            size = year_stages["download"]["bytes"] if "download" in year_stages else \
+                   max(line["bytes"] for line in year_stages.values())
+            peak = max(line["peak_rss_bytes"] for line in year_stages.values())
+            rate = f"{rows / wall:>10,.0f}" if rows and wall else f"{'':>10}"
+            table.append(f"   {'-' if year is None else year:>6}{cells}{rows:>11,}{wall:>9.2f}{rate}"
+                         f"{size / 2**20:>8.1f}{peak / 2**20:>8.0f}")
+        run = lines[-1]
+        totals = "".join(f"{sum(line['seconds'] for line in stage_lines if line['stage'] == name):>10.2f}"
+                         for name in stages)
+        table.append(f"   {'total':>6}{totals}{run['rows']:>11,}{run['seconds']:>9.2f}"
+                     f"{run['rows_per_sec'] or 0:>10,.0f}{run['bytes'] / 2**20:>8.1f}{run['peak_rss_bytes'] / 2**20:>8.0f}")
+        return "\n".join(table)
+
+def _year_wall(stats, year) -> float:
+    # From the first stage start to the last stage end for that year
+    spans = [(s[2], s[3]) for (_, key), s in stats.items() if key == year]
+    return max(end for _, end in spans) - min(start for start, _ in spans)
+
+_current = contextvars.ContextVar("ingest_run", default=NULL_RUN)
+
+def current_run():
+    return _current.get()
+
+def stage(name, key=None):
+    """
+    Times one pass through a stage of the current run:
+        with stage("parse", year) as span:
+            ...
+            span.add(rows=len(chunk))
+    A no-op outside instrumented_run() or with INGEST_REPORT=off.
+    """
+    return _current.get().stage(name, key)
+
+@contextmanager
+def instrumented_run(dataset: str, report_dir: str = None):
+    """
+    Makes a new IngestRun current for the block (and the tasks and worker
+    threads it starts), then writes its report and prints the summary.
+    Inside an already running ingest, the outer run keeps recording.
+    """
+    outer = _current.get()
+    if INGEST_REPORT == "off" or outer.enabled:
+        yield outer
+        return
+    run = IngestRun(dataset, report_dir or REPORT_DIR)
+    token = _current.set(run)
+    try:
+        yield run
+    finally:
+        _current.reset(token)
+        if run.stats:
+            lines = run.records()
+            try:
+                path = run.write_report(lines)
+            except OSError as e:
+                path = None
+                print(f"   ⚠️  Could not write the ingest report: {e}")
+            print(f"\n📊 Ingest report for {dataset}" + (f" ({path})" if path else "") + ":")
+            print(run.summary_table(lines))
+
+def instrumented(dataset: str):
+    """
+    Decorator running an async ingest entry point inside instrumented_run(dataset).
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with instrumented_run(dataset):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorate
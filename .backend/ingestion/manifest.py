@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+from sqlalchemy import select, delete, insert
+from ingestion.database import ReaderSessionLocal, IngestManifest
+
+# Records which source file (by content hash) produced each year's rows, so a
+# year whose source bytes have not changed can be skipped on the next run.
+
+async def ingested_hash(dataset: str, year: int):
+    """
+    Returns the content hash recorded for the last ingest of (dataset, year), or None.
+    """
+    async with ReaderSessionLocal() as session:
+        result = await session.execute(
+            select(IngestManifest.content_hash)
+            .where(IngestManifest.dataset == dataset)
+            .where(IngestManifest.year == year)
+        )
+        return result.scalars().first()
+
+async def record_ingest(conn, dataset: str, year: int, source_url: str, content_hash: str, row_count: int):
+    """
+    Replaces the manifest entry for (dataset, year). conn is the AsyncConnection
+    or AsyncSession that wrote the rows, so the entry commits with them.
+    """
+    await conn.execute(
+        delete(IngestManifest)
+        .where(IngestManifest.dataset == dataset)
+        .where(IngestManifest.year == year)
+    )
+    await conn.execute(insert(IngestManifest).values(
+        dataset=dataset,
+        year=year,
+        source_url=source_url,
+        content_hash=content_hash,
+        row_count=row_count,
+        ingested_at=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    ))
+
+def skip_unchanged(dataset: str):
+    """
+    Builds a run_pipeline skip hook that drops downloads whose bytes match
+    the last ingest of that year.
+    """
+    async def skip(download):
+        if await ingested_hash(dataset, download.key) == download.sha256:
+            print(f"   ⏭️  {download.key} unchanged since last ingest. Skipping.")
+            return True
+        return False
+    return skip
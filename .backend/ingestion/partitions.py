@@ -0,0 +1,169 @@
+import re
+from sqlalchemy import Table, Column, MetaData, text
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import registry
+from sqlalchemy.schema import CreateTable, CreateIndex
+from ingestion.database import SunshineEntry, SUNSHINE_NAMED_VIEW
+
+# Year-partitioned sunshine_list storage.
+# Each year lives in its own table (sunshine_list_2023, ...) and
+# `sunshine_list` is a UNION ALL view over them, which is what SunshineEntry
+# and every read query use. Re-ingesting a year loads a staging table and
+# swaps it in (drop old partition, rename, index) inside one transaction, so
+# the cost is that year's rows only and readers never see a partial year.
+
+VIEW_NAME = "sunshine_list"
+PARTITION_PREFIX = "sunshine_list_"
+_PARTITION_RE = re.compile(r"^sunshine_list_(\d{4})$")
+
+_metadata = MetaData()
+_registry = registry()
+_entities = {}
+
+def partition_name(year: int, staging: bool = False) -> str:
+    return f"{PARTITION_PREFIX}{int(year)}" + ("_staging" if staging else "")
+
+def partition_table(name: str) -> Table:
+    """
+    Table object for a partition (or staging) table: the SunshineEntry columns
+    with their indexes, named after the partition.
+    """
+    if name not in _metadata.tables:
+        Table(name, _metadata, *(
+            # The primary key is indexed already; foreign keys are not enforced
+            Column(c.name, c.type, primary_key=c.primary_key, index=bool(c.index) and not c.primary_key)
+            for c in SunshineEntry.__table__.columns
+        ))
+    return _metadata.tables[name]
+
+def partition_entity(name: str):
+    """
+    ORM class mapped onto a partition table, for the add_all ingest path.
+    """
+    if name not in _entities:
+        entity = type(f"SunshinePartition_{name}", (), {})
+        _registry.map_imperatively(entity, partition_table(name))
+        _entities[name] = entity
+    return _entities[name]
+
+def _ddl(element) -> str:
+    return str(element.compile(dialect=sqlite.dialect()))
+
+def create_table_sql(name: str, indexes: bool = True) -> list:
+    table = partition_table(name)
+    statements = [_ddl(CreateTable(table))]
+    if indexes:
+        statements += create_index_sql(name)
+    return statements
+
+def create_index_sql(name: str) -> list:
+    return [_ddl(CreateIndex(index)) for index in sorted(partition_table(name).indexes, key=lambda i: i.name)]
+
+def view_sql(years) -> list:
+    """
+    Statements that (re)create the sunshine_list view over the given
+    partitions, and the named compatibility view on top of it.
+    """
+    columns = ", ".join(c.name for c in SunshineEntry.__table__.columns)
+    if years:
+        body = "\nUNION ALL\n".join(f"SELECT {columns} FROM {partition_name(year)}" for year in sorted(years))
+    else:
+        # No partitions yet: an empty view with the right columns
+        body = "SELECT " + ", ".join(f"NULL AS {c.name}" for c in SunshineEntry.__table__.columns) + " WHERE 0"
+    return [
+        "DROP VIEW IF EXISTS sunshine_list_named",
+        f"DROP VIEW IF EXISTS {VIEW_NAME}",
+        f"CREATE VIEW {VIEW_NAME} AS\n{body}",
+        SUNSHINE_NAMED_VIEW,
+    ]
+
+PARTITION_LIST_SQL = (
+    "SELECT name FROM sqlite_master WHERE type = 'table' "
+    "AND name GLOB 'sunshine_list_[0-9][0-9][0-9][0-9]'"
+)
+
+def years_from_names(names) -> list:
+    return sorted(int(m.group(1)) for m in (_PARTITION_RE.match(n) for n in names) if m)
+
+async def _run(conn, statements):
+    # Works for both AsyncConnection and AsyncSession
+    for statement in statements:
+        await conn.execute(text(statement))
+
+async def partition_years(conn) -> list:
+    """
+    Years that have a partition, ascending. conn is an AsyncConnection or AsyncSession.
+    """
+    result = await conn.execute(text(PARTITION_LIST_SQL))
+    return years_from_names(result.scalars().all())
+
+async def rebuild_views(conn):
+    await _run(conn, view_sql(await partition_years(conn)))
+
+async def ensure_partition(conn, year: int) -> Table:
+    """
+    Returns the year's partition table, creating it (and adding it to the
+    view) if the year is new.
+    """
+    name = partition_name(year)
+    if year not in await partition_years(conn):
+        await _run(conn, create_table_sql(name))
+        await rebuild_views(conn)
+    return partition_table(name)
+
+async def create_staging(conn, year: int) -> Table:
+    """
+    Creates an empty, unindexed staging table for a replacement of the year.
+    Indexes are built once the load is complete, in swap_in_staging.
+    """
+    name = partition_name(year, staging=True)
+    await _run(conn, [f"DROP TABLE IF EXISTS {name}"] + create_table_sql(name, indexes=False))
+    return partition_table(name)
+
+async def swap_in_staging(conn, year: int):
+    """
+    Replaces the year's partition with its staging table. Runs inside the
+    caller's transaction, so readers switch from the old year to the new
+    one at commit.
+    """
+    name = partition_name(year)
+    years = set(await partition_years(conn)) | {year}
+    # Views are dropped first: SQLite re-checks views on ALTER TABLE RENAME
+    await _run(conn, [
+        "DROP VIEW IF EXISTS sunshine_list_named",
+        f"DROP VIEW IF EXISTS {VIEW_NAME}",
+        f"DROP TABLE IF EXISTS {name}",
+        f"ALTER TABLE {partition_name(year, staging=True)} RENAME TO {name}",
+    ] + create_index_sql(name) + view_sql(years))
+
+def partition_sunshine_list(sync_conn):
+    """
+    Splits an existing single sunshine_list table into per-year partitions
+    and replaces it with the view. Used by init_db; no-op once partitioned.
+    """
+    is_table = sync_conn.exec_driver_sql(
+        f"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = '{VIEW_NAME}'"
+    ).first()
+    if not is_table:
+        return False
+
+    columns = ", ".join(c.name for c in SunshineEntry.__table__.columns)
+    years = [row[0] for row in sync_conn.exec_driver_sql(
+        f"SELECT DISTINCT year FROM {VIEW_NAME} WHERE year IS NOT NULL"
+    ).all()]
+    for year in years:
+        name = partition_name(year)
+        for statement in create_table_sql(name, indexes=False):
+            sync_conn.exec_driver_sql(statement)
+        sync_conn.exec_driver_sql(f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {VIEW_NAME} WHERE year = ?", (year,))
+        for statement in create_index_sql(name):
+            sync_conn.exec_driver_sql(statement)
+
+    sync_conn.exec_driver_sql("DROP VIEW IF EXISTS sunshine_list_named")
+    sync_conn.exec_driver_sql(f"DROP TABLE {VIEW_NAME}")
+    return True
+
+def create_views(sync_conn):
+    names = sync_conn.exec_driver_sql(PARTITION_LIST_SQL).scalars().all()
+    for statement in view_sql(years_from_names(names)):
+        sync_conn.exec_driver_sql(statement)
@@ -0,0 +1,147 @@
+import asyncio
+import httpx
+from ingestion.download_cache import download_to_temp
+from ingestion.instrumentation import stage
+
+# Default stage sizing: several downloads in flight, a couple of parsers and
+# always exactly one writer (SQLite allows a single write transaction).
+DOWNLOAD_WORKERS = 4
+PARSE_WORKERS = 2
+QUEUE_SIZE = 4  # items buffered between stages (and chunks per year in flight)
+
+_END = object()
+
+class _StageFailed:
+    def __init__(self, error):
+        self.error = error
+
+def make_client(**kwargs) -> httpx.AsyncClient:
+    """
+    Creates the shared AsyncClient used by the ingestors. Connections are
+    pooled and kept alive across downloads from the same host.
+    """
+    kwargs.setdefault('limits', httpx.Limits(max_connections=DOWNLOAD_WORKERS * 2,
+                                             max_keepalive_connections=DOWNLOAD_WORKERS))
+    kwargs.setdefault('timeout', httpx.Timeout(120.0, connect=15.0))
+    kwargs.setdefault('verify', False)
+    kwargs.setdefault('follow_redirects', True)
+    return httpx.AsyncClient(**kwargs)
+
+async def run_pipeline(jobs, parse, write, client=None, fetch=download_to_temp, skip=None,
+                       download_workers=DOWNLOAD_WORKERS, parse_workers=PARSE_WORKERS,
+                       queue_size=QUEUE_SIZE):
+    """
+    Runs download -> parse -> write as concurrent stages connected by bounded
+    queues, so job N+1 downloads while job N parses and job N-1 is written.
+
+    jobs: iterable of (key, url), e.g. (year, csv_url).
+    fetch(client, key, url): returns a Download (defaults to a temp file;
+        pass DownloadCache.fetch to reuse cached files).
+    skip(download): optional coroutine; True drops the job before parsing,
+        e.g. when the same bytes were already ingested.
+    parse(download): async iterator of items parsed from the downloaded file.
+    write(download, items): coroutine consuming the async iterator of items.
+        Only one write runs at a time.
+
+    Returns {key: write result, 'skipped', or the exception that stopped that job}.
+    """
+    own_client = client is None
+    if own_client:
+        client = make_client()
+
+    download_q = asyncio.Queue()
+    parse_q = asyncio.Queue(maxsize=queue_size)
+    write_q = asyncio.Queue(maxsize=queue_size)
+    results = {}
+
+    for job in jobs:
+        download_q.put_nowait(job)
+
+    async def downloader():
+        while True:
+            try:
+                key, url = download_q.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                with stage("download", key) as span:
+                    download = await fetch(client, key, url)
+                    span.add(bytes=download.size)
+            except Exception as e:
+                print(f"   ❌ Download failed for {key}: {e}")
+                results[key] = e
+                continue
+            try:
+                skipped = skip is not None and await skip(download)
+            except Exception as e:
+                print(f"   ❌ Skip check failed for {key}: {e}")
+                download.release()
+                results[key] = e
+                continue
+            if skipped:
+                download.release()
+                results[key] = 'skipped'
+                continue
+            await parse_q.put(download)
+
+    async def parser():
+        while True:
+            download = await parse_q.get()
+            if download is None:
+                return
+            # Each job gets its own bounded channel; the writer drains them in order
+            channel = asyncio.Queue(maxsize=queue_size)
+            await write_q.put((download, channel))
+            try:
+                async for parsed in parse(download):
+                    await channel.put(parsed)
+                await channel.put(_END)
+            except Exception as e:
+                await channel.put(_StageFailed(e))
+            finally:
+                download.release()
+
+    async def writer():
+        while True:
+            item = await write_q.get()
+            if item is None:
+                return
+            download, channel = item
+            stream = _drain(channel)
+            try:
+                results[download.key] = await write(download, stream)
+            except Exception as e:
+                print(f"   ❌ Error processing {download.key}: {e}")
+                results[download.key] = e
+            finally:
+                # Unblock the parser if write() stopped before the end
+                try:
+                    async for _ in stream:
+                        pass
+                except Exception:
+                    pass
+
+    async def run_downloads():
+        await asyncio.gather(*(downloader() for _ in range(download_workers)))
+        for _ in range(parse_workers):
+            await parse_q.put(None)
+
+    async def run_parsers():
+        await asyncio.gather(*(parser() for _ in range(parse_workers)))
+        await write_q.put(None)
+
+    try:
+        await asyncio.gather(run_downloads(), run_parsers(), writer())
+    finally:
+        if own_client:
+            await client.aclose()
+    return results
+
+async def _drain(channel):
+    while True:
+        item = await channel.get()
+        if item is _END:
+            return
+        if isinstance(item, _StageFailed):
+            raise item.error
+        yield item
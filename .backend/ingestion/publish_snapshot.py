@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime, timezone
+from ingestion.database import database_path, init_db, stored_tables
+from ingestion.generation import current_generation
+from ingestion.serving import SNAPSHOT_DIR, POINTER_NAME, read_pointer
+from processing.columnar import ANALYTICS_ENGINE, cache_path, write_columns_cache
+
+# Publishes the serving snapshot the API reads (see ingestion/serving.py):
+# VACUUM INTO a fresh compacted file, ANALYZE it, verify it, make it
+# read-only and flip the CURRENT pointer. Run after ingestion and
+# classification. With ANALYTICS_ENGINE=columnar the snapshot's .npy column
+# cache (processing/columnar.py) is written before the flip.
+SNAPSHOT_KEEP = int(os.environ.get("SERVING_SNAPSHOT_KEEP", 3))
+
+REQUIRED_VIEWS = ["sunshine_list", "sunshine_list_named"]
+
+def vacuum_into(source: str, target: str):
+    """
+    Writes a compacted copy of source to target from one consistent read,
+    while the source stays available to its writer.
+    """
+    conn = sqlite3.connect(source)
+    try:
+        conn.execute("VACUUM INTO ?", (target,))
+    finally:
+        conn.close()
+
+def optimize_snapshot(path: str):
+    # Rollback journal (the file is never written again) and fresh planner statistics
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+def verify_snapshot(path: str) -> list:
+    """
+    Checks a snapshot before it is published. Returns a list of problems
+    (empty when the snapshot is good).
+    """
+    problems = []
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        result = conn.execute("PRAGMA quick_check").fetchone()[0]
+        if result != "ok":
+            problems.append(f"quick_check: {result}")
+
+        names = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+        for name in [table.name for table in stored_tables()] + REQUIRED_VIEWS:
+            if name not in names:
+                problems.append(f"missing table or view: {name}")
+        if "sqlite_stat1" not in names:
+            problems.append("missing ANALYZE statistics")
+
+        if not problems:
+            rows = conn.execute("SELECT COUNT(*) FROM sunshine_list").fetchone()[0]
+            rolled = conn.execute("SELECT COALESCE(SUM(row_count), 0) FROM admin_tax_rollup").fetchone()[0]
+            if rows != rolled:
+                problems.append(f"admin_tax_rollup covers {rolled} rows, sunshine_list has {rows}")
+    finally:
+        conn.close()
+    return problems
+
+def write_pointer(snapshot_dir: str, pointer: dict):
+    fd, tmp_path = tempfile.mkstemp(dir=snapshot_dir, prefix=".pointer-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(pointer, f, indent=2)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, os.path.join(snapshot_dir, POINTER_NAME))
+
+def prune_snapshots(snapshot_dir: str, keep: int, current: str):
+    snapshots = sorted(n for n in os.listdir(snapshot_dir) if n.startswith("healthcare-") and n.endswith(".db"))
+    for name in snapshots[:-keep] if keep > 0 else snapshots:
+        if name != current:
+            os.remove(os.path.join(snapshot_dir, name))
+            shutil.rmtree(cache_path(os.path.join(snapshot_dir, name)), ignore_errors=True)
+
+def publish_snapshot(source=None, snapshot_dir=SNAPSHOT_DIR, force=False, keep=SNAPSHOT_KEEP):
+    """
+    Builds, verifies and publishes a new serving snapshot of the database.
+    Skipped when the current snapshot already holds the current data
+    generation, unless force=True. Returns the new snapshot path or None.
+    """
+    source = source or database_path()
+    generation = current_generation()
+    pointer = read_pointer(snapshot_dir)
+    if (not force and pointer is not None and pointer.get("source_generation") == generation
+            and os.path.exists(os.path.join(snapshot_dir, pointer["file"]))):
+        print(f"⏭️  Serving snapshot {pointer['file']} is up to date. Skipping.")
+        return None
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    published_at = datetime.now(timezone.utc)
+    name = f"healthcare-{published_at.strftime('%Y%m%dT%H%M%S%fZ')}.db"
+    tmp_path = os.path.join(snapshot_dir, f".{name}.tmp")
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    print(f"📸 Building serving snapshot {name}...")
+    try:
+        vacuum_into(source, tmp_path)
+        optimize_snapshot(tmp_path)
+        problems = verify_snapshot(tmp_path)
+        if problems:
+            raise RuntimeError(f"Snapshot verification failed: {'; '.join(problems)}")
+        os.chmod(tmp_path, 0o444)
+        path = os.path.join(snapshot_dir, name)
+        if ANALYTICS_ENGINE == "columnar":
+            write_columns_cache(tmp_path, cache_path(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        shutil.rmtree(cache_path(os.path.join(snapshot_dir, name)), ignore_errors=True)
+        raise
+
+    write_pointer(snapshot_dir, {
+        "file": name,
+        "source_generation": generation,
+        "published_at": published_at.isoformat(timespec='seconds'),
+        "size_bytes": os.path.getsize(path),
+    })
+    prune_snapshots(snapshot_dir, keep, name)
+    print(f"✅ Published {name} ({os.path.getsize(path) / 2**20:.1f} MB).")
+    return path
+
+async def main(force=False):
+    await init_db()
+    return await asyncio.to_thread(publish_snapshot, force=force)
+
+if __name__ == "__main__":
+    asyncio.run(main())
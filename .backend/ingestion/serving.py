@@ -0,0 +1,83 @@
+import asyncio
+import json
+import os
+from sqlalchemy.ext.asyncio import AsyncSession
+from ingestion.database import create_db_engine, database_path, reader_engine
+from ingestion.generation import current_generation
+
+# Serving snapshots: the API reads a compacted, read-only copy of the
+# database published by ingestion/publish_snapshot.py, never the file the
+# ingestors are writing. SNAPSHOT_DIR/CURRENT names the snapshot to serve;
+# publishing a new one flips that pointer and the API follows it on its next
+# session, without a restart. With no pointer the API reads the live
+# database through the read-only pool.
+SNAPSHOT_DIR = os.environ.get("SERVING_SNAPSHOT_DIR", "./snapshots")
+POINTER_NAME = "CURRENT"
+
+_pointer_seen = (None, None)  # (pointer file identity, pointer contents)
+_serving = {"path": None, "engine": None}
+
+def read_pointer(snapshot_dir=SNAPSHOT_DIR):
+    """
+    Returns the CURRENT pointer as a dict ({"file", "source_generation",
+    "published_at", ...}), or None if nothing has been published.
+    Only re-read when the pointer file's stat() identity changes.
+    """
+    global _pointer_seen
+    path = os.path.join(snapshot_dir, POINTER_NAME)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    identity = (path, st.st_ino, st.st_mtime_ns, st.st_size)
+    if _pointer_seen[0] != identity:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                pointer = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        _pointer_seen = (identity, pointer)
+    return _pointer_seen[1]
+
+def current_snapshot_path(snapshot_dir=SNAPSHOT_DIR):
+    pointer = read_pointer(snapshot_dir)
+    if pointer is None:
+        return None
+    return os.path.abspath(os.path.join(snapshot_dir, pointer["file"]))
+
+def serving_path():
+    # The file the API reads: the published snapshot, or the live database
+    return current_snapshot_path() or database_path()
+
+def serving_engine():
+    """
+    Engine for the snapshot currently published, or the live read-only pool.
+    When the pointer moves, the previous snapshot's pool is disposed; sessions
+    still using it finish on their own connections.
+    """
+    path = current_snapshot_path()
+    if path is None:
+        return reader_engine
+    if _serving["path"] != path:
+        previous = _serving["engine"]
+        _serving["path"] = path
+        _serving["engine"] = create_db_engine("snapshot", url=f"sqlite+aiosqlite:///{path}")
+        if previous is not None:
+            try:
+                asyncio.get_running_loop().create_task(previous.dispose())
+            except RuntimeError:
+                pass
+    return _serving["engine"]
+
+def ServingSessionLocal() -> AsyncSession:
+    """
+    New AsyncSession on the serving database (use as `async with`).
+    """
+    return AsyncSession(serving_engine(), expire_on_commit=False)
+
+def serving_generation():
+    """
+    Identifies the data the API is serving: the data generation plus the
+    published snapshot, so cached results turn over when either moves.
+    """
+    return (current_generation(), current_snapshot_path())
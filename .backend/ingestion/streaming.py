@@ -0,0 +1,117 @@
+import codecs
+import io
+import re
+from ingestion.instrumentation import stage
+
+# How much non-ASCII data is inspected before choosing an encoding
+SNIFF_BYTES = 64 * 1024
+
+NON_ASCII = re.compile(rb'[\x80-\xff]')
+
+def _latin1_fallback(error):
+    # A byte that is not UTF-8 in a file sniffed as UTF-8 is read as latin1,
+    # the fallback a whole latin1 file gets, instead of becoming U+FFFD
+    return error.object[error.start:error.end].decode('latin1'), error.end
+
+codecs.register_error('latin1_fallback', _latin1_fallback)
+
+def sniff_encoding(prefix: bytes):
+    """
+    Picks a CSV encoding from the first bytes of a file instead of parsing
+    the whole file once per candidate encoding.
+    Returns None if the prefix is pure ASCII (every candidate reads it the
+    same, so it says nothing), 'utf-8-sig' if it is valid UTF-8 (a trailing
+    multi-byte sequence cut off by the prefix boundary is allowed),
+    otherwise 'latin1'.
+    """
+    if prefix.isascii():
+        return None
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        decoder.decode(prefix, final=False)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        # latin1 maps every byte, so it was always the effective fallback
+        return 'latin1'
+
+class DecodingReader(io.TextIOBase):
+    """
+    Read-only text stream over a binary stream (e.g. an HTTP response body)
+    that picks the encoding where it matters: the data is passed through
+    as ASCII until the first non-ASCII byte, and the encoding is sniffed
+    from the SNIFF_BYTES starting there. In a file read as UTF-8, bytes
+    that turn out not to be UTF-8 are read as latin1; nothing is replaced.
+    `encoding` is None until decided ('ascii' for a pure ASCII file).
+    Time spent decoding counts as the "decode" stage of `key`.
+    """
+
+    def __init__(self, raw, sniff_bytes=SNIFF_BYTES, key=None):
+        self._raw = raw
+        self._sniff_bytes = sniff_bytes
+        self._key = key
+        self._decoder = None
+        self._encoding = None
+        self._started = False
+        self._eof = False
+        self._text = ''
+
+    @property
+    def encoding(self):
+        return self._encoding
+
+    def readable(self):
+        return True
+
+    def _decide(self, data: bytes, final: bool):
+        # Reads on until SNIFF_BYTES from the first non-ASCII byte are in hand
+        start = NON_ASCII.search(data).start()
+        while not final and len(data) - start < self._sniff_bytes:
+            more = self._raw.read(self._sniff_bytes - (len(data) - start))
+            if not more:
+                final = True
+            data += more or b''
+        encoding = sniff_encoding(data[start:start + self._sniff_bytes])
+        if encoding == 'utf-8-sig' and self._started:
+            # A byte order mark only counts at the very start of the file
+            encoding = 'utf-8'
+        errors = 'strict' if encoding == 'latin1' else 'latin1_fallback'
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+        self._encoding = encoding
+        return data, final
+
+    def _fill(self, size):
+        data = self._raw.read(size) or b''
+        final = not data
+        with stage("decode", self._key) as span:
+            span.add(bytes=len(data))
+            if self._decoder is None and not final:
+                if data.isascii():
+                    self._started = True
+                    self._text += data.decode('ascii')
+                    return
+                data, final = self._decide(data, final)
+            if self._decoder is not None:
+                self._text += self._decoder.decode(data, final)
+            elif final:
+                self._encoding = 'ascii'
+            self._started = True
+            self._eof = final
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            while not self._eof:
+                self._fill(-1)
+            text, self._text = self._text, ''
+            return text
+        while len(self._text) < size and not self._eof:
+            self._fill(max(size, self._sniff_bytes))
+        text, self._text = self._text[:size], self._text[size:]
+        return text
+
+def open_csv_text(raw, key=None) -> DecodingReader:
+    """
+    Text stream of a CSV opened in binary mode, for pd.read_csv without an
+    encoding; see DecodingReader. Only SNIFF_BYTES are ever held beyond
+    what the reader asks for.
+    """
+    return DecodingReader(raw, key=key)
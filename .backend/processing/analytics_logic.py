@@ -1,125 +1,151 @@
 import asyncio
 import logging
+from contextlib import asynccontextmanager
 from sqlalchemy import select, func, desc
-from ingestion.database import SunshineEntry, AsyncSessionLocal
+from ingestion.database import AdminTaxRollup
+from ingestion.serving import ServingSessionLocal
+from processing.columnar import ANALYTICS_ENGINE, sunshine_columns
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def calculate_admin_tax(year: int = None):
+@asynccontextmanager
+async def session_scope(session=None):
+    """
+    Yields the caller's session, or a new session on the serving database
+    (the published snapshot) closed on exit.
+    """
+    if session is not None:
+        yield session
+    else:
+        async with ServingSessionLocal() as own_session:
+            yield own_session
+
+class SharedSession:
+    """
+    Lets several analytics functions run concurrently (asyncio.gather) over
+    one AsyncSession: statements take turns on its connection, inside one
+    read transaction, while the Python-side processing interleaves.
+    Results from AsyncSession.execute are already buffered.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.lock = asyncio.Lock()
+
+    async def execute(self, *args, **kwargs):
+        async with self.lock:
+            return await self.session.execute(*args, **kwargs)
+
+async def calculate_admin_tax(year: int = None, session=None):
     """
     Args:
         year (Optional[int]): The specific year to analyze. If None, uses the latest available year.
+        session (Optional): Session to query through. If None, opens its own
+            (or uses the columnar engine, when selected).
     """
-    async with AsyncSessionLocal() as session:
+    if session is None and ANALYTICS_ENGINE == "columnar":
+        columns = await sunshine_columns()
+        target_year = year if year is not None else (columns.latest_year() or 2023)
+        return admin_tax_summary(target_year, *columns.admin_tax_totals(target_year))
+
+    async with session_scope(session) as session:
         # Determine target year
         if year is None:
-            stmt_latest_year = select(func.max(SunshineEntry.year))
+            stmt_latest_year = select(func.max(AdminTaxRollup.year))
             result_year = await session.execute(stmt_latest_year)
             target_year = result_year.scalar() or 2023
         else:
             target_year = year
 
-        # Health Sector Filters (English and French)
-        health_filters = [
-            SunshineEntry.sector.ilike('%Hospital%'),
-            SunshineEntry.sector.ilike('%Hôpitaux%'),
-            SunshineEntry.sector.ilike('%Public Health%'),
-            SunshineEntry.sector.ilike('%Santé%'),
-            SunshineEntry.sector.ilike('%Seconded%Health%')
-        ]
-        # Combine with OR logic for sector match
-        from sqlalchemy import or_
-        sector_condition = or_(*health_filters)
+        # Health sectors only, answered from the ingest-time rollup
+        health_rollup = (
+            select(func.sum(AdminTaxRollup.salary_sum))
+            .where(AdminTaxRollup.year == target_year)
+            .where(AdminTaxRollup.sector_group == 'health')
+        )
 
         # Total Clinical Spend
         result_clinical = await session.execute(
-            select(func.sum(SunshineEntry.salary))
-            .where(SunshineEntry.classification == 'clinical')
-            .where(SunshineEntry.year == target_year)
-            .where(sector_condition)
+            health_rollup.where(AdminTaxRollup.classification == 'clinical')
         )
         total_clinical = result_clinical.scalar() or 0.0
         
         # Total Bureaucratic Spend
         result_bureaucratic = await session.execute(
-            select(func.sum(SunshineEntry.salary))
-            .where(or_(SunshineEntry.classification == 'bureaucratic', SunshineEntry.classification == 'unknown'))
-            .where(SunshineEntry.year == target_year)
-            .where(sector_condition)
+            health_rollup.where(AdminTaxRollup.classification.in_(['bureaucratic', 'unknown']))
         )
         total_bureaucratic = result_bureaucratic.scalar() or 0.0
         
-        # Total Analyzed Spend (Health Only)
-        total_spend = total_clinical + total_bureaucratic
-        
-        if total_spend == 0:
-            return {
-                "year": target_year,
-                "admin_tax_percentage": 0, 
-                "total_clinical": 0, 
-                "total_bureaucratic": 0,
-                "total_budget": 0,
-                "note": "No data found for this year or sector filter."
-            }
-            
-        admin_tax_percentage = (total_bureaucratic / total_spend) * 100
-        
-        # Approximate Ontario Health Budget History (Billion $) - Source: FAO/Public Accounts
-        BUDGET_HISTORY = {
-            2014: 50.8, 2015: 51.9, 2016: 53.0, 2017: 55.2, 
-            2018: 59.3, 2019: 63.7, 2020: 71.5, 2021: 76.9, 
-            2022: 75.2, 2023: 85.5
-        }
-        # Approximate Ontario Total Revenue History (Billion $) - Source: FAO/Public Accounts
-        REVENUE_HISTORY = {
-            2014: 118.0, 2015: 128.0, 2016: 140.7, 2017: 150.6,
-            2018: 153.7, 2019: 156.1, 2020: 164.9, 2021: 185.1,
-            2022: 192.9, 2023: 204.4
-        }
-        
-        total_budget = BUDGET_HISTORY.get(target_year, 85.5) * 1_000_000_000
-        total_revenue = REVENUE_HISTORY.get(target_year, 204.4) * 1_000_000_000
-        
-        healthcare_portion_percentage = (total_budget / total_revenue)
+        return admin_tax_summary(target_year, total_clinical, total_bureaucratic)
+
+def admin_tax_summary(target_year: int, total_clinical, total_bureaucratic) -> dict:
+    """
+    Formats the admin tax panel from one year's health-sector salary totals.
+    """
+    # Total Analyzed Spend (Health Only)
+    total_spend = total_clinical + total_bureaucratic
 
+    if total_spend == 0:
         return {
             "year": target_year,
-            "total_clinical": total_clinical,
-            "total_bureaucratic": total_bureaucratic,
-            "admin_tax_percentage": admin_tax_percentage,
-            "total_budget": total_budget,
-            "healthcare_portion_percentage": healthcare_portion_percentage
+            "admin_tax_percentage": 0, 
+            "total_clinical": 0, 
+            "total_bureaucratic": 0,
+            "total_budget": 0,
+            "note": "No data found for this year or sector filter."
         }
 
-async def calculate_historical_admin_tax():
+    admin_tax_percentage = (total_bureaucratic / total_spend) * 100
+
+    # Approximate Ontario Health Budget History (Billion $) - Source: FAO/Public Accounts
+    BUDGET_HISTORY = {
+        2014: 50.8, 2015: 51.9, 2016: 53.0, 2017: 55.2, 
+        2018: 59.3, 2019: 63.7, 2020: 71.5, 2021: 76.9, 
+        2022: 75.2, 2023: 85.5
+    }
+    # Approximate Ontario Total Revenue History (Billion $) - Source: FAO/Public Accounts
+    REVENUE_HISTORY = {
+        2014: 118.0, 2015: 128.0, 2016: 140.7, 2017: 150.6,
+        2018: 153.7, 2019: 156.1, 2020: 164.9, 2021: 185.1,
+        2022: 192.9, 2023: 204.4
+    }
+
+    total_budget = BUDGET_HISTORY.get(target_year, 85.5) * 1_000_000_000
+    total_revenue = REVENUE_HISTORY.get(target_year, 204.4) * 1_000_000_000
+
+    healthcare_portion_percentage = (total_budget / total_revenue)
+
+    return {
+        "year": target_year,
+        "total_clinical": total_clinical,
+        "total_bureaucratic": total_bureaucratic,
+        "admin_tax_percentage": admin_tax_percentage,
+        "total_budget": total_budget,
+        "healthcare_portion_percentage": healthcare_portion_percentage
+    }
+
+async def calculate_historical_admin_tax(session=None):
     """
     Calculates the Administrative Tax % for each year available in the database (Health Sectors Only).
     """
     logger.info("Calculating historical trends (Health Only)...")
-    async with AsyncSessionLocal() as session:
-        # Health Sector Filters
-        health_filters = [
-            SunshineEntry.sector.ilike('%Hospital%'),
-            SunshineEntry.sector.ilike('%Hôpitaux%'),
-            SunshineEntry.sector.ilike('%Public Health%'),
-            SunshineEntry.sector.ilike('%Santé%'),
-            SunshineEntry.sector.ilike('%Seconded%Health%')
-        ]
-        from sqlalchemy import or_
-        sector_condition = or_(*health_filters)
+    if session is None and ANALYTICS_ENGINE == "columnar":
+        columns = await sunshine_columns()
+        return admin_tax_history(columns.yearly_admin_tax_totals())
 
-        # Group by Year and Classification
+    async with session_scope(session) as session:
+        # Group by Year and Classification (Health sectors, from the rollup)
         stmt = (
             select(
-                SunshineEntry.year,
-                SunshineEntry.classification,
-                func.sum(SunshineEntry.salary).label("total_salary")
+                AdminTaxRollup.year,
+                AdminTaxRollup.classification,
+                func.sum(AdminTaxRollup.salary_sum).label("total_salary")
             )
-            .where(sector_condition)
-            .group_by(SunshineEntry.year, SunshineEntry.classification)
-            .order_by(SunshineEntry.year)
+            .where(AdminTaxRollup.sector_group == 'health')
+            .group_by(AdminTaxRollup.year, AdminTaxRollup.classification)
+            .order_by(AdminTaxRollup.year)
         )
         
         result = await session.execute(stmt)
@@ -144,48 +170,55 @@ async def calculate_historical_admin_tax():
             elif classification == "bureaucratic" or classification == "unknown":
                 yearly_data[year]["bureaucratic"] += amount
 
-        # Format output with growth metrics
-        history = []
-        baseline_year = None
-        baseline_bureaucratic = None
-        baseline_clinical = None
-        
-        for year in sorted(yearly_data.keys()):
-            clinical = yearly_data[year]["clinical"]
-            bureaucratic = yearly_data[year]["bureaucratic"]
-            total = clinical + bureaucratic
-            
-            if total > 0:
-                admin_tax_pct = (bureaucratic / total) * 100
-                
-                # Calculate growth from baseline (first year)
-                if baseline_year is None:
-                    baseline_year = year
-                    baseline_bureaucratic = bureaucratic
-                    baseline_clinical = clinical
-                    bureaucratic_growth_pct = 0
-                    clinical_growth_pct = 0
-                else:
-                    bureaucratic_growth_pct = ((bureaucratic - baseline_bureaucratic) / baseline_bureaucratic) * 100 if baseline_bureaucratic > 0 else 0
-                    clinical_growth_pct = ((clinical - baseline_clinical) / baseline_clinical) * 100 if baseline_clinical > 0 else 0
-                
-                history.append({
-                    "year": year,
-                    "admin_tax_percentage": round(admin_tax_pct, 2),
-                    "total_clinical": clinical,
-                    "total_bureaucratic": bureaucratic,
-                    "bureaucratic_growth_pct": round(bureaucratic_growth_pct, 1),
-                    "clinical_growth_pct": round(clinical_growth_pct, 1)
-                })
-        
-        return history
+        return admin_tax_history(yearly_data)
+
+def admin_tax_history(yearly_data: dict) -> list:
+    """
+    Formats the admin tax trend from {year: {"clinical", "bureaucratic"}}
+    health-sector salary totals, with growth from the first year.
+    """
+    # Format output with growth metrics
+    history = []
+    baseline_year = None
+    baseline_bureaucratic = None
+    baseline_clinical = None
+
+    for year in sorted(yearly_data.keys()):
+        clinical = yearly_data[year]["clinical"]
+        bureaucratic = yearly_data[year]["bureaucratic"]
+        total = clinical + bureaucratic
+
+        if total > 0:
+            admin_tax_pct = (bureaucratic / total) * 100
+
+            # Calculate growth from baseline (first year)
+            if baseline_year is None:
+                baseline_year = year
+                baseline_bureaucratic = bureaucratic
+                baseline_clinical = clinical
+                bureaucratic_growth_pct = 0
+                clinical_growth_pct = 0
+            else:
+                bureaucratic_growth_pct = ((bureaucratic - baseline_bureaucratic) / baseline_bureaucratic) * 100 if baseline_bureaucratic > 0 else 0
+                clinical_growth_pct = ((clinical - baseline_clinical) / baseline_clinical) * 100 if baseline_clinical > 0 else 0
+
+            history.append({
+                "year": year,
+                "admin_tax_percentage": round(admin_tax_pct, 2),
+                "total_clinical": clinical,
+                "total_bureaucratic": bureaucratic,
+                "bureaucratic_growth_pct": round(bureaucratic_growth_pct, 1),
+                "clinical_growth_pct": round(clinical_growth_pct, 1)
+            })
 
-async def get_budget_breakdown(year: int = 2023):
+    return history
+
+async def get_budget_breakdown(year: int = 2023, session=None):
     """
     Retrieves the granular budget breakdown for a specific year.
     """
     from ingestion.database import BudgetBreakdown
-    async with AsyncSessionLocal() as session:
+    async with session_scope(session) as session:
         stmt = select(BudgetBreakdown).where(BudgetBreakdown.year == year)
         result = await session.execute(stmt)
         rows = result.scalars().all()
@@ -208,12 +241,12 @@ async def get_budget_breakdown(year: int = 2023):
             "categories": categories
         }
 
-async def get_historical_budget_trends():
+async def get_historical_budget_trends(session=None):
     """
     Returns the trend of Frontline vs Bureaucratic spending using BudgetBreakdown data.
     """
     from ingestion.database import BudgetBreakdown
-    async with AsyncSessionLocal() as session:
+    async with session_scope(session) as session:
         stmt = select(BudgetBreakdown).order_by(BudgetBreakdown.year)
         result = await session.execute(stmt)
         rows = result.scalars().all()
@@ -240,6 +273,50 @@ async def get_historical_budget_trends():
             
         return history
 
+async def get_lobbying_network(limit: int = 100, session=None):
+    """
+    Returns raw lobbying registry entries for the frontend graph construction.
+    """
+    from ingestion.database import LobbyingEntry
+    async with session_scope(session) as session:
+        result = await session.execute(select(LobbyingEntry).limit(limit))
+        entries = result.scalars().all()
+        return [
+            {
+                "lobbyist": e.lobbyist_name,
+                "client": e.client_org,
+                "target": e.government_institution,
+                "subject": e.subject_matter
+            }
+            for e in entries
+        ]
+
+# Panels of /api/dashboard, in response order
+DASHBOARD_PANELS = ("admin_tax", "trends_admin_tax", "budget_breakdown", "trends_budget")
+
+async def get_dashboard(year: int = None, budget_year: int = 2023, fields=None):
+    """
+    Computes the dashboard panels in one call, concurrently over a single
+    shared session (one connection, one consistent read).
+    Args:
+        year (Optional[int]): Year for the admin tax panel. If None, uses the latest available year.
+        budget_year (int): Year for the budget breakdown panel.
+        fields (Optional[list]): Subset of DASHBOARD_PANELS to compute. If None, computes all of them.
+    """
+    fields = [f for f in DASHBOARD_PANELS if fields is None or f in fields]
+    async with ServingSessionLocal() as session:
+        shared = SharedSession(session)
+        # The columnar engine answers the admin tax panels from its own arrays
+        admin_tax_session = None if ANALYTICS_ENGINE == "columnar" else shared
+        panels = {
+            "admin_tax": lambda: calculate_admin_tax(year, session=admin_tax_session),
+            "trends_admin_tax": lambda: calculate_historical_admin_tax(session=admin_tax_session),
+            "budget_breakdown": lambda: get_budget_breakdown(budget_year, session=shared),
+            "trends_budget": lambda: get_historical_budget_trends(session=shared),
+        }
+        results = await asyncio.gather(*(panels[field]() for field in fields))
+    return dict(zip(fields, results))
+
 if __name__ == "__main__":
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
@@ -1,7 +1,16 @@
 import asyncio
+import hashlib
+import json
 import logging
-from sqlalchemy import select
-from ingestion.database import SunshineEntry, AsyncSessionLocal
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+import pandas as pd
+from sqlalchemy import select, insert
+from ingestion.database import JobTitleDim, ClassifierRuleSet, engine, init_db
+from ingestion.generation import bump_generation
+from ingestion.partitions import partition_years, partition_name
+from processing.rollup import refresh_admin_tax_rollup
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,46 +51,181 @@ def classify_role(job_title: str) -> str:
 
     return "unknown"
 
-async def process_classifications():
+@lru_cache(maxsize=None)
+def _compile_keywords(keywords: tuple):
+    # One alternation regex per keyword list; re.search over it is equivalent
+    # to `any(keyword in title for keyword in keywords)`.
+    return re.compile("|".join(re.escape(keyword) for keyword in keywords))
+
+def classify_roles(job_titles) -> pd.Series:
+    """
+    Vectorized classify_role over a whole column of job titles.
+    Accepts a pandas Series or any array-like and returns a Series of
+    'clinical' / 'bureaucratic' / 'unknown' aligned to the input, identical
+    to calling classify_role on each element (bureaucratic checked first).
+    Each distinct title is matched only once.
+    """
+    titles = job_titles if isinstance(job_titles, pd.Series) else pd.Series(job_titles)
+
+    # Missing and empty titles are 'unknown', same as classify_role
+    codes, uniques = pd.factorize(titles.astype(object), use_na_sentinel=True)
+    lowered = pd.Series(uniques, dtype=object).astype(str).str.lower()
+
+    bureaucratic_re = _compile_keywords(tuple(BUREAUCRATIC_KEYWORDS))
+    clinical_re = _compile_keywords(tuple(CLINICAL_KEYWORDS))
+
+    labels = pd.Series("unknown", index=lowered.index, dtype=object)
+    is_bureaucratic = lowered.str.contains(bureaucratic_re, regex=True)
+    labels[is_bureaucratic] = "bureaucratic"
+
+    # Only titles that are not bureaucratic need the clinical scan
+    remaining = lowered[~is_bureaucratic]
+    labels[remaining.index[remaining.str.contains(clinical_re, regex=True)]] = "clinical"
+
+    # Map unique results back onto every row (-1 marks a missing title)
+    lookup = pd.Series(list(labels) + ["unknown"], dtype=object)
+    return pd.Series(lookup.to_numpy()[codes], index=titles.index, dtype=object)
+
+# Distinct job titles classified per page of the reclassification pass
+TITLE_PAGE_SIZE = 5000
+
+# Per-connection table of (job_title_id, classification) for titles whose
+# lookup entry changed, joined into the set-based row UPDATE
+TITLE_MAP_TABLE = "temp.title_classification_map"
+
+def rules_hash(clinical_keywords, bureaucratic_keywords) -> str:
+    """
+    Version of a keyword rule set. Keyword order does not affect
+    classification, so the lists are hashed sorted.
+    """
+    payload = json.dumps({"clinical": sorted(clinical_keywords), "bureaucratic": sorted(bureaucratic_keywords)})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+async def _applied_rules(conn):
+    stmt = select(ClassifierRuleSet).order_by(ClassifierRuleSet.id.desc()).limit(1)
+    return (await conn.execute(stmt)).first()
+
+def changed_keywords(applied) -> set:
+    """
+    Keywords added to or removed from either list since the applied rule set.
+    Only titles containing one of them can classify differently.
+    """
+    changed = set()
+    for old, new in ((json.loads(applied.clinical_keywords), CLINICAL_KEYWORDS),
+                     (json.loads(applied.bureaucratic_keywords), BUREAUCRATIC_KEYWORDS)):
+        changed |= set(old) ^ set(new)
+    return changed
+
+async def refresh_title_lookup(conn, page_size: int = TITLE_PAGE_SIZE) -> int:
+    """
+    Brings job_title_dim.classification in line with the current keyword
+    lists. Titles not classified yet are always evaluated; when the rules
+    changed since the applied rule set, only titles containing an added or
+    removed keyword are re-evaluated. Titles are paged by id (keyset).
+    Titles whose classification changed are staged in TITLE_MAP_TABLE.
+    Returns the number of changed titles.
     """
-    Scans the database for 'unknown' entries and classifies them.
-    (Used for batch processing after ingestion)
+    applied = await _applied_rules(conn)
+    current_hash = rules_hash(CLINICAL_KEYWORDS, BUREAUCRATIC_KEYWORDS)
+
+    delta_re = None
+    if applied is not None and applied.rules_hash != current_hash:
+        changed = changed_keywords(applied)
+        logger.info(f"Classification rules changed ({len(changed)} keywords added or removed).")
+        if changed:
+            delta_re = _compile_keywords(tuple(sorted(changed)))
+
+    stmt = select(JobTitleDim.id, JobTitleDim.name, JobTitleDim.classification).order_by(JobTitleDim.id).limit(page_size)
+    if delta_re is None:
+        stmt = stmt.where(JobTitleDim.classification == None)
+
+    last_id = 0
+    titles_seen = 0
+    titles_changed = 0
+    while True:
+        page = (await conn.execute(stmt.where(JobTitleDim.id > last_id))).all()
+        if not page:
+            break
+        last_id = page[-1].id
+        titles_seen += len(page)
+
+        candidates = [t for t in page if t.classification is None or delta_re.search(t.name.lower())]
+        labels = classify_roles([t.name for t in candidates])
+        updates = [(label, t.id) for t, label in zip(candidates, labels) if label != t.classification]
+        if updates:
+            await conn.exec_driver_sql("UPDATE job_title_dim SET classification = ? WHERE id = ?", updates)
+            await conn.exec_driver_sql(
+                f"INSERT INTO {TITLE_MAP_TABLE} (job_title_id, classification) VALUES (?, ?)",
+                [(title_id, label) for label, title_id in updates],
+            )
+            titles_changed += len(updates)
+        logger.info(f"Scanned {titles_seen} titles ({titles_changed} reclassified)...")
+
+    if applied is None or applied.rules_hash != current_hash:
+        await conn.execute(insert(ClassifierRuleSet).values(
+            rules_hash=current_hash,
+            clinical_keywords=json.dumps(CLINICAL_KEYWORDS),
+            bureaucratic_keywords=json.dumps(BUREAUCRATIC_KEYWORDS),
+            applied_at=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        ))
+    return titles_changed
+
+async def _apply_title_map(conn) -> tuple:
+    """
+    Copies the staged title classifications onto the sunshine_list rows of
+    those titles with one UPDATE ... FROM per year partition.
+    Returns (rows updated, years touched).
+    """
+    rows_updated = 0
+    years = set()
+    for year in await partition_years(conn):
+        table = partition_name(year)
+        result = await conn.exec_driver_sql(f"""
+            UPDATE {table} SET classification = m.classification
+            FROM {TITLE_MAP_TABLE} m
+            WHERE {table}.job_title_id = m.job_title_id
+              AND {table}.classification IS NOT m.classification
+        """)
+        if result.rowcount:
+            rows_updated += result.rowcount
+            years.add(year)
+    return rows_updated, years
+
+async def process_classifications(page_size: int = TITLE_PAGE_SIZE):
+    """
+    Classifies each distinct job title once into the job_title_dim lookup
+    and applies the result to its rows with a set-based update.
+    (Used for batch processing after ingestion and after editing the keyword lists)
+    Only titles that are new or affected by a rule change are evaluated,
+    and only their rows and years are rewritten.
+    Returns the number of rows reclassified.
     """
     logger.info("Starting Classification Agent...")
-    
-    async with AsyncSessionLocal() as session:
-        # Fetch unclassified entries
-        batch_size = 1000
-        result = await session.execute(
-            select(SunshineEntry).where(SunshineEntry.classification == "unknown").limit(batch_size)
+    await init_db()  # adds job_title_dim.classification on older databases
+
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql(
+            f"CREATE TABLE IF NOT EXISTS {TITLE_MAP_TABLE} (job_title_id INTEGER PRIMARY KEY, classification TEXT)"
         )
-        batch = result.scalars().all()
-        
-        if not batch:
-            logger.info("No unclassified entries found.")
-            return 0
+        await conn.exec_driver_sql(f"DELETE FROM {TITLE_MAP_TABLE}")
 
-        logger.info(f"Processing batch of {len(batch)} entries...")
-        
+        # Lookup, rows, rollup and the rule-set version commit together
+        titles_changed = await refresh_title_lookup(conn, page_size)
         count_updated = 0
-        for entry in batch:
-            new_class = classify_role(entry.job_title)
-            if new_class != "unknown":
-                entry.classification = new_class
-                count_updated += 1
-        
-        await session.commit()
-        await session.commit()
-        logger.info(f"Classified {count_updated} entries in this batch.")
-        return len(batch)
+        if titles_changed:
+            count_updated, years_updated = await _apply_title_map(conn)
+            # Keep the admin tax rollup in step with the reclassified rows
+            if years_updated:
+                await refresh_admin_tax_rollup(conn, years_updated)
+                logger.info(f"Refreshed admin tax rollup for years {sorted(years_updated)}.")
+        await conn.exec_driver_sql(f"DELETE FROM {TITLE_MAP_TABLE}")
+        await conn.commit()
+    if count_updated:
+        bump_generation()
+
+    logger.info(f"Classified {count_updated} entries across {titles_changed} changed titles.")
+    return count_updated
 
 if __name__ == "__main__":
     # Allow running this script directly to process backlog
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    while True:
-        # Run in loops until no more to process
-        # For simplicity in this script, just run once or a few times
-        processed = loop.run_until_complete(process_classifications())
-        if processed == 0:
-            break
+    asyncio.run(process_classifications())
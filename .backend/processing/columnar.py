@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import shutil
+import sqlite3
+import numpy as np
+import pandas as pd
+from ingestion.database import database_path
+from ingestion.partitions import PARTITION_LIST_SQL, partition_name, years_from_names
+from ingestion.serving import serving_generation
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Optional in-memory columnar engine for the admin tax analytics.
+# ANALYTICS_ENGINE=columnar loads sunshine_list from the serving database into
+# one NumPy array per column and answers calculate_admin_tax and
+# calculate_historical_admin_tax with masked reductions over them; the
+# default, 'sql', answers them from admin_tax_rollup.
+# With the columnar engine, publish_snapshot also writes the arrays next to
+# the snapshot (<snapshot>.columns/*.npy), which the API memory-maps instead
+# of reading the rows back out of SQLite.
+ANALYTICS_ENGINE = os.environ.get("ANALYTICS_ENGINE", "sql").lower()
+if ANALYTICS_ENGINE not in ("sql", "columnar"):
+    raise ValueError(f"Unknown ANALYTICS_ENGINE: {ANALYTICS_ENGINE}")
+
+CACHE_SUFFIX = ".columns"
+
+# Column -> dtype. Strings are already dimension ids (categorical codes);
+# classification is coded against CLASSIFICATIONS, -1 for NULL.
+COLUMN_DTYPES = {
+    "year": np.int16,
+    "sector_id": np.int32,
+    "employer_id": np.int32,
+    "job_title_id": np.int32,
+    "salary": np.float64,
+    "benefits": np.float64,
+    "classification": np.int8,
+}
+CLASSIFICATIONS = ["clinical", "bureaucratic", "unknown"]
+
+class SunshineColumns:
+    """
+    sunshine_list as columnar arrays, plus sector_dim.is_health indexed by
+    sector id. NULL ids load as 0 (no dimension row) and NULL amounts as 0.0,
+    which is how they count in the SQL sums. Rows are in partition order,
+    so each year is one contiguous slice.
+    """
+
+    def __init__(self, columns: dict, sector_is_health, source: str = None):
+        self.columns = columns
+        self.sector_is_health = sector_is_health
+        self.source = source
+        self._health_salary = None
+        self._years = None
+
+    @classmethod
+    def from_sqlite(cls, path: str):
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            years = years_from_names(name for (name,) in conn.execute(PARTITION_LIST_SQL))
+            frames = [
+                pd.read_sql_query(f"SELECT {', '.join(COLUMN_DTYPES)} FROM {partition_name(year)}", conn)
+                for year in years
+            ]
+            sectors = conn.execute("SELECT id, is_health FROM sector_dim").fetchall()
+        finally:
+            conn.close()
+
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=list(COLUMN_DTYPES))
+        columns = {}
+        for name, dtype in COLUMN_DTYPES.items():
+            if name == "classification":
+                values = pd.Categorical(df[name], categories=CLASSIFICATIONS).codes
+            else:
+                values = pd.to_numeric(df[name]).fillna(0)
+            columns[name] = np.ascontiguousarray(values, dtype=dtype)
+
+        sector_is_health = np.zeros(max((sector_id for sector_id, _ in sectors), default=0) + 1, dtype=bool)
+        for sector_id, flag in sectors:
+            sector_is_health[sector_id] = bool(flag)
+        return cls(columns, sector_is_health, source=path)
+
+    @classmethod
+    def from_cache(cls, directory: str):
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["classifications"] != CLASSIFICATIONS:
+            raise ValueError(f"{directory} was written with other classification codes")
+        columns = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in COLUMN_DTYPES}
+        sector_is_health = np.load(os.path.join(directory, "sector_is_health.npy"))
+        return cls(columns, sector_is_health, source=directory)
+
+    def write_cache(self, directory: str):
+        """
+        Writes the arrays as .npy files (plus meta.json) into directory,
+        replacing it whole.
+        """
+        tmp_dir = directory + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name, values in self.columns.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), values)
+        np.save(os.path.join(tmp_dir, "sector_is_health.npy"), self.sector_is_health)
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"rows": len(self), "classifications": CLASSIFICATIONS}, f)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp_dir, directory)
+
+    def __len__(self):
+        return len(self.columns["year"])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(values.nbytes for values in self.columns.values()) + self.sector_is_health.nbytes
+
+    def health_salary(self):
+        # Salaries with non-health rows zeroed: the health filter as weights.
+        # Computed once per load, the data never changes under an instance.
+        if self._health_salary is None:
+            health = self.sector_is_health[self.columns["sector_id"]]
+            self._health_salary = np.where(health, self.columns["salary"], 0.0)
+        return self._health_salary
+
+    def years(self) -> list:
+        # Rows are year-ordered: a year starts wherever the value changes
+        if self._years is None:
+            year = self.columns["year"]
+            self._years = year[np.flatnonzero(np.diff(year, prepend=year[:1] - 1))].tolist()
+        return self._years
+
+    def latest_year(self):
+        return int(self.columns["year"][-1]) if len(self) else None
+
+    def year_rows(self, year: int) -> slice:
+        start, stop = np.searchsorted(self.columns["year"], [year, year + 1])
+        return slice(int(start), int(stop))
+
+    def admin_tax_totals(self, year: int) -> tuple:
+        """
+        Health-sector (clinical, bureaucratic) salary totals for one year;
+        'unknown' counts as bureaucratic.
+        """
+        rows = self.year_rows(year)
+        totals = np.bincount(self.columns["classification"][rows] + 1, weights=self.health_salary()[rows],
+                             minlength=len(CLASSIFICATIONS) + 1)
+        return float(totals[1]), float(totals[2] + totals[3])
+
+    def yearly_admin_tax_totals(self) -> dict:
+        """
+        {year: {"clinical": total, "bureaucratic": total}} for every year.
+        """
+        totals = {}
+        for year in self.years():
+            clinical, bureaucratic = self.admin_tax_totals(year)
+            totals[year] = {"clinical": clinical, "bureaucratic": bureaucratic}
+        return totals
+
+def cache_path(snapshot_path: str) -> str:
+    return snapshot_path + CACHE_SUFFIX
+
+def write_columns_cache(source: str, directory: str) -> SunshineColumns:
+    columns = SunshineColumns.from_sqlite(source)
+    columns.write_cache(directory)
+    return columns
+
+def load_columns(snapshot_path: str = None) -> SunshineColumns:
+    """
+    Loads the columns of a published snapshot (from its .npy cache when
+    present) or, with no snapshot, of the live database.
+    """
+    if snapshot_path is None:
+        return SunshineColumns.from_sqlite(database_path())
+    if os.path.isdir(cache_path(snapshot_path)):
+        return SunshineColumns.from_cache(cache_path(snapshot_path))
+    return SunshineColumns.from_sqlite(snapshot_path)
+
+_loaded = {"key": None, "columns": None}
+_load_lock = asyncio.Lock()
+
+async def sunshine_columns() -> SunshineColumns:
+    """
+    The columns for the data the API is serving. Reloaded when a new
+    snapshot is published or the data generation moves.
+    """
+    key = serving_generation()
+    if _loaded["key"] != key:
+        async with _load_lock:
+            if _loaded["key"] != key:
+                columns = await asyncio.to_thread(load_columns, key[1])
+                _loaded.update(key=key, columns=columns)
+                logger.info(f"Columnar engine loaded {len(columns):,} rows ({columns.nbytes / 2**20:.1f} MB) from {columns.source}.")
+    return _loaded["columns"]
+
+async def verify_columnar(columns: SunshineColumns = None, session=None):
+    """
+    Compares the columnar totals with the SQL answers of the admin tax
+    analytics. Returns a list of mismatch descriptions (empty when consistent).
+    """
+    from processing.analytics_logic import calculate_admin_tax, calculate_historical_admin_tax, session_scope
+    columns = columns or await sunshine_columns()
+    mismatches = []
+
+    def compare(label, expected, actual):
+        if not math.isclose(expected or 0.0, actual, rel_tol=1e-9, abs_tol=1e-6):
+            mismatches.append(f"{label}: columnar {actual} != sql {expected}")
+
+    async with session_scope(session) as session:
+        history = await calculate_historical_admin_tax(session=session)
+        yearly = columns.yearly_admin_tax_totals()
+        sql_years = {entry["year"] for entry in history}
+        for year in sorted(sql_years ^ {y for y, t in yearly.items() if t["clinical"] + t["bureaucratic"] > 0}):
+            mismatches.append(f"{year}: in only one of the sql and columnar histories")
+        for entry in history:
+            year = entry["year"]
+            if year not in sql_years or year not in yearly:
+                continue
+            compare(f"{year} trend clinical", entry["total_clinical"], yearly[year]["clinical"])
+            compare(f"{year} trend bureaucratic", entry["total_bureaucratic"], yearly[year]["bureaucratic"])
+            summary = await calculate_admin_tax(year, session=session)
+            clinical, bureaucratic = columns.admin_tax_totals(year)
+            compare(f"{year} clinical", summary["total_clinical"], clinical)
+            compare(f"{year} bureaucratic", summary["total_bureaucratic"], bureaucratic)
+    return mismatches
+
+async def main():
+    columns = await sunshine_columns()
+    mismatches = await verify_columnar(columns)
+    for mismatch in mismatches:
+        logger.warning(f"Columnar mismatch: {mismatch}")
+    logger.info(f"Columnar engine checked against SQL ({len(mismatches)} mismatches).")
+    return mismatches
+
+if __name__ == "__main__":
+    asyncio.run(main())
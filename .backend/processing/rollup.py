@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import math
+from sqlalchemy import select, delete, insert, func, case, literal, or_, table, column
+from ingestion.database import SunshineEntry, SectorDim, AdminTaxRollup, AsyncSessionLocal, init_db
+from ingestion.generation import bump_generation
+from ingestion.partitions import partition_years, partition_name, partition_table
+from processing.sectors import HEALTH_SECTOR_PATTERNS, sync_sector_dim
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def sector_group():
+    """
+    'health' / 'other' grouping expression, from sector_dim.is_health.
+    Use with select_from(with_sector_dim()).
+    """
+    return case((SectorDim.is_health == True, literal('health')), else_=literal('other'))
+
+def with_sector_dim(source=None):
+    source = SunshineEntry.__table__ if source is None else source
+    return source.outerjoin(SectorDim.__table__, source.c.sector_id == SectorDim.id)
+
+def aggregate_partition(year: int):
+    """
+    Rollup rows (year x classification x sector group) for one year,
+    scanning that year's partition table directly rather than the view.
+    """
+    source = partition_table(partition_name(year))
+    group = sector_group()
+    return (
+        select(
+            source.c.year,
+            source.c.classification,
+            group,
+            func.count(),
+            func.sum(source.c.salary),
+            func.min(source.c.salary),
+            func.max(source.c.salary),
+            func.sum(source.c.benefits),
+            func.min(source.c.benefits),
+            func.max(source.c.benefits),
+        )
+        .select_from(with_sector_dim(source))
+        .group_by(source.c.year, source.c.classification, group)
+    )
+
+async def refresh_admin_tax_rollup(conn, years=None):
+    """
+    Rebuilds admin_tax_rollup rows (year x classification x sector group) from
+    sunshine_list for the given years, or for every year if years is None.
+    conn is the AsyncConnection or AsyncSession doing the write, so the
+    rollup commits together with the rows it summarizes.
+    """
+    partitioned = set(await partition_years(conn))
+    clear = delete(AdminTaxRollup)
+    if years is None:
+        years = partitioned
+    else:
+        years = set(years)
+        clear = clear.where(AdminTaxRollup.year.in_(years))
+
+    await conn.execute(clear)
+    for year in sorted(years & partitioned):
+        await conn.execute(
+            insert(AdminTaxRollup).from_select(
+                ['year', 'classification', 'sector_group', 'row_count',
+                 'salary_sum', 'salary_min', 'salary_max',
+                 'benefits_sum', 'benefits_min', 'benefits_max'],
+                aggregate_partition(year),
+            )
+        )
+
+# The flat compatibility view, for a reference that shares nothing with the
+# rollup's own query (partition tables, sector_dim.is_health)
+sunshine_list_named = table(
+    "sunshine_list_named",
+    column("year"), column("sector"), column("classification"), column("salary"), column("benefits"),
+)
+
+def raw_admin_tax(years=None):
+    """
+    The rollup's totals computed the way the analytics did before it:
+    sector names matched against HEALTH_SECTOR_PATTERNS with ILIKE over
+    sunshine_list_named, grouped by year, classification and sector group.
+    """
+    named = sunshine_list_named.c
+    group = case((or_(*[named.sector.ilike(p) for p in HEALTH_SECTOR_PATTERNS]), literal('health')),
+                 else_=literal('other'))
+    stmt = (
+        select(named.year, named.classification, group, func.count(),
+               func.sum(named.salary), func.sum(named.benefits))
+        .group_by(named.year, named.classification, group)
+    )
+    if years is not None:
+        stmt = stmt.where(named.year.in_(years))
+    return stmt
+
+async def verify_admin_tax_rollup(years=None):
+    """
+    Compares admin_tax_rollup with an independent raw scan of sunshine_list
+    (raw_admin_tax), so a wrong is_health flag or grouping shows up as well
+    as a stale rollup.
+    Returns a list of mismatch descriptions (empty when consistent).
+    """
+    rollup_stmt = select(
+        AdminTaxRollup.year,
+        AdminTaxRollup.classification,
+        AdminTaxRollup.sector_group,
+        AdminTaxRollup.row_count,
+        AdminTaxRollup.salary_sum,
+        AdminTaxRollup.benefits_sum,
+    )
+    if years is not None:
+        years = set(years)
+        rollup_stmt = rollup_stmt.where(AdminTaxRollup.year.in_(years))
+
+    async with AsyncSessionLocal() as session:
+        raw = {}
+        for r in (await session.execute(raw_admin_tax(years))).all():
+            # columns: year, classification, group, count, salary sum, benefits sum
+            raw[(r[0], r[1], r[2])] = {"row_count": r[3], "salary_sum": r[4], "benefits_sum": r[5]}
+        rolled = {(r.year, r.classification, r.sector_group): r for r in (await session.execute(rollup_stmt)).all()}
+
+    mismatches = []
+    for key in sorted(set(raw) | set(rolled), key=str):
+        if key not in rolled:
+            mismatches.append(f"{key}: missing from rollup")
+        elif key not in raw:
+            mismatches.append(f"{key}: stale rollup row")
+        else:
+            r, s = raw[key], rolled[key]
+            if r["row_count"] != s.row_count:
+                mismatches.append(f"{key}: row_count {s.row_count} != {r['row_count']}")
+            for field in ('salary_sum', 'benefits_sum'):
+                if not math.isclose(r[field] or 0.0, getattr(s, field) or 0.0, rel_tol=1e-9, abs_tol=1e-6):
+                    mismatches.append(f"{key}: {field} {getattr(s, field)} != {r[field]}")
+    return mismatches
+
+async def rollup_rows(conn) -> list:
+    """
+    Every admin_tax_rollup row in key order, to tell whether a rebuild
+    changed anything.
+    """
+    stmt = select(
+        AdminTaxRollup.year, AdminTaxRollup.classification, AdminTaxRollup.sector_group,
+        AdminTaxRollup.row_count,
+        AdminTaxRollup.salary_sum, AdminTaxRollup.salary_min, AdminTaxRollup.salary_max,
+        AdminTaxRollup.benefits_sum, AdminTaxRollup.benefits_min, AdminTaxRollup.benefits_max,
+    ).order_by(AdminTaxRollup.year, AdminTaxRollup.classification, AdminTaxRollup.sector_group)
+    return [tuple(r) for r in (await conn.execute(stmt)).all()]
+
+async def rebuild_and_verify():
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        before = await rollup_rows(session)
+        # Sector flags may have changed with the rules, so rebuild every year
+        sectors_changed = await sync_sector_dim(session)
+        await refresh_admin_tax_rollup(session)
+        changed = sectors_changed > 0 or await rollup_rows(session) != before
+        await session.commit()
+    # Cached responses stay valid when the rebuild reproduced the same data
+    if changed:
+        bump_generation()
+    mismatches = await verify_admin_tax_rollup()
+    for mismatch in mismatches:
+        logger.warning(f"Rollup mismatch: {mismatch}")
+    logger.info(f"Admin tax rollup rebuilt ({'changed' if changed else 'unchanged'}, {len(mismatches)} mismatches).")
+    return mismatches
+
+if __name__ == "__main__":
+    # Full rebuild, e.g. for a database ingested before the rollup existed
+    # or after editing HEALTH_SECTOR_PATTERNS
+    asyncio.run(rebuild_and_verify())
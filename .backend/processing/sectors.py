@@ -0,0 +1,55 @@
+import re
+from sqlalchemy import select, update
+from ingestion.database import SectorDim
+from ingestion.dimensions import intern_names
+
+# Health Sector Rules (English and French)
+# The single definition of which Sunshine List sectors count as health. The
+# patterns use SQL LIKE syntax and are evaluated once per distinct sector
+# name when it enters sector_dim; queries then group or filter on
+# sector_dim.is_health (see processing/rollup.py).
+HEALTH_SECTOR_PATTERNS = ['%Hospital%', '%Hôpitaux%', '%Public Health%', '%Santé%', '%Seconded%Health%']
+
+# SQLite's case-insensitive LIKE only folds ASCII letters
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+def _like_to_regex(pattern: str):
+    parts = (".*" if ch == "%" else "." if ch == "_" else re.escape(ch) for ch in pattern.translate(_ASCII_LOWER))
+    return re.compile("".join(parts), re.DOTALL)
+
+_HEALTH_REGEXES = [_like_to_regex(p) for p in HEALTH_SECTOR_PATTERNS]
+
+def is_health_sector(name) -> bool:
+    """
+    True if a sector name matches any HEALTH_SECTOR_PATTERNS, with the same
+    semantics as the former `sector ILIKE pattern` SQL filters.
+    """
+    if name is None:
+        return False
+    folded = str(name).translate(_ASCII_LOWER)
+    return any(regex.fullmatch(folded) for regex in _HEALTH_REGEXES)
+
+async def ensure_sectors(conn, names) -> dict:
+    """
+    Returns {name: sector_dim.id} for the given sector names, inserting any
+    that are new (with is_health computed from the rules).
+    conn is an AsyncConnection or AsyncSession.
+    """
+    return await intern_names(conn, SectorDim, names, sector_attributes)
+
+def sector_attributes(name) -> dict:
+    return {"is_health": is_health_sector(name)}
+
+async def sync_sector_dim(conn):
+    """
+    Re-evaluates is_health for every sector in sector_dim, so edited
+    HEALTH_SECTOR_PATTERNS take effect.
+    Returns the number of sectors whose is_health flag changed.
+    """
+    changed = 0
+    for sector_id, name, flag in (await conn.execute(select(SectorDim.id, SectorDim.name, SectorDim.is_health))).all():
+        expected = is_health_sector(name)
+        if flag is None or bool(flag) != expected:
+            await conn.execute(update(SectorDim).where(SectorDim.id == sector_id).values(is_health=expected))
+            changed += 1
+    return changed
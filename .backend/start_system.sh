@@ -13,6 +13,18 @@ export DATABASE_URL="sqlite+aiosqlite:///./healthcare.db"
 export PYTHONPATH=$PWD
 python processing/classifier.py
 
+# 2b. Rebuild the admin tax rollup (covers databases ingested before it existed)
+echo "Rebuilding Admin Tax Rollup..."
+python processing/rollup.py
+
+# 2c. Publish the read-only serving snapshot the API reads
+echo "Publishing Serving Snapshot..."
+python ingestion/publish_snapshot.py
+
+# 2d. Refresh the static dashboard snapshot (public/data/*.json)
+echo "Exporting Static Dashboard Data..."
+python analytics/export_static.py
+
 # 3. Start Backend (Background)
 echo "Starting Backend API..."
 uvicorn analytics.main:app --host 0.0.0.0 --port 8000 &
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import tempfile
+import pandas as pd
+import pytest
+
+# The ingestion modules read DATABASE_URL, the snapshot directory and the
+# report switch at import, so they are pointed at a scratch directory before
+# any test module imports them.
+SCRATCH_DIR = tempfile.mkdtemp(prefix="docx_tests_")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(SCRATCH_DIR, 'healthcare.db')}"
+os.environ["SERVING_SNAPSHOT_DIR"] = os.path.join(SCRATCH_DIR, "snapshots")
+os.environ["INGEST_REPORT"] = "off"
+
+SAMPLE_YEARS = (2021, 2022)
+
+def sample_year_frame(year: int) -> pd.DataFrame:
+    """
+    A few cleaned rows per year covering the edge cases of the health
+    grouping: English and French health sectors, a "Seconded" sector,
+    non-health sectors and a missing classification.
+    """
+    return pd.DataFrame({
+        'sector': ["Hospitals & Boards of Public Health", "Hôpitaux et conseils de santé publique",
+                   "Seconded (Health and Long-Term Care)", "Municipalities & Services", "Universities",
+                   "Hospitals & Boards of Public Health"],
+        'employer': ["Ottawa Hospital", "Hôpital Montfort", "Ministry of Health", "City of Ottawa",
+                     "University of Ottawa", "Ottawa Hospital"],
+        'job_title': ["Registered Nurse", "Infirmière", "Policy Advisor", "Manager", "Professor", "Director"],
+        'salary': [110_000.0 + year, 120_000.5, 130_000.0, 140_000.0, 150_000.0, 200_000.0 + year],
+        'benefits': [500.0, 600.0, 700.0, 800.0, 900.0, 1_000.0],
+        'classification': ["clinical", "clinical", "bureaucratic", "bureaucratic", None, "bureaucratic"],
+    })
+
+async def build_sample_database():
+    from sqlalchemy import text
+    from ingestion.bulk_load import sunshine_bulk_loader
+    from ingestion.database import init_db
+    from ingestion.generation import bump_generation
+    from ingestion.partitions import partition_name
+    from processing.rollup import refresh_admin_tax_rollup
+
+    await init_db()
+    for year in SAMPLE_YEARS:
+        async with sunshine_bulk_loader(year, replace=True) as loader:
+            await loader.load(sample_year_frame(year))
+            await loader.finish()
+            # A row with no sector at all (the loaders always intern a name)
+            await loader.conn.execute(text(
+                f"INSERT INTO {partition_name(year)} (year, sector_id, salary, benefits, classification) "
+                "VALUES (:year, NULL, 105000.0, 100.0, 'clinical')"
+            ), {"year": year})
+            await refresh_admin_tax_rollup(loader.conn, [year])
+    bump_generation()
+
+@pytest.fixture
+def sample_database():
+    """
+    The scratch database (DATABASE_URL) with SAMPLE_YEARS loaded and their
+    rollup refreshed.
+    """
+    asyncio.run(build_sample_database())
+    return os.path.join(SCRATCH_DIR, "healthcare.db")
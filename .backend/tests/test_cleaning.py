@@ -0,0 +1,67 @@
+import random
+import numpy as np
+import pandas as pd
+import pytest
+from ingestion.cleaning import clean_amounts
+
+# The helpers as they were in ingest_historical.py / ingest_historical_budget.py
+def clean_currency(val):
+    if pd.isna(val): return 0.0
+    val_str = str(val).strip()
+    if val_str in ['-', '–', '']: return 0.0
+    clean = val_str.replace('$', '').replace(',', '').replace(' ', '')
+    try: return float(clean)
+    except: return 0.0
+
+def clean_amt(val):
+    if pd.isna(val): return 0.0
+    s = str(val).replace('$', '').replace(',', '').replace('(', '-').replace(')', '').replace(' ', '')
+    try: return float(s)
+    except: return 0.0
+
+# Values seen in (or plausible for) the source files
+MESSY = [
+    '$123,456.78', ' $1,000 ', '–', '-', '', None, float('nan'), '(1,234)', '$(5.5)', '1_000', '١٢٣',
+    'nan', 'inf', '1e5', ' 12 \t', '\t1\t2', 'N/A', 5, 7.25, True, '12\xa0', '\xa0-\xa0', '(-5)', '--5',
+    '0.1', '123456789012345678901234567890', '+3', '1,2,3', '$ 4 5 6', pd.NA, '$0.00', '-$12.50',
+]
+
+def messy_column(rows, seed=0):
+    """
+    Mostly "$123,456.78" amounts with MESSY values mixed in.
+    """
+    rng = random.Random(seed)
+    values = []
+    for _ in range(rows):
+        if rng.random() < 0.02:
+            values.append(rng.choice(MESSY))
+        else:
+            values.append(f"${rng.uniform(100_000, 400_000):,.2f}")
+    return pd.Series(values, dtype=object)
+
+FIXTURES = {
+    "messy values": lambda: pd.Series(MESSY, dtype=object),
+    "messy values (str dtype)": lambda: pd.Series([v for v in MESSY if isinstance(v, str)] + [None], dtype="str"),
+    "floats": lambda: pd.Series([1.5, np.nan, 3.0, 1e300, -0.0]),
+    "integers": lambda: pd.Series([1, 2 ** 60 + 1, -7]),
+    "booleans": lambda: pd.Series([True, False]),
+    "clean strings": lambda: pd.Series(["$1,234.50", "0", "-12"]),
+    "mixed column": lambda: messy_column(20_000),
+}
+
+def assert_same(expected, actual):
+    assert np.array_equal(np.asarray(expected, dtype=float), np.asarray(actual, dtype=float), equal_nan=True)
+
+@pytest.mark.parametrize("label", FIXTURES)
+def test_clean_amounts_matches_clean_currency(label):
+    column = FIXTURES[label]()
+    assert_same(column.apply(clean_currency), clean_amounts(column))
+
+@pytest.mark.parametrize("label", FIXTURES)
+def test_negative_parentheses_matches_clean_amt(label):
+    column = FIXTURES[label]()
+    assert_same(column.apply(clean_amt), clean_amounts(column, negative_parentheses=True))
+
+def test_index_is_kept():
+    column = pd.Series(["$1", "(2)"], index=[10, 20])
+    assert list(clean_amounts(column, negative_parentheses=True).index) == [10, 20]
@@ -0,0 +1,17 @@
+import asyncio
+from ingestion.publish_snapshot import publish_snapshot
+from ingestion.serving import current_snapshot_path
+from processing.columnar import sunshine_columns, verify_columnar
+
+def test_columnar_engine_matches_sql(sample_database):
+    snapshot = publish_snapshot(force=True)
+    assert snapshot is not None and current_snapshot_path() == snapshot
+
+    async def run():
+        return await verify_columnar(), (await sunshine_columns()).yearly_admin_tax_totals()
+
+    mismatches, totals = asyncio.run(run())
+    assert mismatches == []
+    # The French hospital counts as health; the row with no sector does not
+    assert sorted(totals) == [2021, 2022]
+    assert totals[2021]["clinical"] == 110_000.0 + 2021 + 120_000.5
@@ -0,0 +1,46 @@
+import asyncio
+from sqlalchemy import text
+from analytics.metrics import db_pool_checkout_wait, db_queries, instrument_engine
+from ingestion.database import create_db_engine
+
+def checkout_count(profile):
+    series = db_pool_checkout_wait.values.get((profile,))
+    return series[2] if series else 0
+
+def test_checkout_wait_includes_time_blocked_on_a_full_pool(tmp_path):
+    async def run():
+        # The writer profile pools a single connection
+        engine = create_db_engine("writer", f"sqlite+aiosqlite:///{tmp_path / 'metrics.db'}")
+        instrument_engine(engine, "test-writer")
+        try:
+            held = await engine.connect()
+
+            async def release():
+                await asyncio.sleep(0.2)
+                await held.close()
+
+            releaser = asyncio.create_task(release())
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            await releaser
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+    assert checkout_count("test-writer") == 2
+    assert db_pool_checkout_wait.values[("test-writer",)][1] >= 0.2
+    assert db_queries.values[("test-writer", "none")] >= 1
+
+def test_checkouts_are_timed_after_dispose(tmp_path):
+    async def run():
+        engine = create_db_engine("writer", f"sqlite+aiosqlite:///{tmp_path / 'metrics.db'}")
+        instrument_engine(engine, "test-disposed")
+        try:
+            await engine.dispose()
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+    assert checkout_count("test-disposed") == 1
@@ -0,0 +1,20 @@
+import asyncio
+from sqlalchemy import text
+from ingestion.database import engine
+from processing.rollup import rebuild_and_verify, refresh_admin_tax_rollup, verify_admin_tax_rollup
+
+def test_rollup_matches_the_raw_scan(sample_database):
+    assert asyncio.run(verify_admin_tax_rollup()) == []
+
+def test_wrong_health_flag_is_a_mismatch(sample_database):
+    async def run():
+        async with engine.begin() as conn:
+            await conn.execute(text("UPDATE sector_dim SET is_health = 0 WHERE name LIKE 'Hôpitaux%'"))
+            await refresh_admin_tax_rollup(conn)
+        return await verify_admin_tax_rollup()
+
+    try:
+        assert asyncio.run(run()) != []
+    finally:
+        # The rebuild re-derives the flags from the rules
+        assert asyncio.run(rebuild_and_verify()) == []
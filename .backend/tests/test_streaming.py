@@ -0,0 +1,76 @@
+import io
+import pandas as pd
+from ingestion.streaming import SNIFF_BYTES, open_csv_text, sniff_encoding
+
+HEADER = "Sector,Last Name,First Name,Salary Paid,Taxable Benefits,Employer,Job Title\n"
+ASCII_ROW = "Hospitals,Smith,Jane,\"$120,000.00\",$500.00,Ottawa Hospital,Nurse\n"
+LATE_ROW = "Hôpitaux,Tremblay,Élise,\"$130,000.00\",$600.00,Hôpital Montfort,Infirmière\n"
+
+def read(data: bytes, chunksize=None):
+    stream = open_csv_text(io.BytesIO(data))
+    if chunksize:
+        frame = pd.concat(pd.read_csv(stream, chunksize=chunksize))
+    else:
+        frame = pd.read_csv(stream)
+    return frame, stream.encoding
+
+def ascii_rows(size: int) -> str:
+    return ASCII_ROW * (size // len(ASCII_ROW) + 1)
+
+def test_sniff_ascii_prefix_is_undecided():
+    assert sniff_encoding(b"Sector,Salary\n") is None
+    assert sniff_encoding("Santé et".encode("utf-8")) == "utf-8-sig"
+    assert sniff_encoding("Santé et".encode("latin1")) == "latin1"
+
+def test_latin1_after_ascii_sniff_window():
+    text = HEADER + ascii_rows(2 * SNIFF_BYTES) + LATE_ROW
+    data = text.encode("latin1")
+    assert data.index(b"\xf4") > SNIFF_BYTES
+    frame, encoding = read(data, chunksize=1000)
+    assert encoding == "latin1"
+    assert not frame.apply(lambda column: column.astype(str).str.contains("�")).any().any()
+    last = frame.iloc[-1]
+    assert last["Sector"] == "Hôpitaux"
+    assert last["Employer"] == "Hôpital Montfort"
+    assert last["Job Title"] == "Infirmière"
+    assert frame["Sector"].str.contains("Hôpitaux", regex=False).sum() == 1
+
+def test_utf8_after_ascii_sniff_window():
+    text = HEADER + ascii_rows(2 * SNIFF_BYTES) + LATE_ROW
+    frame, encoding = read(text.encode("utf-8"))
+    assert encoding.startswith("utf-8")
+    assert frame.iloc[-1]["Job Title"] == "Infirmière"
+
+def test_utf8_bom():
+    frame, encoding = read(("﻿" + HEADER + LATE_ROW).encode("utf-8"))
+    assert encoding == "utf-8-sig"
+    assert list(frame.columns)[0] == "Sector"
+    assert frame.iloc[0]["Employer"] == "Hôpital Montfort"
+
+def test_latin1_bytes_in_utf8_file_are_not_replaced():
+    # Sniffed as UTF-8, then a latin1 row well past the sniff window
+    data = (HEADER + LATE_ROW + ascii_rows(2 * SNIFF_BYTES)).encode("utf-8") + LATE_ROW.encode("latin1")
+    frame, encoding = read(data)
+    assert encoding == "utf-8-sig"
+    assert frame.iloc[0]["Job Title"] == "Infirmière"
+    assert frame.iloc[-1]["Job Title"] == "Infirmière"
+
+def test_pure_ascii():
+    frame, encoding = read((HEADER + ASCII_ROW * 3).encode("ascii"))
+    assert encoding == "ascii"
+    assert len(frame) == 3
+
+def read_with_fallback(data: bytes):
+    # The loop both ingestors used: parse the whole file once per candidate encoding
+    for enc in ['utf-8-sig', 'latin1', 'cp1252']:
+        try:
+            return pd.read_csv(io.BytesIO(data), encoding=enc)
+        except Exception:
+            continue
+
+def test_same_frames_as_the_fallback_loop():
+    frame = pd.DataFrame({"Ministry Name": ["Santé et Soins de longue durée", "Health"] * 500,
+                          "Amount $": ["$1,234", "(5)"] * 500})
+    for encoding in ("utf-8-sig", "latin1"):
+        data = frame.to_csv(index=False).encode(encoding)
+        assert read(data)[0].equals(read_with_fallback(data))